@@ -0,0 +1,435 @@
+# src/api/main.py
+import asyncio
+import json
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+try:
+    from src.llm.async_client import AsyncLLMClient
+    from src.llm.client import LLMConfig
+    from src.llm.parsing import IncrementalTestCaseParser
+    from src.llm.prompts import PromptBuilder
+    from src.llm.repair import arepair_output
+    from src.llm.scheduler import request_context
+    from src.llm.warmup import ModelWarmer
+    from src.shared.infrastructure.telemetry import get_telemetry
+    from src.validators.coverage import analyze_coverage
+    from src.validators.structure import output_json_schema
+except ImportError:
+    # Add parent directory to path for direct execution
+    sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+    from src.llm.async_client import AsyncLLMClient
+    from src.llm.client import LLMConfig
+    from src.llm.parsing import IncrementalTestCaseParser
+    from src.llm.prompts import PromptBuilder
+    from src.llm.repair import arepair_output
+    from src.llm.scheduler import request_context
+    from src.llm.warmup import ModelWarmer
+    from src.shared.infrastructure.telemetry import get_telemetry
+    from src.validators.coverage import analyze_coverage
+    from src.validators.structure import output_json_schema
+
+# Prometheus text exposition format
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Callers sharing a tenant id share its place in the scheduler's queues
+TENANT_HEADER = "X-Tenant-ID"
+
+
+# Request/Response models
+class GenerateRequest(BaseModel):
+    user_story: str = Field(..., min_length=20, max_length=500)
+    include_examples: bool = True
+
+
+class BatchGenerateRequest(BaseModel):
+    user_stories: List[str] = Field(..., min_length=1, max_length=100)
+    include_examples: bool = True
+
+
+class TestCaseResponse(BaseModel):
+    id: str
+    title: str
+    priority: str
+    given: str
+    when: str
+    then: str
+
+
+class GenerateResponse(BaseModel):
+    user_story: str
+    test_cases: List[TestCaseResponse]
+    validation: dict
+    metadata: dict
+    quality_metrics: Optional[dict] = None
+    coverage_metrics: Optional[dict] = None
+
+
+class BatchItemResponse(BaseModel):
+    user_story: str
+    success: bool
+    test_cases: List[TestCaseResponse] = []
+    validation: Optional[dict] = None
+    metadata: dict = {}
+    quality_metrics: Optional[dict] = None
+    coverage_metrics: Optional[dict] = None
+    error: Optional[str] = None
+
+
+class BatchGenerateResponse(BaseModel):
+    results: List[BatchItemResponse]
+    succeeded: int
+    failed: int
+
+
+class GenerationError(Exception):
+    """Pipeline failure, carrying the HTTP status to report"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _tenant(request: Request) -> Optional[str]:
+    return request.headers.get(TENANT_HEADER) or None
+
+
+def create_app(
+    llm_client: Optional[AsyncLLMClient] = None,
+    prompt_builder: Optional[PromptBuilder] = None,
+    tracker=None,
+    enable_tracking: bool = True,
+    warm_up: bool = True,
+    warmer: Optional[ModelWarmer] = None,
+    repair_attempts: int = 1,
+    quality_validator=None,
+) -> FastAPI:
+    """
+    Build the API application.
+
+    One AsyncLLMClient (and its connection pool) is shared by every request
+    for the lifetime of the app. At startup the prompt examples are loaded
+    and, if warm_up is set, a ModelWarmer loads the configured Ollama models
+    on every endpoint and keeps pinging them so they stay resident. Request
+    latencies are reported as cold or warm under /health.
+
+    Output that fails validation is repaired locally and, if needed, with up
+    to repair_attempts short repair prompts before the request fails.
+
+    With a quality_validator (see src.validators.quality), each generation
+    is also scored by its LLM judge and the scores are returned and tracked.
+    A batch request is judged in one aevaluate_many pass, and judge calls go
+    through the generation client's scheduler.
+
+    Each pipeline stage runs in a telemetry span; stage latencies and the
+    retry, cache and validation counters are served in Prometheus format
+    under /metrics.
+
+    Model calls are scheduled by the client's GenerationScheduler:
+    /generate and /generate/stream as interactive requests, /generate/batch
+    as batch work that only uses spare capacity, each fair-shared by the
+    X-Tenant-ID header. A request the scheduler rejects gets a 503.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Interactive and batch endpoints share this client's scheduler, so
+        # one slot is kept for interactive requests
+        app.state.llm_client = llm_client or AsyncLLMClient(LLMConfig(
+            output_schema=output_json_schema(), reserved_interactive_slots=1))
+        app.state.prompt_builder = prompt_builder or PromptBuilder()
+        app.state.tracker = tracker
+        app.state.quality_validator = quality_validator
+        app.state.judge_client = None
+        if quality_validator is not None:
+            # Judge calls take slots from the same scheduler as generations,
+            # with the judge's own model settings and JSON schema
+            app.state.judge_client = AsyncLLMClient(
+                quality_validator.llm_client.config,
+                scheduler=getattr(app.state.llm_client, "scheduler", None))
+        if tracker is None and enable_tracking:
+            from src.mlflow_tracker import MLflowTracker
+            app.state.tracker = MLflowTracker()
+
+        # Warm-up: load few-shot examples and the models
+        app.state.prompt_builder.build("As a user, I want to warm up")
+        app.state.warmer = warmer
+        if warmer is None and warm_up and app.state.llm_client.config.provider == "ollama":
+            app.state.warmer = ModelWarmer.from_config(app.state.llm_client.config)
+        if app.state.warmer is not None:
+            await asyncio.to_thread(app.state.warmer.warm_up)
+            app.state.warmer.start()
+
+        yield
+
+        if app.state.warmer is not None:
+            app.state.warmer.stop()
+        if app.state.tracker is not None and hasattr(app.state.tracker, "close"):
+            app.state.tracker.close()
+        await app.state.llm_client.aclose()
+        if app.state.judge_client is not None:
+            await app.state.judge_client.aclose()
+
+    app = FastAPI(
+        title="Test Case Generator API",
+        description="Generate structured test cases from user stories",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+
+    async def run_pipeline(
+        state, user_story: str, include_examples: bool
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        PromptBuilder -> LLM -> JSON -> StructureValidator (+ repair) -> coverage
+        for one story.
+
+        Returns (response, structure_validation); quality scoring and
+        tracking are left to finish_pipelines so a batch is judged at once.
+        """
+        telemetry = get_telemetry()
+        with telemetry.span("pipeline"):
+            with telemetry.span("prompt_build"):
+                prompts = state.prompt_builder.build(
+                    user_story,
+                    include_examples=include_examples,
+                    structured_output=getattr(state.llm_client, "structured_output", False))
+            llm_result = await state.llm_client.agenerate(
+                prompts['user'], prompts['system'])
+
+            if llm_result.get("rejected"):
+                raise GenerationError(
+                    503, f"Generation capacity exhausted: {llm_result['error']}")
+            if llm_result.get("error"):
+                raise GenerationError(
+                    500, f"LLM generation failed: {llm_result['error']}")
+
+            if state.warmer is not None and not llm_result.get("cached"):
+                state.warmer.record(
+                    llm_result.get("model"), llm_result["latency"],
+                    llm_result.get("load_duration"))
+
+            with telemetry.span("parse_validate"):
+                structure_validation = await arepair_output(
+                    llm_result['text'], state.llm_client.agenerate, user_story,
+                    max_attempts=repair_attempts)
+            if not structure_validation['valid']:
+                errors = structure_validation['errors']
+                if errors and errors[0]['type'] == "json_invalid":
+                    raise GenerationError(
+                        500, f"Failed to parse LLM output as JSON: {errors[0]['message']}")
+                # The request was fine; the model's output was not
+                raise GenerationError(
+                    502, f"Invalid test case structure: {errors}")
+
+            # Deterministic and cheap (no model calls), so always computed
+            with telemetry.span("coverage"):
+                coverage_metrics = analyze_coverage(structure_validation['test_cases'])
+
+        response = {
+            "user_story": user_story,
+            "test_cases": structure_validation['test_cases'],
+            "validation": {
+                "structure_valid": structure_validation['valid'],
+                "count": structure_validation['count'],
+            },
+            "metadata": {
+                "latency": llm_result['latency'],
+                "tokens": llm_result['tokens'],
+                "model": llm_result.get('model'),
+                "provider": llm_result.get('provider'),
+                "cached": llm_result.get('cached', False),
+                "repair": structure_validation['repair'],
+            },
+            "quality_metrics": None,
+            "coverage_metrics": coverage_metrics,
+        }
+        return response, structure_validation
+
+    async def finish_pipelines(
+        state, outputs: List[Tuple[Dict[str, Any], Dict[str, Any]]]
+    ) -> None:
+        """
+        Score quality for every (response, structure_validation) in one
+        judge pass, then hand each to the tracker.
+        """
+        telemetry = get_telemetry()
+        if state.quality_validator is not None and outputs:
+            # One aevaluate_many call packs the stories into as few judge
+            # prompts as its batch_size allows
+            with telemetry.span("quality"):
+                scores = await state.quality_validator.aevaluate_many(
+                    [(response["user_story"], response["test_cases"])
+                     for response, _ in outputs],
+                    state.judge_client.agenerate)
+            for (response, _), score in zip(outputs, scores):
+                response["quality_metrics"] = score
+
+        if state.tracker is not None:
+            # Non-blocking: the tracker only enqueues the entries
+            with telemetry.span("tracking"):
+                for response, structure_validation in outputs:
+                    metadata = response["metadata"]
+                    state.tracker.log_generation(
+                        user_story=response["user_story"],
+                        test_cases=response["test_cases"],
+                        structure_validation=structure_validation,
+                        quality_metrics=response["quality_metrics"] or {},
+                        coverage_metrics=response["coverage_metrics"],
+                        latency=metadata["latency"],
+                        model_info={
+                            "model": metadata["model"],
+                            "provider": metadata["provider"],
+                        }
+                    )
+
+    @app.get("/")
+    async def root():
+        return {
+            "service": "Test Case Generator",
+            "version": "1.0.0",
+            "endpoints": {
+                "generate": "/generate",
+                "batch": "/generate/batch",
+                "stream": "/generate/stream",
+                "health": "/health",
+                "metrics": "/metrics",
+            }
+        }
+
+    @app.get("/health")
+    async def health_check(request: Request):
+        """Health check endpoint"""
+        client = request.app.state.llm_client
+        llm_healthy = await client.ahealth()
+        response = {
+            "status": "healthy" if llm_healthy else "degraded",
+            "llm": "connected" if llm_healthy else "error",
+            "model": client.config.model
+        }
+        if getattr(client, "balancer", None) is not None:
+            response["endpoints"] = client.endpoint_stats()
+        if request.app.state.warmer is not None:
+            response["models"] = request.app.state.warmer.stats()
+        response["tokens"] = get_telemetry().tokens.snapshot()
+        if getattr(client, "scheduler", None) is not None:
+            response["scheduler"] = client.scheduler_stats()
+        return response
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        """Stage latency histograms and counters in Prometheus text format"""
+        return PlainTextResponse(
+            get_telemetry().render_prometheus(), media_type=METRICS_CONTENT_TYPE)
+
+    @app.post("/generate", response_model=GenerateResponse)
+    async def generate_test_cases(body: GenerateRequest, request: Request):
+        """Generate test cases from user story"""
+        try:
+            with request_context("interactive", _tenant(request)):
+                output = await run_pipeline(
+                    request.app.state, body.user_story, body.include_examples)
+                await finish_pipelines(request.app.state, [output])
+            return output[0]
+        except GenerationError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    @app.post("/generate/batch", response_model=BatchGenerateResponse)
+    async def generate_batch(body: BatchGenerateRequest, request: Request):
+        """Generate test cases for many stories concurrently"""
+
+        state = request.app.state
+
+        async def run_one(user_story: str):
+            try:
+                return await run_pipeline(state, user_story, body.include_examples)
+            except GenerationError as e:
+                return {"user_story": user_story, "success": False, "error": e.detail}
+            except Exception as e:
+                # One story's failure must not fail the rest of the batch
+                return {"user_story": user_story, "success": False,
+                        "error": f"{type(e).__name__}: {e}"}
+
+        # The tasks inherit the batch context; the scheduler bounds how many
+        # reach the model at once and keeps interactive requests ahead of them
+        with request_context("batch", _tenant(request)):
+            outputs = await asyncio.gather(*(run_one(s) for s in body.user_stories))
+            generated = [output for output in outputs if isinstance(output, tuple)]
+            await finish_pipelines(state, generated)
+
+        results = [
+            {**output[0], "success": True} if isinstance(output, tuple) else output
+            for output in outputs
+        ]
+        succeeded = sum(1 for r in results if r["success"])
+        return {
+            "results": results,
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+        }
+
+    @app.post("/generate/stream")
+    async def generate_stream(body: GenerateRequest, request: Request):
+        """
+        Stream generation as Server-Sent Events.
+
+        Events: "token" (text delta), "test_case" (each validated test case as
+        soon as it completes), "invalid_test_case", and a final "done" with
+        latency/token stats (or "error").
+        """
+        state = request.app.state
+        tenant = _tenant(request)
+        prompts = state.prompt_builder.build(
+            body.user_story,
+            include_examples=body.include_examples,
+            structured_output=getattr(state.llm_client, "structured_output", False))
+
+        async def events() -> AsyncIterator[str]:
+            parser = IncrementalTestCaseParser()
+            reported_errors = 0
+            async for chunk in state.llm_client.agenerate_stream(
+                    prompts['user'], prompts['system'],
+                    priority="interactive", tenant=tenant):
+                if chunk["done"]:
+                    if chunk.get("error"):
+                        yield _sse("error", {"detail": chunk["error"]})
+                    else:
+                        if state.warmer is not None and not chunk.get("cached"):
+                            state.warmer.record(
+                                chunk.get("model"), chunk["latency"],
+                                chunk.get("load_duration"))
+                        summary = {k: v for k, v in chunk.items() if k != "text"}
+                        summary["count"] = len(parser.test_cases)
+                        yield _sse("done", summary)
+                    return
+
+                yield _sse("token", {"text": chunk["text"]})
+                for test_case in parser.feed(chunk["text"]):
+                    yield _sse("test_case", test_case.model_dump())
+                for error in parser.errors[reported_errors:]:
+                    yield _sse("invalid_test_case", {"detail": error["error"]})
+                reported_errors = len(parser.errors)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=8000)
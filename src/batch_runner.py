@@ -0,0 +1,283 @@
+# src/batch_runner.py
+"""
+Batch test case generation.
+
+Streams user stories from a JSONL (or JSON array) file through
+PromptBuilder -> LLMClient -> JSON extraction -> StructureValidator (with
+local and model-assisted repair of invalid output) using a worker pool,
+appending one result per line to an output JSONL file.
+Stories already written to the output with success are skipped, so an
+interrupted run resumes where it stopped and failed stories are retried.
+Model calls are scheduled as batch requests, so a runner sharing a
+scheduler with the API only uses the capacity interactive requests leave
+free.
+
+Usage:
+    python -m src.batch_runner data/validation/test_dataset.json results.jsonl --workers 4
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Iterator, Optional, Dict, Any, Set
+
+try:
+    from src.llm.cache import SQLiteCache
+    from src.llm.client import LLMClient, LLMConfig
+    from src.llm.repair import repair_output
+    from src.llm.prompts import PromptBuilder
+    from src.llm.scheduler import request_context
+    from src.shared.infrastructure.telemetry import get_telemetry
+    from src.validators.structure import output_json_schema
+except ImportError:
+    # Add parent directory to path for direct execution
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    from src.llm.cache import SQLiteCache
+    from src.llm.client import LLMClient, LLMConfig
+    from src.llm.repair import repair_output
+    from src.llm.prompts import PromptBuilder
+    from src.llm.scheduler import request_context
+    from src.shared.infrastructure.telemetry import get_telemetry
+    from src.validators.structure import output_json_schema
+
+
+def iter_stories(
+    path: str,
+    story_field: str = "user_story",
+    id_field: str = "id",
+) -> Iterator[Dict[str, str]]:
+    """
+    Yield {"id", "user_story"} items from a JSONL file or a JSON array file.
+
+    JSONL files are read line by line so the whole backlog is never held in
+    memory. Items without an id get their position as id. A line that is not
+    valid JSON, or a record that is neither an object nor a string, yields
+    {"id": <position>, "error": ...} instead of aborting the run.
+    """
+    def to_item(index: int, record) -> Optional[Dict[str, str]]:
+        if isinstance(record, str):
+            record = {story_field: record}
+        if not isinstance(record, dict):
+            kind = type(record).__name__
+            return {"id": str(index), "error": f"Expected an object or string, got {kind}"}
+        story = record.get(story_field)
+        if not story:
+            return None
+        return {"id": str(record.get(id_field, index)), "user_story": story}
+
+    with open(path) as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+
+        if first == "[":
+            records = enumerate(json.load(f))
+        else:
+            records = (
+                (index, line) for index, line in enumerate(f) if line.strip())
+
+        for index, record in records:
+            if first != "[":
+                try:
+                    record = json.loads(record)
+                except json.JSONDecodeError as e:
+                    yield {"id": str(index), "error": f"Invalid JSON: {e}"}
+                    continue
+            item = to_item(index, record)
+            if item:
+                yield item
+
+
+def load_completed_ids(output_path: str) -> Set[str]:
+    """Ids written to the output file as successful (for resume); failures are retried"""
+    completed = set()
+    path = Path(output_path)
+    if not path.exists():
+        return completed
+
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                if record.get("success"):
+                    completed.add(record["id"])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                # Ignore a partially written trailing line
+                continue
+    return completed
+
+
+class BatchRunner:
+    """Run the generation pipeline over many user stories in parallel"""
+
+    def __init__(
+        self,
+        llm_client: Optional[LLMClient] = None,
+        prompt_builder: Optional[PromptBuilder] = None,
+        workers: int = 4,
+        repair_attempts: int = 1,
+        tenant: Optional[str] = None,
+    ):
+        self.llm_client = llm_client or LLMClient(
+            LLMConfig(output_schema=output_json_schema()))
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        self.workers = workers
+        self.repair_attempts = repair_attempts
+        self.tenant = tenant
+
+    def process(self, item: Dict[str, str]) -> Dict[str, Any]:
+        """Run one story through the pipeline. Never raises."""
+        try:
+            with request_context("batch", self.tenant), \
+                    get_telemetry().span("pipeline", story_id=item["id"]):
+                return self._process(item)
+        except Exception as e:
+            # A failed story is reported in its result, not by aborting the run
+            return {
+                "id": item["id"],
+                "user_story": item["user_story"],
+                "success": False,
+                "error": f"{type(e).__name__}: {e}",
+            }
+
+    def _process(self, item: Dict[str, str]) -> Dict[str, Any]:
+        telemetry = get_telemetry()
+        story = item["user_story"]
+        result: Dict[str, Any] = {
+            "id": item["id"],
+            "user_story": story,
+            "success": False,
+        }
+
+        with telemetry.span("prompt_build"):
+            prompts = self.prompt_builder.build(
+                story,
+                structured_output=getattr(self.llm_client, "structured_output", False))
+        response = self.llm_client.generate(prompts['user'], prompts['system'])
+        result.update({
+            "latency": response.get("latency", 0.0),
+            "tokens": response.get("tokens", 0),
+            "model": response.get("model"),
+        })
+
+        if response.get("error"):
+            result["error"] = response["error"]
+            return result
+
+        with telemetry.span("parse_validate"):
+            validation = repair_output(
+                response.get("text", ""), self.llm_client.generate, story,
+                max_attempts=self.repair_attempts)
+        errors = validation["errors"]
+        if errors and errors[0]["type"] == "json_invalid":
+            result["error"] = f"Parse error: {errors[0]['message']}"
+            result["raw_output"] = response.get("text", "")
+            result["repair"] = validation["repair"]
+            result["tokens"] += validation["repair"]["tokens"]
+            return result
+
+        result["tokens"] += validation["repair"]["tokens"]
+        result.update({
+            "success": validation["valid"],
+            "errors": errors,
+            "test_cases": validation["test_cases"],
+            "count": validation["count"],
+            "repair": validation["repair"],
+        })
+        return result
+
+    def run(
+        self,
+        input_path: str,
+        output_path: str,
+        story_field: str = "user_story",
+        id_field: str = "id",
+    ) -> Dict[str, Any]:
+        """
+        Process every pending story in input_path, appending to output_path.
+
+        At most 2 x workers stories are in flight, so memory stays flat no
+        matter how large the input is.
+
+        Returns:
+            Summary dict with processed/succeeded/skipped counts and elapsed time
+        """
+        completed = load_completed_ids(output_path)
+        summary = {"processed": 0, "succeeded": 0, "skipped": 0}
+        write_lock = threading.Lock()
+        start = time.time()
+
+        def write(result: Dict[str, Any], out) -> None:
+            with write_lock:
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                summary["processed"] += 1
+                summary["succeeded"] += 1 if result["success"] else 0
+
+        with open(output_path, "a") as out, \
+                ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = set()
+            for item in iter_stories(input_path, story_field, id_field):
+                if item["id"] in completed:
+                    summary["skipped"] += 1
+                    continue
+                if "error" in item:
+                    # Unreadable input line: report it and keep going
+                    write({**item, "success": False}, out)
+                    continue
+
+                if len(pending) >= self.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write(future.result(), out)
+
+                pending.add(pool.submit(self.process, item))
+
+            for future in pending:
+                write(future.result(), out)
+
+        summary["elapsed"] = time.time() - start
+        return summary
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate test cases for a file of user stories")
+    parser.add_argument("input", help="JSONL or JSON array of user stories")
+    parser.add_argument("output", help="Output JSONL (appended, resumable)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--story-field", default="user_story")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--cache", default=None,
+                        help="SQLite file for caching responses across runs")
+    parser.add_argument("--repair-attempts", type=int, default=1,
+                        help="Repair prompts allowed per invalid output (0 = local fixes only)")
+    parser.add_argument("--tenant", default=None,
+                        help="Tenant to fair-share scheduler capacity under")
+    args = parser.parse_args(argv)
+
+    cache = SQLiteCache(args.cache) if args.cache else None
+    config = LLMConfig(
+        pool_max_connections=args.workers, output_schema=output_json_schema())
+
+    with LLMClient(config, cache=cache) as llm_client:
+        runner = BatchRunner(
+            llm_client=llm_client,
+            workers=args.workers,
+            repair_attempts=args.repair_attempts,
+            tenant=args.tenant,
+        )
+        summary = runner.run(
+            args.input, args.output, args.story_field, args.id_field)
+
+    print(f"Processed: {summary['processed']} "
+          f"(succeeded {summary['succeeded']}, skipped {summary['skipped']}) "
+          f"in {summary['elapsed']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
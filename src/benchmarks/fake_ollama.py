@@ -0,0 +1,256 @@
+# src/benchmarks/fake_ollama.py
+"""
+Local stand-in for an Ollama server, for benchmarks and tests.
+
+Speaks enough of Ollama's HTTP API for LLMClient, AsyncLLMClient,
+OllamaLoadBalancer and ModelWarmer: POST /api/chat (streaming and not),
+POST /api/generate (keep-alive pings) and GET /api/tags. Every chat reply
+is the same canned response, "decoded" one token at a time with a
+configurable per-token delay and jitter; a configurable share of requests
+fails with HTTP 500.
+
+Usage:
+    with FakeOllamaServer(token_delay=0.005) as server:
+        client = LLMClient(LLMConfig(ollama_base_url=server.url))
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+# A valid TestCaseOutput, so replies pass StructureValidator
+DEFAULT_RESPONSE = json.dumps({
+    "test_cases": [
+        {
+            "id": "TC_001",
+            "title": "User resets password with a valid email",
+            "priority": "critical",
+            "given": "a registered user on the forgot password page",
+            "when": "they submit their registered email address",
+            "then": "a single-use reset link is emailed to them",
+        },
+        {
+            "id": "TC_002",
+            "title": "Password reset fails for an unknown email",
+            "priority": "high",
+            "given": "a visitor on the forgot password page",
+            "when": "they submit an email that has no account",
+            "then": "an error message says no account was found",
+        },
+        {
+            "id": "TC_003",
+            "title": "Reset link at the maximum expiry boundary",
+            "priority": "medium",
+            "given": "a reset link issued exactly 24 hours ago",
+            "when": "the user opens the link to set a password",
+            "then": "the link is rejected as expired and can be re-sent",
+        },
+    ]
+})
+
+_TOKEN_RE = re.compile(r"\s*\S{1,4}")
+
+
+def split_tokens(text: str) -> List[str]:
+    """Cut text into token-sized pieces (up to 4 characters plus spacing)"""
+    return _TOKEN_RE.findall(text) or [text]
+
+
+class FakeOllamaServer:
+    """
+    Threaded HTTP server imitating Ollama, on 127.0.0.1 and a free port.
+
+    Args:
+        response_text: Content of every chat reply (default: 3 valid test cases)
+        token_delay: Seconds spent "decoding" each response token
+        jitter: Extra delay per request, uniform in [0, jitter] seconds
+        error_rate: Share of chat requests answered with HTTP 500
+        model: Model name reported by /api/tags
+        seed: Seed for the jitter and error draws, for repeatable runs
+    """
+
+    def __init__(
+        self,
+        response_text: str = DEFAULT_RESPONSE,
+        token_delay: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        model: str = "qwen3-vl:4b",
+        seed: int = 0,
+        port: int = 0,
+    ):
+        self.response_text = response_text
+        self.tokens = split_tokens(response_text)
+        self.token_delay = token_delay
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.model = model
+        self.requests: Counter = Counter()
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._httpd.serve_forever, name="fake-ollama", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def settings(self) -> Dict[str, Any]:
+        """Server parameters, for benchmark reports"""
+        return {
+            "token_delay": self.token_delay,
+            "jitter": self.jitter,
+            "error_rate": self.error_rate,
+            "response_tokens": len(self.tokens),
+        }
+
+    def _draw(self) -> tuple:
+        """(fail this request?, extra delay) from the seeded generator"""
+        with self._lock:
+            fail = self._random.random() < self.error_rate
+            extra = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+            if fail:
+                self.errors += 1
+        return fail, extra
+
+    def _chat_stats(self, prompt_tokens: int, elapsed: float) -> Dict[str, Any]:
+        """Ollama's timing and count fields; durations are in nanoseconds"""
+        eval_ns = int(len(self.tokens) * self.token_delay * 1e9)
+        return {
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int(elapsed * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": max(0, int(elapsed * 1e9) - eval_ns),
+            "eval_count": len(self.tokens),
+            "eval_duration": eval_ns,
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+            # Headers and body are separate writes; without TCP_NODELAY the
+            # client's delayed ACK adds ~40 ms to every response
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _read_json(self) -> Dict[str, Any]:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests[self.path] += 1
+                if self.path == "/api/tags":
+                    self._send_json(200, {"models": [
+                        {"name": server.model, "model": server.model}]})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                with server._lock:
+                    server.requests[self.path] += 1
+                body = self._read_json()
+                if self.path == "/api/generate":
+                    self._send_json(200, {
+                        "model": body.get("model", server.model),
+                        "created_at": _now(), "response": "", "done": True})
+                elif self.path == "/api/chat":
+                    self._chat(body)
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def _chat(self, body: Dict[str, Any]) -> None:
+                start = time.perf_counter()
+                fail, extra = server._draw()
+                if extra:
+                    time.sleep(extra)
+                if fail:
+                    self._send_json(500, {"error": "fake ollama: injected failure"})
+                    return
+
+                model = body.get("model", server.model)
+                prompt_tokens = sum(
+                    len(str(m.get("content", "")).split())
+                    for m in body.get("messages", []))
+
+                if not body.get("stream", True):
+                    time.sleep(server.token_delay * len(server.tokens))
+                    self._send_json(200, {
+                        "model": model,
+                        "created_at": _now(),
+                        "message": {"role": "assistant", "content": server.response_text},
+                        **server._chat_stats(prompt_tokens, time.perf_counter() - start),
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for token in server.tokens:
+                    if server.token_delay:
+                        time.sleep(server.token_delay)
+                    self._write_chunk({
+                        "model": model, "created_at": _now(),
+                        "message": {"role": "assistant", "content": token},
+                        "done": False,
+                    })
+                self._write_chunk({
+                    "model": model, "created_at": _now(),
+                    "message": {"role": "assistant", "content": ""},
+                    **server._chat_stats(prompt_tokens, time.perf_counter() - start),
+                })
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+        return Handler
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
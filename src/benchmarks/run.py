@@ -0,0 +1,318 @@
+# src/benchmarks/run.py
+"""
+Offline latency, throughput and memory benchmarks.
+
+Model calls go to a local FakeOllamaServer, so runs need no GPU or network
+and are repeatable. Benchmarks:
+
+    prompt_build        PromptBuilder.build, memoization off (cold builds)
+    structure_validate  StructureValidator.validate on a raw JSON reply
+    llm_generate        LLMClient.generate against the fake server
+    pipeline            BatchRunner.process: prompt -> generate -> validate
+
+The CPU-bound benchmarks run on one thread; llm_generate and pipeline run
+at each --concurrency level. Results (p50/p95/p99/mean/max latency in ms,
+throughput, error count, peak traced allocation and process max RSS) are
+written as JSON; --compare flags p95 or throughput regressions against an
+earlier results file and exits non-zero.
+
+Usage:
+    python -m src.benchmarks.run --output bench.json
+    python -m src.benchmarks.run --compare bench.json --max-regression 0.2
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from src.batch_runner import BatchRunner, iter_stories
+    from src.benchmarks.fake_ollama import DEFAULT_RESPONSE, FakeOllamaServer
+    from src.llm.client import LLMClient, LLMConfig
+    from src.llm.prompts import PromptBuilder
+    from src.validators.structure import StructureValidator, output_json_schema
+except ImportError:
+    # Add parent directory to path for direct execution
+    sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+    from src.batch_runner import BatchRunner, iter_stories
+    from src.benchmarks.fake_ollama import DEFAULT_RESPONSE, FakeOllamaServer
+    from src.llm.client import LLMClient, LLMConfig
+    from src.llm.prompts import PromptBuilder
+    from src.validators.structure import StructureValidator, output_json_schema
+
+STORIES_PATH = (
+    Path(__file__).parent.parent.parent / "data" / "validation" / "test_dataset.json"
+)
+
+# A call returns True on success; raising also counts as an error
+BenchFn = Callable[[int], bool]
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """q-th percentile (0-100) of already sorted values, interpolated"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def _max_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def measure_memory(fn: BenchFn, calls: int) -> float:
+    """Peak traced allocation in KiB over sequential calls"""
+    tracemalloc.start()
+    try:
+        for i in range(calls):
+            fn(i)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def run_benchmark(
+    name: str,
+    fn: BenchFn,
+    iterations: int,
+    concurrency: int = 1,
+    warmup: int = 5,
+    memory_calls: int = 20,
+) -> Dict[str, Any]:
+    """
+    Time iterations calls of fn over concurrency threads.
+
+    Latency percentiles come from an untraced run; memory from a separate
+    short sequential run under tracemalloc, which would skew timings.
+    """
+    for i in range(warmup):
+        fn(i)
+
+    def timed(i: int):
+        start = time.perf_counter()
+        try:
+            ok = fn(i)
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    if concurrency == 1:
+        samples = [timed(i) for i in range(iterations)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(timed, range(iterations)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(latency * 1000 for latency, _ in samples)
+    return {
+        "name": name,
+        "concurrency": concurrency,
+        "iterations": iterations,
+        "errors": sum(1 for _, ok in samples if not ok),
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "max": latencies[-1] if latencies else 0.0,
+        },
+        "throughput_per_s": iterations / wall if wall else 0.0,
+        "wall_s": wall,
+        "memory": {
+            "peak_alloc_kib": measure_memory(fn, min(memory_calls, iterations)),
+            "max_rss_mib": _max_rss_mb(),
+        },
+    }
+
+
+def build_benchmarks(
+    server_url: str, stories: List[str], max_concurrency: int
+) -> Tuple[Dict[str, Dict[str, Any]], LLMClient]:
+    """
+    ({name: {"fn": BenchFn, "io_bound": bool}}, the LLMClient they share);
+    close the client when done.
+    """
+    prompt_builder = PromptBuilder(cache_size=0)
+    raw_reply = DEFAULT_RESPONSE.encode()
+    client = LLMClient(LLMConfig(
+        ollama_base_url=server_url,
+        output_schema=output_json_schema(),
+        pool_max_connections=max_concurrency,
+        pool_max_keepalive=max_concurrency,
+        # Let every benchmark thread reach the server
+        max_concurrency=max_concurrency,
+        # Every call should reach the server, even for repeated stories
+        coalesce_requests=False,
+    ))
+    runner = BatchRunner(llm_client=client, prompt_builder=PromptBuilder())
+
+    def prompt_build(i: int) -> bool:
+        return bool(prompt_builder.build(stories[i % len(stories)])["user"])
+
+    def structure_validate(i: int) -> bool:
+        return StructureValidator.validate(raw_reply)["valid"]
+
+    def llm_generate(i: int) -> bool:
+        story = stories[i % len(stories)]
+        return not client.generate(f"{story} #{i}", "You write test cases.").get("error")
+
+    def pipeline(i: int) -> bool:
+        item = {"id": str(i), "user_story": f"{stories[i % len(stories)]} #{i}"}
+        return runner.process(item)["success"]
+
+    benchmarks = {
+        "prompt_build": {"fn": prompt_build, "io_bound": False},
+        "structure_validate": {"fn": structure_validate, "io_bound": False},
+        "llm_generate": {"fn": llm_generate, "io_bound": True},
+        "pipeline": {"fn": pipeline, "io_bound": True},
+    }
+    return benchmarks, client
+
+
+def run_suite(
+    server: FakeOllamaServer,
+    stories: List[str],
+    concurrency_levels: Sequence[int] = (1, 4, 16),
+    iterations: int = 200,
+    cpu_iterations: int = 2000,
+    only: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """Run every (selected) benchmark; returns the JSON-ready report"""
+    benchmarks, client = build_benchmarks(server.url, stories, max(concurrency_levels))
+    results = []
+    try:
+        for name, bench in benchmarks.items():
+            if only and name not in only:
+                continue
+            if bench["io_bound"]:
+                for concurrency in concurrency_levels:
+                    results.append(run_benchmark(
+                        name, bench["fn"], iterations, concurrency))
+            else:
+                results.append(run_benchmark(name, bench["fn"], cpu_iterations))
+    finally:
+        client.close()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "concurrency_levels": list(concurrency_levels),
+        },
+        "server": server.settings(),
+        "results": results,
+    }
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], max_regression: float = 0.2
+) -> List[str]:
+    """
+    Regressions of current against baseline, matched by (name, concurrency).
+
+    A regression is a p95 latency more than max_regression (a fraction)
+    above the baseline's, or a throughput more than max_regression below it.
+    """
+    before = {(r["name"], r["concurrency"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in current.get("results", []):
+        old = before.get((result["name"], result["concurrency"]))
+        if old is None:
+            continue
+        label = f"{result['name']} @ {result['concurrency']}"
+        old_p95, new_p95 = old["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        if old_p95 and new_p95 > old_p95 * (1 + max_regression):
+            regressions.append(
+                f"{label}: p95 {old_p95:.2f} -> {new_p95:.2f} ms")
+        old_tput, new_tput = old["throughput_per_s"], result["throughput_per_s"]
+        if old_tput and new_tput < old_tput * (1 - max_regression):
+            regressions.append(
+                f"{label}: throughput {old_tput:.1f} -> {new_tput:.1f}/s")
+    return regressions
+
+
+def format_table(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{'benchmark':<20} {'conc':>4} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'p99 ms':>9} {'ops/s':>10} {'errors':>6} {'peak KiB':>9}"
+    ]
+    for r in report["results"]:
+        latency = r["latency_ms"]
+        lines.append(
+            f"{r['name']:<20} {r['concurrency']:>4} {latency['p50']:>9.3f} "
+            f"{latency['p95']:>9.3f} {latency['p99']:>9.3f} "
+            f"{r['throughput_per_s']:>10.1f} {r['errors']:>6} "
+            f"{r['memory']['peak_alloc_kib']:>9.1f}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the generation pipeline against a fake Ollama server")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Earlier JSON report to check for regressions")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed p95/throughput change as a fraction (default 0.2)")
+    parser.add_argument("--concurrency", default="1,4,16",
+                        help="Comma-separated concurrency levels for I/O-bound benchmarks")
+    parser.add_argument("--iterations", type=int, default=200,
+                        help="Calls per I/O-bound benchmark and concurrency level")
+    parser.add_argument("--cpu-iterations", type=int, default=2000,
+                        help="Calls per CPU-bound benchmark")
+    parser.add_argument("--only", default=None,
+                        help="Comma-separated benchmark names to run")
+    parser.add_argument("--token-delay", type=float, default=0.0001,
+                        help="Fake server seconds per response token")
+    parser.add_argument("--jitter", type=float, default=0.002,
+                        help="Fake server extra delay per request, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Share of fake server requests that fail with HTTP 500")
+    parser.add_argument("--stories", default=str(STORIES_PATH),
+                        help="JSONL or JSON array of user stories to use as input")
+    args = parser.parse_args(argv)
+
+    stories = [item["user_story"] for item in iter_stories(args.stories)]
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    only = [n.strip() for n in args.only.split(",")] if args.only else None
+
+    with FakeOllamaServer(
+        token_delay=args.token_delay, jitter=args.jitter, error_rate=args.error_rate
+    ) as server:
+        report = run_suite(
+            server, stories, levels, args.iterations, args.cpu_iterations, only)
+
+    print(format_table(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
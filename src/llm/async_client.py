@@ -0,0 +1,465 @@
+# src/llm/async_client.py
+import asyncio
+import os
+import time
+from dataclasses import asdict
+from typing import Optional, Dict, Any, List, Sequence, Tuple, Union, AsyncIterator
+
+from ..shared.infrastructure.telemetry import get_telemetry
+from ..shared.models.llm_model_base import TokenUsage
+from .cache import MemoryCache, ResponseCache
+from .client import (
+    STRUCTURED_OUTPUT_PROVIDERS,
+    LLMConfig,
+    build_messages,
+    cached_response,
+    coalescing_key,
+    format_rejected,
+    make_load_balancer,
+    openai_usage,
+    record_generation,
+    record_stream,
+    response_cache_key,
+    stream_usage,
+    usage_fields,
+)
+from .load_balancer import route
+from .scheduler import GenerationScheduler, SchedulerRejectedError
+from .single_flight import AsyncSingleFlight
+
+
+PromptInput = Union[str, Tuple[str, str], Dict[str, str]]
+
+
+class AsyncLLMClient:
+    """
+    Non-blocking counterpart of LLMClient.
+
+    Generations run on the event loop and are admitted by a
+    GenerationScheduler sized from ``LLMConfig.max_concurrency``, so one
+    worker can keep all of Ollama's parallel request slots busy without
+    flooding it, and interactive requests go ahead of batch ones. The
+    scheduler may be shared with an LLMClient. Results use the same dict
+    shape as ``LLMClient.generate``, including the optional response
+    cache, request coalescing and schema-constrained output. Several
+    Ollama endpoints are load balanced the same way as in LLMClient.
+    Caches other than MemoryCache (e.g. SQLiteCache) are read and written
+    in a worker thread so their disk I/O never blocks the event loop.
+
+    Telemetry matches LLMClient's, including the scheduler's "queue_wait"
+    stage for the time spent waiting for a slot.
+    """
+
+    def __init__(
+        self,
+        config: Optional[LLMConfig] = None,
+        cache: Optional[ResponseCache] = None,
+        scheduler: Optional[GenerationScheduler] = None,
+    ):
+        self.config = config or LLMConfig()
+        self.cache = cache
+        self.scheduler = scheduler or GenerationScheduler.from_config(self.config)
+        self._single_flight = (
+            AsyncSingleFlight() if self.config.coalesce_requests else None)
+        self._ollama_clients: Dict[str, Any] = {}
+        self._openai_client = None
+        self.balancer = make_load_balancer(self.config)
+        self._schema_rejected = False
+
+    async def __aenter__(self) -> "AsyncLLMClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close pooled connections. The client may be reused afterwards."""
+        clients, self._ollama_clients = self._ollama_clients, {}
+        for client in clients.values():
+            await client.close()
+        if self.balancer is not None:
+            self.balancer.stop()
+        openai_client, self._openai_client = self._openai_client, None
+        if openai_client is not None:
+            await openai_client.close()
+
+    @property
+    def structured_output(self) -> bool:
+        """True if responses are constrained to config.output_schema"""
+        return (
+            self.config.output_schema is not None
+            and self.config.provider in STRUCTURED_OUTPUT_PROVIDERS
+            and not self._schema_rejected
+        )
+
+    def _ollama_format(self) -> Optional[Dict[str, Any]]:
+        return self.config.output_schema if self.structured_output else None
+
+    def _get_ollama_client(self, host: Optional[str] = None):
+        host = host or self.config.ollama_base_url
+        if host not in self._ollama_clients:
+            import httpx
+            from ollama import AsyncClient
+
+            self._ollama_clients[host] = AsyncClient(
+                host=host,
+                timeout=self.config.request_timeout,
+                limits=httpx.Limits(
+                    max_connections=self.config.pool_max_connections,
+                    max_keepalive_connections=self.config.pool_max_keepalive,
+                    keepalive_expiry=self.config.pool_keepalive_expiry,
+                ),
+            )
+        return self._ollama_clients[host]
+
+    def _get_openai_client(self):
+        if self._openai_client is None:
+            from openai import AsyncOpenAI
+
+            self._openai_client = AsyncOpenAI(
+                api_key=self.config.api_key or os.getenv("OPENAI_API_KEY")
+            )
+        return self._openai_client
+
+    async def agenerate(
+        self,
+        prompt: str,
+        system_prompt: str = "",
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Generate response from LLM without blocking the event loop.
+
+        Args:
+            prompt: The user prompt
+            system_prompt: Optional system prompt
+            timeout: Per-request timeout in seconds, including time spent
+                waiting for a concurrency slot (defaults to
+                ``config.request_timeout``)
+
+        Returns:
+            Same dict as ``LLMClient.generate``
+        """
+        timeout = self.config.request_timeout if timeout is None else timeout
+        start = time.time()
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = response_cache_key(self.config, prompt, system_prompt)
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                get_telemetry().cache_requests.inc(result="hit")
+                return cached_response(cached, start, self.cache)
+
+        try:
+            response, coalesced = await asyncio.wait_for(
+                self._generate_coalesced(prompt, system_prompt), timeout
+            )
+            result = {
+                "text": response["text"],
+                "latency": time.time() - start,
+                "tokens": response.get("tokens", 0),
+                "model": self.config.model,
+                "provider": self.config.provider
+            }
+            if response.get("usage") is not None:
+                result.update(usage_fields(response["usage"]))
+            if coalesced:
+                result["coalesced"] = True
+            record_generation(self.config, response, coalesced, self.cache is not None)
+            if self.cache is not None:
+                if not coalesced:
+                    await self._cache_set(cache_key, dict(result))
+                result.update(cached=False, cache=self.cache.stats())
+            return result
+        except asyncio.TimeoutError:
+            get_telemetry().llm_requests.inc(
+                provider=self.config.provider, outcome="timeout")
+            return {
+                "text": "",
+                "error": f"Request timed out after {timeout}s",
+                "latency": time.time() - start,
+                "tokens": 0
+            }
+        except SchedulerRejectedError as e:
+            get_telemetry().llm_requests.inc(
+                provider=self.config.provider, outcome="rejected")
+            return {
+                "text": "",
+                "error": str(e),
+                "rejected": True,
+                "latency": time.time() - start,
+                "tokens": 0
+            }
+        except Exception as e:
+            get_telemetry().llm_requests.inc(
+                provider=self.config.provider, outcome="error")
+            return {
+                "text": "",
+                "error": str(e),
+                "latency": time.time() - start,
+                "tokens": 0
+            }
+
+    async def agenerate_many(
+        self,
+        prompts: Sequence[PromptInput],
+        timeout: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate responses for many prompts concurrently.
+
+        Args:
+            prompts: Items are a user prompt string, a (user, system) tuple or
+                a ``PromptBuilder.build`` dict with "user" and "system" keys
+            timeout: Per-request timeout in seconds
+
+        Returns:
+            Results in the same order as ``prompts``
+        """
+        tasks = []
+        for item in prompts:
+            if isinstance(item, dict):
+                prompt, system_prompt = item["user"], item.get("system", "")
+            elif isinstance(item, tuple):
+                prompt, system_prompt = item
+            else:
+                prompt, system_prompt = item, ""
+            tasks.append(self.agenerate(prompt, system_prompt, timeout=timeout))
+
+        return list(await asyncio.gather(*tasks))
+
+    async def agenerate_stream(
+        self,
+        prompt: str,
+        system_prompt: str = "",
+        priority: Optional[str] = None,
+        tenant: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async counterpart of ``LLMClient.generate_stream``.
+
+        Yields ``{"text": <delta>, "done": False}`` chunks and a final
+        ``{"done": True, ...}`` summary. The scheduler slot is held for the
+        whole stream; priority and tenant default to request_context(). Only
+        the Ollama provider streams. The response cache is shared with
+        agenerate(), as in the sync client.
+        """
+        start = time.time()
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = response_cache_key(self.config, prompt, system_prompt)
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                get_telemetry().cache_requests.inc(result="hit")
+                yield {"text": cached["text"], "done": False}
+                result = cached_response(cached, start, self.cache)
+                yield {**result, "done": True, "time_to_first_token": result["latency"]}
+                return
+
+        parts: List[str] = []
+        first_token_at = None
+        usage: Dict[str, Any] = {}
+
+        try:
+            if self.config.provider != "ollama":
+                raise ValueError(
+                    f"Streaming not supported for provider: {self.config.provider}")
+
+            async with self.scheduler.aslot(priority, tenant):
+                async for delta, chunk_usage in self._stream_ollama(
+                        prompt, system_prompt):
+                    if chunk_usage:
+                        usage.update(chunk_usage)
+                    if not delta:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.time()
+                    parts.append(delta)
+                    yield {"text": delta, "done": False}
+        except Exception as e:
+            summary = {
+                "text": "".join(parts),
+                "done": True,
+                "error": str(e),
+                "latency": time.time() - start,
+                "tokens": 0
+            }
+            if isinstance(e, SchedulerRejectedError):
+                summary["rejected"] = True
+            record_stream(self.config, summary)
+            yield summary
+            return
+
+        end = time.time()
+        token_usage = stream_usage(self.config, usage)
+        prompt_tokens = token_usage.prompt_tokens
+        completion_tokens = token_usage.completion_tokens
+        decode_seconds = token_usage.eval_duration or (
+            end - first_token_at if first_token_at else 0.0)
+
+        result = {
+            "text": "".join(parts),
+            "latency": end - start,
+            "tokens": token_usage.total_tokens,
+            "model": self.config.model,
+            "provider": self.config.provider
+        }
+        if self.cache is not None:
+            get_telemetry().cache_requests.inc(result="miss")
+            await self._cache_set(cache_key, dict(result))
+            result.update(cached=False, cache=self.cache.stats())
+
+        summary = {
+            **result,
+            "done": True,
+            "time_to_first_token": (first_token_at or end) - start,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tokens_per_second": (
+                completion_tokens / decode_seconds if decode_seconds else 0.0),
+        }
+        if token_usage.load_duration is not None:
+            summary["load_duration"] = token_usage.load_duration
+        record_stream(self.config, summary, token_usage)
+        yield summary
+
+    async def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        # Only MemoryCache is cheap enough to call on the event loop; other
+        # caches (SQLiteCache) do blocking disk I/O, so they run in a thread
+        if isinstance(self.cache, MemoryCache):
+            return self.cache.get(key)
+        return await asyncio.to_thread(self.cache.get, key)
+
+    async def _cache_set(self, key: str, value: Dict[str, Any]) -> None:
+        if isinstance(self.cache, MemoryCache):
+            self.cache.set(key, value)
+        else:
+            await asyncio.to_thread(self.cache.set, key, value)
+
+    async def _stream_ollama(self, prompt: str, system_prompt: str):
+        fmt = self._ollama_format()
+        try:
+            async for item in self._stream_ollama_chat(prompt, system_prompt, fmt):
+                yield item
+        except Exception as e:
+            # A rejected format fails before the first chunk is yielded
+            if not format_rejected(e, fmt):
+                raise
+            self._schema_rejected = True
+            get_telemetry().retries.inc(reason="schema_rejected")
+            async for item in self._stream_ollama_chat(prompt, system_prompt, None):
+                yield item
+
+    async def _stream_ollama_chat(
+        self, prompt: str, system_prompt: str, fmt: Optional[Dict[str, Any]]
+    ):
+        with route(self.balancer, self.config.ollama_base_url) as host:
+            stream = await self._get_ollama_client(host).chat(
+                model=self.config.model,
+                messages=build_messages(prompt, system_prompt),
+                options={
+                    "temperature": self.config.temperature,
+                },
+                stream=True,
+                format=fmt,
+                keep_alive=self.config.model_keep_alive(),
+            )
+
+            async for chunk in stream:
+                delta = chunk.get('message', {}).get('content', '') or ''
+                usage = None
+                if chunk.get('done'):
+                    usage = asdict(TokenUsage.from_ollama(chunk, self.config.model))
+                yield delta, usage
+
+    async def ahealth(self, timeout: float = 5.0) -> bool:
+        """True if an Ollama endpoint answers /api/tags within timeout"""
+
+        async def probe(host: str) -> bool:
+            try:
+                await asyncio.wait_for(self._get_ollama_client(host).list(), timeout)
+                return True
+            except Exception:
+                return False
+
+        results = await asyncio.gather(
+            *(probe(host) for host in self.config.ollama_endpoints()))
+        return any(results)
+
+    def endpoint_stats(self) -> Dict[str, dict]:
+        """Per-endpoint routing and latency stats (empty for a single endpoint)"""
+        return self.balancer.stats() if self.balancer is not None else {}
+
+    def scheduler_stats(self) -> Dict[str, object]:
+        """Slots in use, queue depth and wait times per priority class"""
+        return self.scheduler.stats()
+
+    async def _generate_coalesced(
+        self, prompt: str, system_prompt: str
+    ) -> Tuple[dict, bool]:
+        if self._single_flight is None:
+            return await self._generate_bounded(prompt, system_prompt), False
+        return await self._single_flight.do(
+            coalescing_key(self.config, prompt, system_prompt),
+            lambda: self._generate_bounded(prompt, system_prompt),
+        )
+
+    async def _generate_bounded(self, prompt: str, system_prompt: str) -> dict:
+        async with self.scheduler.aslot():
+            # The span starts once a slot is granted; the wait is "queue_wait"
+            with get_telemetry().span(
+                    "llm_call", model=self.config.model, provider=self.config.provider):
+                if self.config.provider == "ollama":
+                    return await self._call_ollama(prompt, system_prompt)
+                elif self.config.provider == "openai":
+                    return await self._call_openai(prompt, system_prompt)
+                else:
+                    raise ValueError(f"Unknown provider: {self.config.provider}")
+
+    async def _call_ollama(self, prompt: str, system_prompt: str) -> dict:
+        messages = build_messages(prompt, system_prompt)
+        fmt = self._ollama_format()
+        try:
+            response = await self._ollama_chat(messages, fmt)
+        except Exception as e:
+            if not format_rejected(e, fmt):
+                raise
+            self._schema_rejected = True
+            get_telemetry().retries.inc(reason="schema_rejected")
+            response = await self._ollama_chat(messages, None)
+
+        usage = TokenUsage.from_ollama(response, self.config.model)
+        return {
+            "text": response.get('message', {}).get('content', ''),
+            "tokens": usage.total_tokens,
+            "usage": usage,
+        }
+
+    async def _ollama_chat(
+        self, messages: List[Dict[str, str]], fmt: Optional[Dict[str, Any]]
+    ):
+        with route(self.balancer, self.config.ollama_base_url) as host:
+            return await self._get_ollama_client(host).chat(
+                model=self.config.model,
+                messages=messages,
+                options={
+                    "temperature": self.config.temperature,
+                },
+                format=fmt,
+                keep_alive=self.config.model_keep_alive(),
+            )
+
+    async def _call_openai(self, prompt: str, system_prompt: str) -> dict:
+        response = await self._get_openai_client().chat.completions.create(
+            model=self.config.model,
+            messages=build_messages(prompt, system_prompt),
+            temperature=self.config.temperature,
+        )
+
+        return {
+            "text": response.choices[0].message.content,
+            "tokens": response.usage.total_tokens,
+            "usage": openai_usage(response.usage, self.config.model),
+        }
@@ -0,0 +1,165 @@
+# src/llm/cache.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    system_prompt: str,
+    prompt: str,
+    options: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Stable hash of everything that determines a generation's output"""
+    payload = json.dumps(
+        [provider, model, system_prompt, prompt, options or {}],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(ABC):
+    """Base class for LLM response caches with hit/miss counters."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Returns:
+            The cached response dict, or None on a miss or expired entry
+        """
+        value = self._get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response dict under key"""
+        self._set(key, value)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters"""
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def _set(self, key: str, value: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry"""
+        pass
+
+
+class MemoryCache(ResponseCache):
+    """Thread-safe in-memory LRU cache with optional TTL."""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 3600.0):
+        """
+        Args:
+            max_size: Maximum number of entries before evicting the LRU one
+            ttl: Seconds an entry stays valid (None = never expires)
+        """
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache(ResponseCache):
+    """On-disk cache backed by SQLite; survives restarts and is shared between processes."""
+
+    def __init__(self, path: str = "llm_cache.sqlite3", ttl: Optional[float] = None):
+        """
+        Args:
+            path: SQLite database file
+            ttl: Seconds an entry stays valid (None = never expires)
+        """
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if self.ttl is not None and time.time() - created_at > self.ttl:
+            return None
+        return json.loads(value)
+
+    def _set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at) "
+                "VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
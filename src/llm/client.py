@@ -1,58 +1,389 @@
-from typing import Optional, Dict, Any
-from pydantic import BaseModel
+from dataclasses import asdict
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+from pydantic import BaseModel, Field
 import time
 import os
 import sys
+import threading
 from pathlib import Path
 
 # Handle both module and direct execution
 try:
-    from ..shared.infrastructure.environment_variables import ENVIRONMENT_CONFIG
+    from ..shared.infrastructure.environment_variables import get_environment_config
+    from ..shared.infrastructure.telemetry import USAGE_STAGES, get_telemetry
+    from ..shared.models.llm_model_base import TokenUsage
+    from .cache import ResponseCache, make_cache_key
+    from .load_balancer import OllamaLoadBalancer, route
+    from .scheduler import GenerationScheduler, SchedulerRejectedError, current_request
+    from .single_flight import SingleFlight, normalize_prompt
+    from .warmup import parse_model_keep_alive
 except ImportError:
     # Add parent directory to path for direct execution
     sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-    from src.shared.infrastructure.environment_variables import ENVIRONMENT_CONFIG
+    from src.shared.infrastructure.environment_variables import get_environment_config
+    from src.shared.infrastructure.telemetry import USAGE_STAGES, get_telemetry
+    from src.shared.models.llm_model_base import TokenUsage
+    from src.llm.cache import ResponseCache, make_cache_key
+    from src.llm.load_balancer import OllamaLoadBalancer, route
+    from src.llm.scheduler import GenerationScheduler, SchedulerRejectedError, current_request
+    from src.llm.single_flight import SingleFlight, normalize_prompt
+    from src.llm.warmup import parse_model_keep_alive
+
+
+# Providers whose API can constrain decoding to a JSON schema
+STRUCTURED_OUTPUT_PROVIDERS = frozenset({"ollama"})
+
+# Environment-backed defaults are read when an LLMConfig is created, not at import
+_env = get_environment_config
 
 
 class LLMConfig(BaseModel):
     provider: str = "ollama"
-    model: str = ENVIRONMENT_CONFIG.OLLAMA_SERVICE_MODEL_QWEN3VL4B
+    model: str = Field(default_factory=lambda: _env().OLLAMA_SERVICE_MODEL_QWEN3VL4B)
     temperature: float = 0.3  # Low for consistency
     max_tokens: int = 2000
     api_key: Optional[str] = None
-    ollama_base_url: str = ENVIRONMENT_CONFIG.OLLAMA_SERVICE_HOST
-    max_retries: int = ENVIRONMENT_CONFIG.MAX_RETRIES
+    ollama_base_url: str = Field(default_factory=lambda: _env().OLLAMA_SERVICE_HOST)
+    # Several Ollama instances to load balance across; empty = ollama_base_url
+    ollama_base_urls: List[str] = Field(
+        default_factory=lambda: _env().ollama_hosts if _env().OLLAMA_SERVICE_HOSTS else [])
+    health_check_interval: float = Field(
+        default_factory=lambda: _env().OLLAMA_HEALTH_CHECK_INTERVAL)
+    max_retries: int = Field(default_factory=lambda: _env().MAX_RETRIES)
+
+    # Connection pool for the Ollama HTTP client
+    pool_max_connections: int = 10
+    pool_max_keepalive: int = 10
+    pool_keepalive_expiry: float = 30.0  # seconds an idle connection is kept
+    request_timeout: Optional[float] = None  # None = wait for the model
+
+    # Admission control (see GenerationScheduler): generations in flight per
+    # endpoint, matched to the server's OLLAMA_NUM_PARALLEL, and queue bounds
+    max_concurrency: int = Field(default_factory=lambda: _env().OLLAMA_NUM_PARALLEL)
+    interactive_queue_size: int = 64
+    batch_queue_size: int = 1024
+    # Slots batch requests may not take; only worth setting on a client that
+    # also serves interactive requests (the API's), else they sit idle
+    reserved_interactive_slots: int = 0
+    max_queue_wait: Optional[float] = None  # seconds; None = wait for a slot
+
+    # Share one model call between concurrent identical requests
+    coalesce_requests: bool = True
+
+    # Keep models loaded in Ollama between requests (see ModelWarmer)
+    keep_alive: str = Field(default_factory=lambda: _env().OLLAMA_KEEP_ALIVE)
+    warmup_models: str = Field(default_factory=lambda: _env().OLLAMA_WARMUP_MODELS)
+    keepalive_ping_interval: float = Field(
+        default_factory=lambda: _env().OLLAMA_KEEPALIVE_PING_INTERVAL)
+
+    # JSON schema responses must follow, passed as Ollama's "format".
+    # Ignored for providers not in STRUCTURED_OUTPUT_PROVIDERS.
+    output_schema: Optional[Dict[str, Any]] = None
+
+    def ollama_endpoints(self) -> List[str]:
+        """Base URLs of every Ollama instance requests may be routed to"""
+        return self.ollama_base_urls or [self.ollama_base_url]
+
+    def model_keep_alive(self) -> str:
+        """keep_alive for this model: its warmup_models entry, else keep_alive"""
+        models = parse_model_keep_alive(self.warmup_models, self.keep_alive)
+        return models.get(self.model, self.keep_alive)
+
+
+def make_load_balancer(config: LLMConfig) -> Optional[OllamaLoadBalancer]:
+    """Balancer over config's Ollama endpoints, or None for a single endpoint"""
+    endpoints = config.ollama_endpoints()
+    if config.provider != "ollama" or len(endpoints) < 2:
+        return None
+    return OllamaLoadBalancer(
+        endpoints, health_check_interval=config.health_check_interval)
+
+
+def build_messages(prompt: str, system_prompt: str = "") -> List[Dict[str, str]]:
+    """Build the chat messages list shared by every provider"""
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def response_cache_key(config: LLMConfig, prompt: str, system_prompt: str = "") -> str:
+    """Cache key for a generation: provider, model, prompts and sampling options"""
+    options = {"temperature": config.temperature, "max_tokens": config.max_tokens}
+    if config.output_schema is not None:
+        options["format"] = config.output_schema
+    return make_cache_key(
+        config.provider,
+        config.model,
+        system_prompt,
+        prompt,
+        options,
+    )
+
+
+def cached_response(entry: Dict[str, Any], start: float, cache: ResponseCache) -> Dict[str, Any]:
+    """
+    Result dict for a cache hit. No tokens were spent on it, so "tokens" is 0
+    and the count from the original generation is kept as "cached_tokens".
+    """
+    return {
+        **entry,
+        "latency": time.time() - start,
+        "tokens": 0,
+        "cached_tokens": entry.get("tokens", 0),
+        "cached": True,
+        "cache": cache.stats(),
+    }
+
+
+def format_rejected(error: Exception, fmt: Optional[Dict[str, Any]]) -> bool:
+    """True if Ollama refused the request because it does not support fmt"""
+    return (
+        fmt is not None
+        and getattr(error, "status_code", None) == 400
+        and "format" in str(error).lower()
+    )
+
+
+def coalescing_key(config: LLMConfig, prompt: str, system_prompt: str = "") -> str:
+    """
+    Single-flight key: like the cache key, but on whitespace-normalized prompts.
+
+    Includes the request's priority class, so an interactive request never
+    joins a batch call that is still queued behind other batch work.
+    """
+    priority, _ = current_request()
+    return priority + ":" + response_cache_key(
+        config, normalize_prompt(prompt), normalize_prompt(system_prompt))
+
+
+def usage_fields(usage: TokenUsage) -> Dict[str, Any]:
+    """Result-dict fields for a provider's reported usage"""
+    fields = {
+        "tokens": usage.total_tokens,
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "tokens_per_second": usage.tokens_per_second,
+    }
+    for key in USAGE_STAGES:
+        if getattr(usage, key) is not None:
+            fields[key] = getattr(usage, key)
+    return fields
+
+
+def record_generation(
+    config: LLMConfig, response: dict, coalesced: bool, cache_enabled: bool
+) -> None:
+    """Count a successful generation and account for its token usage"""
+    telemetry = get_telemetry()
+    if coalesced:
+        # The leader already counted the model call
+        telemetry.cache_requests.inc(result="coalesced")
+        return
+    if cache_enabled:
+        telemetry.cache_requests.inc(result="miss")
+    telemetry.llm_requests.inc(provider=config.provider, outcome="success")
+    if response.get("usage") is not None:
+        telemetry.record_usage(response["usage"])
+
+
+def record_stream(
+    config: LLMConfig, summary: Dict[str, Any], usage: Optional[TokenUsage] = None
+) -> None:
+    """Count a finished stream and record its latency, time to first token and usage"""
+    telemetry = get_telemetry()
+    if summary.get("error"):
+        outcome = "rejected" if summary.get("rejected") else "error"
+        telemetry.llm_requests.inc(provider=config.provider, outcome=outcome)
+        return
+    telemetry.llm_requests.inc(provider=config.provider, outcome="success")
+    telemetry.record("llm_stream", summary["latency"], model=config.model)
+    telemetry.record("first_token", summary["time_to_first_token"], model=config.model)
+    if usage is not None:
+        telemetry.record_usage(usage)
+
+
+def openai_usage(usage, model: str) -> TokenUsage:
+    """TokenUsage from an OpenAI response's usage block (no durations)"""
+    return TokenUsage(
+        total_tokens=usage.total_tokens,
+        prompt_tokens=usage.prompt_tokens,
+        completion_tokens=usage.completion_tokens,
+        model=model,
+    )
+
+
+def stream_usage(config: LLMConfig, usage: Dict[str, Any]) -> TokenUsage:
+    """TokenUsage from the usage fields collected while streaming"""
+    return TokenUsage(**{"model": config.model, **usage})
 
 
 class LLMClient:
-    def __init__(self, config: Optional[LLMConfig] = None):
+    """
+    LLM client that owns a long-lived, thread-safe connection pool.
+
+    The underlying Ollama HTTP client is created on first use and reused for
+    every call, so requests share keep-alive connections instead of paying a
+    TCP handshake each time. Call close() (or use the client as a context
+    manager) to release the pool.
+
+    An optional ResponseCache short-circuits repeated (model, prompt,
+    options) requests; cached responses carry "cached": True and the cache's
+    hit/miss counters.
+
+    With config.coalesce_requests, concurrent identical requests share one
+    in-flight model call; followers' responses carry "coalesced": True.
+
+    With config.output_schema, Ollama responses are constrained to that JSON
+    schema. If the server rejects the schema, the client falls back to
+    unconstrained generation and structured_output turns False, so callers
+    can switch back to a prompt that spells out the format.
+
+    When config lists several Ollama endpoints, each request is routed by an
+    OllamaLoadBalancer (least outstanding requests, unhealthy nodes ejected)
+    and every endpoint gets its own connection pool.
+
+    Model calls are admitted by a GenerationScheduler (by default one built
+    from config; pass a shared one to pool several clients' capacity). The
+    priority class and tenant come from request_context(); a call the
+    scheduler turns away returns an error result with "rejected": True.
+
+    Each model call runs in an "llm_call" telemetry span. Token counts and
+    Ollama's own load, prefill and decode durations come from the provider's
+    response: results carry prompt_tokens, completion_tokens and decode
+    tokens_per_second, and the usage is added to the process-wide TokenMeter.
+    """
+
+    def __init__(
+        self,
+        config: Optional[LLMConfig] = None,
+        cache: Optional[ResponseCache] = None,
+        scheduler: Optional[GenerationScheduler] = None,
+    ):
         self.config = config or LLMConfig()
+        self.cache = cache
+        self.scheduler = scheduler or GenerationScheduler.from_config(self.config)
+        self._single_flight = (
+            SingleFlight() if self.config.coalesce_requests else None)
+        self._ollama_clients: Dict[str, Any] = {}
+        self._client_lock = threading.Lock()
+        self.balancer = make_load_balancer(self.config)
+        self._schema_rejected = False
         if self.config.provider == "openai":
             import openai
             openai.api_key = self.config.api_key or os.getenv("OPENAI_API_KEY")
 
+    def __enter__(self) -> "LLMClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close pooled connections. The client may be reused afterwards."""
+        with self._client_lock:
+            clients, self._ollama_clients = self._ollama_clients, {}
+        for client in clients.values():
+            client.close()
+        if self.balancer is not None:
+            self.balancer.stop()
+
+    @property
+    def structured_output(self) -> bool:
+        """True if responses are constrained to config.output_schema"""
+        return (
+            self.config.output_schema is not None
+            and self.config.provider in STRUCTURED_OUTPUT_PROVIDERS
+            and not self._schema_rejected
+        )
+
+    def _ollama_format(self) -> Optional[Dict[str, Any]]:
+        return self.config.output_schema if self.structured_output else None
+
+    def endpoint_stats(self) -> Dict[str, dict]:
+        """Per-endpoint routing and latency stats (empty for a single endpoint)"""
+        return self.balancer.stats() if self.balancer is not None else {}
+
+    def scheduler_stats(self) -> Dict[str, object]:
+        """Slots in use, queue depth and wait times per priority class"""
+        return self.scheduler.stats()
+
+    def _get_ollama_client(self, host: Optional[str] = None):
+        """Return the shared Ollama client for host, creating it on first use"""
+        host = host or self.config.ollama_base_url
+        client = self._ollama_clients.get(host)
+        if client is not None:
+            return client
+
+        with self._client_lock:
+            if host not in self._ollama_clients:
+                import httpx
+                from ollama import Client
+
+                self._ollama_clients[host] = Client(
+                    host=host,
+                    timeout=self.config.request_timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.config.pool_max_connections,
+                        max_keepalive_connections=self.config.pool_max_keepalive,
+                        keepalive_expiry=self.config.pool_keepalive_expiry,
+                    ),
+                )
+            return self._ollama_clients[host]
+
     def generate(self, prompt: str, system_prompt: str = "") -> Dict[str, Any]:
         """Generate response from LLM"""
         start = time.time()
 
+        cache_key = None
+        if self.cache is not None:
+            cache_key = response_cache_key(self.config, prompt, system_prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                get_telemetry().cache_requests.inc(result="hit")
+                return cached_response(cached, start, self.cache)
+
         try:
-            if self.config.provider == "ollama":
-                response = self._call_ollama(prompt, system_prompt)
-            elif self.config.provider == "openai":
-                response = self._call_openai(prompt, system_prompt)
+            coalesced = False
+            if self._single_flight is not None:
+                response, coalesced = self._single_flight.do(
+                    coalescing_key(self.config, prompt, system_prompt),
+                    lambda: self._call_scheduled(prompt, system_prompt),
+                )
             else:
-                raise ValueError(f"Unknown provider: {self.config.provider}")
-
-            print(f"response {response}")
+                response = self._call_scheduled(prompt, system_prompt)
 
-            return {
+            result = {
                 "text": response["text"],
                 "latency": time.time() - start,
                 "tokens": response.get("tokens", 0),
                 "model": self.config.model,
                 "provider": self.config.provider
             }
+            if response.get("usage") is not None:
+                result.update(usage_fields(response["usage"]))
+            if coalesced:
+                result["coalesced"] = True
+            record_generation(self.config, response, coalesced, self.cache is not None)
+            if self.cache is not None:
+                if not coalesced:
+                    self.cache.set(cache_key, dict(result))
+                result.update(cached=False, cache=self.cache.stats())
+            return result
+        except SchedulerRejectedError as e:
+            get_telemetry().llm_requests.inc(
+                provider=self.config.provider, outcome="rejected")
+            return {
+                "text": "",
+                "error": str(e),
+                "rejected": True,
+                "latency": time.time() - start,
+                "tokens": 0
+            }
         except Exception as e:
+            get_telemetry().llm_requests.inc(
+                provider=self.config.provider, outcome="error")
             return {
                 "text": "",
                 "error": str(e),
@@ -60,40 +391,228 @@ class LLMClient:
                 "tokens": 0
             }
 
-    def _call_ollama(self, prompt: str, system_prompt: str) -> dict:
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
+    def _call_scheduled(self, prompt: str, system_prompt: str) -> dict:
+        # The span starts once a slot is granted; the wait is "queue_wait"
+        with self.scheduler.slot(), get_telemetry().span(
+                "llm_call", model=self.config.model, provider=self.config.provider):
+            return self._call_provider(prompt, system_prompt)
 
-        # Create Ollama client with configured base URL
-        from ollama import Client
-        client = Client(host=self.config.ollama_base_url)
+    def _call_provider(self, prompt: str, system_prompt: str) -> dict:
+        if self.config.provider == "ollama":
+            return self._call_ollama(prompt, system_prompt)
+        elif self.config.provider == "openai":
+            return self._call_openai(prompt, system_prompt)
+        else:
+            raise ValueError(f"Unknown provider: {self.config.provider}")
 
-        response = client.chat(
-            model=self.config.model,
-            messages=messages,
-            options={
-                "temperature": self.config.temperature,
-                # "num_predict": self.config.max_tokens
+    def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: str = "",
+        priority: Optional[str] = None,
+        tenant: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a response from the LLM as it is generated.
+
+        Yields ``{"text": <delta>, "done": False}`` for each chunk, then one
+        final ``{"done": True, ...}`` dict with the same keys as generate()
+        ("text" holds the full response) plus "time_to_first_token",
+        "prompt_tokens", "completion_tokens" and "tokens_per_second". Errors
+        are reported in the final dict's "error" key, never raised.
+
+        The scheduler slot is held for the whole stream. A stream is often
+        consumed outside the context that created it, so priority and tenant
+        may be given here instead of through request_context().
+        """
+        start = time.time()
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = response_cache_key(self.config, prompt, system_prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                get_telemetry().cache_requests.inc(result="hit")
+                yield {"text": cached["text"], "done": False}
+                result = cached_response(cached, start, self.cache)
+                yield {**result, "done": True, "time_to_first_token": result["latency"]}
+                return
+
+        parts: List[str] = []
+        first_token_at = None
+        usage: Dict[str, Any] = {}
+
+        try:
+            if self.config.provider == "ollama":
+                chunks = self._stream_ollama(prompt, system_prompt)
+            elif self.config.provider == "openai":
+                chunks = self._stream_openai(prompt, system_prompt)
+            else:
+                raise ValueError(f"Unknown provider: {self.config.provider}")
+
+            with self.scheduler.slot(priority, tenant):
+                for delta, chunk_usage in chunks:
+                    if chunk_usage:
+                        usage.update(chunk_usage)
+                    if not delta:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.time()
+                    parts.append(delta)
+                    yield {"text": delta, "done": False}
+        except Exception as e:
+            summary = {
+                "text": "".join(parts),
+                "done": True,
+                "error": str(e),
+                "latency": time.time() - start,
+                "tokens": 0
             }
+            if isinstance(e, SchedulerRejectedError):
+                summary["rejected"] = True
+            record_stream(self.config, summary)
+            yield summary
+            return
+
+        end = time.time()
+        token_usage = stream_usage(self.config, usage)
+        prompt_tokens = token_usage.prompt_tokens
+        completion_tokens = token_usage.completion_tokens
+        # Prefer the provider's own decode time, else measure from first token
+        decode_seconds = token_usage.eval_duration or (
+            end - first_token_at if first_token_at else 0.0)
+
+        result = {
+            "text": "".join(parts),
+            "latency": end - start,
+            "tokens": token_usage.total_tokens,
+            "model": self.config.model,
+            "provider": self.config.provider
+        }
+        if self.cache is not None:
+            get_telemetry().cache_requests.inc(result="miss")
+            self.cache.set(cache_key, dict(result))
+            result.update(cached=False, cache=self.cache.stats())
+
+        summary = {
+            **result,
+            "done": True,
+            "time_to_first_token": (first_token_at or end) - start,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tokens_per_second": (
+                completion_tokens / decode_seconds if decode_seconds else 0.0),
+        }
+        if token_usage.load_duration is not None:
+            summary["load_duration"] = token_usage.load_duration
+        record_stream(self.config, summary, token_usage)
+        yield summary
+
+    def _stream_ollama(
+        self, prompt: str, system_prompt: str
+    ) -> Iterator[Tuple[str, Optional[dict]]]:
+        fmt = self._ollama_format()
+        try:
+            yield from self._stream_ollama_chat(prompt, system_prompt, fmt)
+        except Exception as e:
+            # A rejected format fails before the first chunk is yielded
+            if not format_rejected(e, fmt):
+                raise
+            self._schema_rejected = True
+            get_telemetry().retries.inc(reason="schema_rejected")
+            yield from self._stream_ollama_chat(prompt, system_prompt, None)
+
+    def _stream_ollama_chat(
+        self, prompt: str, system_prompt: str, fmt: Optional[Dict[str, Any]]
+    ) -> Iterator[Tuple[str, Optional[dict]]]:
+        # The endpoint stays busy for the whole stream
+        with route(self.balancer, self.config.ollama_base_url) as host:
+            stream = self._get_ollama_client(host).chat(
+                model=self.config.model,
+                messages=build_messages(prompt, system_prompt),
+                options={
+                    "temperature": self.config.temperature,
+                },
+                stream=True,
+                format=fmt,
+                keep_alive=self.config.model_keep_alive(),
+            )
+
+            for chunk in stream:
+                delta = chunk.get('message', {}).get('content', '') or ''
+                usage = None
+                if chunk.get('done'):
+                    # Only the final chunk carries counts and durations
+                    usage = asdict(TokenUsage.from_ollama(chunk, self.config.model))
+                yield delta, usage
+
+    def _stream_openai(
+        self, prompt: str, system_prompt: str
+    ) -> Iterator[Tuple[str, Optional[dict]]]:
+        import openai
+
+        stream = openai.chat.completions.create(
+            model=self.config.model,
+            messages=build_messages(prompt, system_prompt),
+            temperature=self.config.temperature,
+            stream=True,
+            stream_options={"include_usage": True},
         )
 
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            usage = None
+            if chunk.usage is not None:
+                usage = {
+                    "prompt_tokens": chunk.usage.prompt_tokens,
+                    "completion_tokens": chunk.usage.completion_tokens,
+                }
+            yield delta or "", usage
+
+    def _call_ollama(self, prompt: str, system_prompt: str) -> dict:
+        messages = build_messages(prompt, system_prompt)
+        fmt = self._ollama_format()
+
+        try:
+            response = self._ollama_chat(messages, fmt)
+        except Exception as e:
+            if not format_rejected(e, fmt):
+                raise
+            # Server without structured outputs: fall back to a plain request
+            self._schema_rejected = True
+            get_telemetry().retries.inc(reason="schema_rejected")
+            response = self._ollama_chat(messages, None)
+
         # Debug: Check response structure
         text_content = response.get('message', {}).get('content', '')
+        usage = TokenUsage.from_ollama(response, self.config.model)
 
         return {
             "text": text_content,
-            "tokens": response.get('eval_count', 0) + response.get('prompt_eval_count', 0)
+            "tokens": usage.total_tokens,
+            "usage": usage,
         }
 
+    def _ollama_chat(
+        self, messages: List[Dict[str, str]], fmt: Optional[Dict[str, Any]]
+    ):
+        # Reuse the pooled Ollama client (keep-alive connections)
+        with route(self.balancer, self.config.ollama_base_url) as host:
+            return self._get_ollama_client(host).chat(
+                model=self.config.model,
+                messages=messages,
+                options={
+                    "temperature": self.config.temperature,
+                    # "num_predict": self.config.max_tokens
+                },
+                format=fmt,
+                keep_alive=self.config.model_keep_alive(),
+            )
+
     def _call_openai(self, prompt: str, system_prompt: str) -> dict:
         import openai
 
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
+        messages = build_messages(prompt, system_prompt)
 
         response = openai.chat.completions.create(
             model=self.config.model,
@@ -104,15 +623,16 @@ class LLMClient:
 
         return {
             "text": response.choices[0].message.content,
-            "tokens": response.usage.total_tokens
+            "tokens": response.usage.total_tokens,
+            "usage": openai_usage(response.usage, self.config.model),
         }
 
 
 # Test script
 if __name__ == "__main__":
     config = LLMConfig()
-    client = LLMClient(config)
 
-    result = client.generate("Say hello")
-    print(f"✅ Model test: {result['text']}")
-    print(f"Latency: {result['latency']:.2f}s")
+    with LLMClient(config) as client:
+        result = client.generate("Say hello")
+        print(f"✅ Model test: {result['text']}")
+        print(f"Latency: {result['latency']:.2f}s")
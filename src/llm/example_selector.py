@@ -0,0 +1,148 @@
+# src/llm/example_selector.py
+import math
+import re
+from collections import Counter
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Maps a batch of texts to a (len(texts), dim) embedding matrix
+EmbedFn = Callable[[Sequence[str]], "np.ndarray"]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words every user story shares ("As a user, I want ... so that ...")
+_STOPWORDS = frozenset(
+    "a an and as be can i in is it my of on or so that the to want with".split()
+)
+
+
+def _tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _normalize_rows(matrix: "np.ndarray") -> "np.ndarray":
+    import numpy as np
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class TfidfEmbedder:
+    """
+    Tiny TF-IDF vectorizer fitted on the example stories.
+
+    Used when no embedding model is configured: no download, no extra
+    dependency, and good enough to tell a login story from an upload story.
+    """
+
+    def __init__(self, corpus: Sequence[str]):
+        import numpy as np
+
+        documents = [_tokenize(text) for text in corpus]
+        vocabulary = sorted({token for doc in documents for token in doc})
+        self.vocabulary: Dict[str, int] = {t: i for i, t in enumerate(vocabulary)}
+
+        df = Counter(token for doc in documents for token in set(doc))
+        n = len(documents)
+        self.idf = np.array(
+            [math.log((1 + n) / (1 + df[t])) + 1.0 for t in vocabulary],
+            dtype=np.float32,
+        )
+
+    def __call__(self, texts: Sequence[str]) -> "np.ndarray":
+        import numpy as np
+
+        matrix = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token, count in Counter(_tokenize(text)).items():
+                column = self.vocabulary.get(token)
+                if column is not None:
+                    matrix[row, column] = count
+        return matrix * self.idf
+
+
+def make_ollama_embed_fn(model: str, host: Optional[str] = None) -> EmbedFn:
+    """Embedding function backed by Ollama's /api/embed endpoint"""
+    import numpy as np
+    from ollama import Client
+
+    client = Client(host=host)
+
+    def embed(texts: Sequence[str]) -> "np.ndarray":
+        response = client.embed(model=model, input=list(texts))
+        return np.asarray(response["embeddings"], dtype=np.float32)
+
+    return embed
+
+
+class ExampleSelector:
+    """
+    In-process vector index over few-shot examples.
+
+    Example stories are embedded once into a row-normalized matrix; selecting
+    examples for one or many stories is a single matrix multiply followed by
+    a top-k. Ties (e.g. a story sharing no words with any example) keep file
+    order, so the selector degrades to "first k examples".
+    """
+
+    def __init__(self, examples: List[dict], embed_fn: Optional[EmbedFn] = None):
+        """
+        Args:
+            examples: Few-shot examples, each with a "user_story" key
+            embed_fn: Embedding function; defaults to TF-IDF over the examples
+        """
+        import numpy as np
+
+        self.examples = examples
+        stories = [example.get("user_story", "") for example in examples]
+        self.embed_fn = embed_fn or TfidfEmbedder(stories)
+        self.index = (
+            _normalize_rows(np.asarray(self.embed_fn(stories), dtype=np.float32))
+            if stories else np.zeros((0, 0), dtype=np.float32)
+        )
+
+    def select_indices(
+        self, user_story: str, k: int = 2, min_score: Optional[float] = None
+    ) -> List[int]:
+        """Indices of the k examples most similar to user_story"""
+        return self.select_indices_many([user_story], k, min_score)[0]
+
+    def select_indices_many(
+        self,
+        user_stories: Sequence[str],
+        k: int = 2,
+        min_score: Optional[float] = None,
+    ) -> List[List[int]]:
+        """
+        Top-k example indices for each story, most similar first.
+
+        Args:
+            user_stories: Stories to select examples for
+            k: Maximum number of examples per story
+            min_score: Drop examples whose cosine similarity is not above it
+        """
+        import numpy as np
+
+        k = min(k, len(self.examples))
+        if k <= 0:
+            return [[] for _ in user_stories]
+
+        queries = _normalize_rows(
+            np.asarray(self.embed_fn(list(user_stories)), dtype=np.float32))
+        scores = queries @ self.index.T
+
+        # Stable sort keeps file order for equal scores
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+        selected = []
+        for row, indices in enumerate(order):
+            if min_score is not None:
+                indices = [i for i in indices if scores[row, i] > min_score]
+            selected.append([int(i) for i in indices])
+        return selected
+
+    def select(self, user_story: str, k: int = 2) -> List[dict]:
+        """The k examples most similar to user_story"""
+        return [self.examples[i] for i in self.select_indices(user_story, k)]
@@ -0,0 +1,214 @@
+# src/llm/load_balancer.py
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterator, List, Optional, Sequence
+
+
+@dataclass
+class Endpoint:
+    """One Ollama instance and its routing/health statistics."""
+
+    url: str
+    healthy: bool = True
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    ejections: int = 0
+    last_health_check: float = 0.0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=512))
+
+    def stats(self) -> dict:
+        samples = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not samples:
+                return None
+            return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+            "latency_avg": sum(samples) / len(samples) if samples else None,
+            "latency_p50": percentile(0.50),
+            "latency_p95": percentile(0.95),
+        }
+
+
+class OllamaLoadBalancer:
+    """
+    Route requests across several Ollama instances.
+
+    Each request goes to the healthy endpoint with the fewest outstanding
+    requests (ties broken by recent failures, then request count). An
+    endpoint is ejected after failure_threshold consecutive failures or a
+    failed health probe, and re-admitted once a background probe of
+    GET /api/tags succeeds. If every endpoint is ejected, requests are still
+    routed across all of them rather than rejected outright.
+
+    The health-check thread starts with the first routed request (when
+    health_checks is set); stop() ends it, and the next request restarts it.
+
+    Usage:
+        with balancer.acquire() as endpoint:
+            call(endpoint.url)
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        health_check_interval: float = 10.0,
+        health_check_timeout: float = 2.0,
+        failure_threshold: int = 3,
+        health_checks: bool = True,
+    ):
+        if not urls:
+            raise ValueError("At least one Ollama endpoint is required")
+
+        self.endpoints: List[Endpoint] = [Endpoint(url.rstrip("/")) for url in urls]
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.failure_threshold = failure_threshold
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_checks = health_checks
+        self._health_thread: Optional[threading.Thread] = None
+
+    @property
+    def urls(self) -> List[str]:
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def start(self) -> None:
+        """Start the background health-check thread"""
+        with self._lock:
+            if self._health_thread is not None:
+                return
+            self._stop.clear()
+            self._health_thread = threading.Thread(
+                target=self._run_health_checks, name="ollama-health", daemon=True)
+            self._health_thread.start()
+
+    def stop(self) -> None:
+        """Stop the background health-check thread"""
+        with self._lock:
+            thread, self._health_thread = self._health_thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join(self.health_check_timeout + 1)
+
+    def choose(self) -> Endpoint:
+        """Pick an endpoint and count a request against it; pair with release()"""
+        if self._health_checks and self._health_thread is None:
+            self.start()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.healthy] or self.endpoints
+            endpoint = min(
+                candidates,
+                key=lambda e: (e.outstanding, e.consecutive_failures, e.requests),
+            )
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(
+        self,
+        endpoint: Endpoint,
+        latency: Optional[float] = None,
+        success: Optional[bool] = True,
+    ) -> None:
+        """
+        Record the outcome of a request routed with choose().
+
+        success=None means the request was abandoned (e.g. cancelled) and
+        says nothing about the endpoint's health.
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            if success is None:
+                return
+            if success:
+                endpoint.consecutive_failures = 0
+                endpoint.latencies.append(latency)
+                return
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.healthy and endpoint.consecutive_failures >= self.failure_threshold:
+                self._eject(endpoint)
+
+    @contextmanager
+    def acquire(self) -> Iterator[Endpoint]:
+        """
+        Route one request to an endpoint.
+
+        An exception raised in the block counts as a failure of the endpoint,
+        unless it carries a 4xx status_code (the endpoint answered, the
+        request was bad). Cancellation and generator close are neutral.
+        """
+        endpoint = self.choose()
+        start = time.time()
+        try:
+            yield endpoint
+        except Exception as e:
+            status_code = getattr(e, "status_code", None)
+            client_error = isinstance(status_code, int) and 400 <= status_code < 500
+            self.release(endpoint, time.time() - start, success=client_error)
+            raise
+        except BaseException:
+            self.release(endpoint, success=None)
+            raise
+        self.release(endpoint, time.time() - start, success=True)
+
+    def check_health(self, endpoint: Endpoint) -> bool:
+        """Probe GET /api/tags once and eject or re-admit the endpoint"""
+        import httpx
+
+        try:
+            response = httpx.get(
+                f"{endpoint.url}/api/tags", timeout=self.health_check_timeout)
+            healthy = response.status_code == 200
+        except httpx.HTTPError:
+            healthy = False
+
+        with self._lock:
+            endpoint.last_health_check = time.time()
+            if healthy and not endpoint.healthy:
+                endpoint.healthy = True
+                endpoint.consecutive_failures = 0
+            elif not healthy and endpoint.healthy:
+                self._eject(endpoint)
+        return healthy
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-endpoint routing, health and latency statistics"""
+        with self._lock:
+            return {e.url: e.stats() for e in self.endpoints}
+
+    def _eject(self, endpoint: Endpoint) -> None:
+        endpoint.healthy = False
+        endpoint.ejections += 1
+
+    def _run_health_checks(self) -> None:
+        while not self._stop.wait(self.health_check_interval):
+            for endpoint in self.endpoints:
+                if self._stop.is_set():
+                    return
+                self.check_health(endpoint)
+
+
+@contextmanager
+def route(
+    balancer: Optional[OllamaLoadBalancer], default_url: str
+) -> Iterator[str]:
+    """Yield the base URL for one request: balanced if a balancer is given"""
+    if balancer is None:
+        yield default_url
+        return
+    with balancer.acquire() as endpoint:
+        yield endpoint.url
@@ -0,0 +1,195 @@
+# src/llm/parsing.py
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from ..validators.structure import TestCase
+
+
+def extract_json(text: str) -> dict:
+    """
+    Extract the JSON object from an LLM response.
+
+    Handles markdown fences (```json ... ```) and leading/trailing chatter
+    around the object.
+
+    Raises:
+        ValueError: If the response is empty or holds no JSON object
+            (json.JSONDecodeError is a ValueError subclass)
+    """
+    output_text = (text or "").strip()
+    if not output_text:
+        raise ValueError("Empty response from LLM")
+
+    # Extract JSON if wrapped in markdown
+    if '```json' in output_text:
+        output_text = output_text.split('```json')[1].split('```')[0]
+    elif '```' in output_text:
+        output_text = output_text.split('```')[1].split('```')[0]
+
+    try:
+        return json.loads(output_text)
+    except json.JSONDecodeError:
+        # Fall back to the outermost {...} block
+        start, end = output_text.find('{'), output_text.rfind('}')
+        if start == -1 or end <= start:
+            raise
+        return json.loads(output_text[start:end + 1])
+
+
+# Characters that matter while scanning inside a JSON object
+_STRUCTURAL = re.compile(r'[{}"\\]')
+_TEST_CASES_ARRAY = re.compile(r'"test_cases"\s*:\s*\[')
+
+
+class IncrementalTestCaseParser:
+    """
+    Parse test cases out of a streamed LLM response as they complete.
+
+    Text is fed chunk by chunk; every object inside the "test_cases" array is
+    validated against ``TestCase`` as soon as its closing brace arrives.
+    Anything before the array (markdown fences, chatter, the opening brace)
+    is ignored.
+
+    Usage:
+        parser = IncrementalTestCaseParser()
+        for chunk in chunks:
+            for test_case in parser.feed(chunk):
+                ...
+        parser.errors  # objects that failed to parse or validate
+    """
+
+    def __init__(self):
+        self.errors: List[Dict[str, Any]] = []
+        self.test_cases: List[TestCase] = []
+        self.done = False
+        self._seen_ids = set()
+        self._buffer = ""
+        self._in_array = False
+        self._scan_pos = 0
+        # Scanner state inside the array
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start = 0
+
+    def feed(self, chunk: str) -> List[TestCase]:
+        """Consume a chunk of text; return the test cases it completed"""
+        if self.done or not chunk:
+            return []
+        self._buffer += chunk
+
+        if not self._in_array:
+            match = _TEST_CASES_ARRAY.search(self._buffer)
+            if match is None:
+                # Keep only a tail long enough to hold a split key
+                self._buffer = self._buffer[-32:]
+                return []
+            self._buffer = self._buffer[match.end():]
+            self._in_array = True
+
+        return self._scan()
+
+    def _scan(self) -> List[TestCase]:
+        completed = []
+        buffer = self._buffer
+        pos = self._scan_pos
+
+        while pos < len(buffer):
+            if self._depth == 0:
+                # Between objects: skip whitespace and commas
+                next_open = buffer.find('{', pos)
+                next_close = buffer.find(']', pos)
+                if next_close != -1 and (next_open == -1 or next_close < next_open):
+                    self.done = True
+                    break
+                if next_open == -1:
+                    pos = len(buffer)
+                    break
+                self._object_start = next_open
+                self._depth = 1
+                pos = next_open + 1
+                continue
+
+            if self._escaped:
+                self._escaped = False
+                pos += 1
+                continue
+
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+
+            char = match.group()
+            pos = match.end()
+            if char == '\\':
+                self._escaped = self._in_string
+            elif char == '"':
+                self._in_string = not self._in_string
+            elif self._in_string:
+                continue
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    test_case = self._complete(buffer[self._object_start:pos])
+                    if test_case is not None:
+                        completed.append(test_case)
+
+        # Drop everything already consumed outside the current object
+        keep_from = self._object_start if self._depth > 0 else pos
+        self._buffer = buffer[keep_from:]
+        self._scan_pos = pos - keep_from
+        self._object_start -= keep_from
+        return completed
+
+    def _complete(self, raw: str) -> Optional[TestCase]:
+        try:
+            test_case = TestCase(**json.loads(raw))
+        except (ValueError, TypeError) as e:
+            # json.JSONDecodeError and pydantic.ValidationError are ValueErrors
+            self.errors.append({"raw": raw, "error": str(e)})
+            return None
+
+        if test_case.id in self._seen_ids:
+            self.errors.append(
+                {"raw": raw, "error": f"Duplicate test case id {test_case.id}"})
+            return None
+
+        self._seen_ids.add(test_case.id)
+        self.test_cases.append(test_case)
+        return test_case
+
+
+def iter_test_cases(
+    chunks: Iterable[Union[str, Dict[str, Any]]],
+    max_cases: Optional[int] = None,
+) -> Iterator[TestCase]:
+    """
+    Yield validated test cases from a stream of text chunks.
+
+    Accepts raw strings or the dicts produced by ``LLMClient.generate_stream``.
+    Once ``max_cases`` valid cases have been yielded (or the array closes) the
+    upstream stream is closed, which aborts the generation on the server.
+    """
+    parser = IncrementalTestCaseParser()
+    yielded = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, dict):
+                if chunk.get("done"):
+                    break
+                chunk = chunk.get("text", "")
+            for test_case in parser.feed(chunk):
+                yield test_case
+                yielded += 1
+                if max_cases is not None and yielded >= max_cases:
+                    return
+            if parser.done:
+                return
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
@@ -1,12 +1,56 @@
 
 
 # src/llm/prompts.py
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
 from jinja2 import Template
 import json
+import os
+import threading
+
+from ..shared.models.token_counter import TokenCounter, get_token_counter
+from .example_selector import EmbedFn, ExampleSelector
+
+EXAMPLES_PATH = (
+    Path(__file__).parent.parent.parent / "data" / "examples" / "user_stories.json"
+)
+
+# Stand-in for the user story when pre-rendering the static template parts
+_STORY_PLACEHOLDER = "\x00__USER_STORY__\x00"
 
 
 class PromptBuilder:
-    def __init__(self):
+    """
+    Build system/user prompts for test case generation.
+
+    Few-shot examples are read once and reloaded only when the examples file's
+    mtime changes. The template is rendered once per example set around a
+    placeholder, so building a prompt is a string concatenation, and fully
+    built prompts are memoized per story in an LRU cache.
+
+    With select_examples=True (default) the few-shot examples are the
+    num_examples most similar to the story, picked by an ExampleSelector
+    (TF-IDF unless an embed_fn is given); otherwise the first num_examples.
+
+    build(max_prompt_tokens=N) drops the least relevant examples until the
+    system + user prompt fits N tokens, as counted by token_counter.
+
+    build(structured_output=True) uses a shorter system prompt without the
+    output format instructions, for clients that constrain the response to
+    the TestCaseOutput JSON schema (see LLMClient.structured_output).
+    """
+
+    def __init__(
+        self,
+        examples_path: Optional[str] = None,
+        cache_size: int = 1024,
+        num_examples: int = 2,
+        select_examples: bool = True,
+        embed_fn: Optional[EmbedFn] = None,
+        min_example_score: Optional[float] = None,
+        token_counter: Optional[TokenCounter] = None,
+    ):
         self.system_prompt = """You are an expert QA engineer who creates comprehensive test cases from user stories.
 
 Your task is to generate structured test cases in Given-When-Then format.
@@ -32,6 +76,12 @@ OUTPUT FORMAT - Respond with ONLY valid JSON (no markdown, no explanations):
   ]
 }"""
 
+        # The schema passed as the response format already fixes the fields,
+        # priorities and case count, so only the content rules remain
+        self.structured_system_prompt = """You are an expert QA engineer who creates comprehensive test cases from user stories.
+
+Generate 3-6 test cases in Given-When-Then format covering happy path, edge cases, and error scenarios (positive AND negative). Be specific and actionable in each step. Respond in JSON."""
+
         self.user_template = Template("""
 User Story:
 {{ user_story }}
@@ -50,28 +100,127 @@ Test Cases Generated:
 Now generate test cases for the user story above. Remember: output ONLY valid JSON.
 """)
 
-    def build(self, user_story: str, include_examples: bool = True) -> dict:
-        """Build complete prompt"""
-
-        examples = []
+        self.examples_path = Path(examples_path) if examples_path else EXAMPLES_PATH
+        self.num_examples = num_examples
+        self.select_examples = select_examples
+        self.embed_fn = embed_fn
+        self.min_example_score = min_example_score
+        self.token_counter = token_counter
+        self._selector: Optional[ExampleSelector] = None
+        self._examples = []
+        self._examples_mtime = None
+        self._examples_lock = threading.Lock()
+        self._template_parts_cache = {}
+        self._render = lru_cache(maxsize=cache_size)(self._render_uncached)
+
+    def build(
+        self,
+        user_story: str,
+        include_examples: bool = True,
+        num_examples: Optional[int] = None,
+        max_prompt_tokens: Optional[int] = None,
+        structured_output: bool = False,
+    ) -> dict:
+        """
+        Build complete prompt
+
+        Args:
+            user_story: The story to generate test cases for
+            include_examples: Whether to add few-shot examples
+            num_examples: Override the number of examples for this call
+            max_prompt_tokens: Token budget for system + user prompt. Examples
+                are dropped, least relevant first, until the prompt fits; if
+                it does not fit even without examples it is returned anyway.
+                The result then also has "prompt_tokens" and "num_examples".
+            structured_output: Use the short system prompt for clients that
+                constrain the response to the output JSON schema
+        """
+        system_prompt = (
+            self.structured_system_prompt if structured_output else self.system_prompt)
+
+        k = 0
         if include_examples:
-            examples = self._load_examples()[:2]  # Use 2 examples
+            self._load_examples()
+            k = self.num_examples if num_examples is None else num_examples
+
+        prompt_tokens = None
+        if max_prompt_tokens is not None:
+            k, prompt_tokens = self._fit_examples(
+                user_story, k, max_prompt_tokens, system_prompt)
 
-        user_prompt = self.user_template.render(
-            user_story=user_story,
-            examples=examples
-        )
+        user_prompt = self._render(user_story, k, self._examples_mtime)
 
-        return {
-            "system": self.system_prompt,
+        prompts = {
+            "system": system_prompt,
             "user": user_prompt
         }
+        if prompt_tokens is not None:
+            prompts.update(prompt_tokens=prompt_tokens, num_examples=k)
+        return prompts
+
+    def _fit_examples(
+        self, user_story: str, k: int, max_prompt_tokens: int, system_prompt: str
+    ) -> Tuple[int, int]:
+        """Largest example count <= k whose prompt fits the budget, and its size"""
+        counter = self.token_counter or get_token_counter()
+        indices = self._select_indices(user_story, k)
+        # Counts of the cached template parts come from the counter's cache
+        fixed = counter.count(system_prompt) + counter.count(user_story)
+
+        for n in range(len(indices), -1, -1):
+            head, tail = self._template_parts(indices[:n])
+            tokens = fixed + counter.count(head) + counter.count(tail)
+            if tokens <= max_prompt_tokens or n == 0:
+                return n, tokens
+
+    def _render_uncached(self, user_story: str, k: int, version) -> str:
+        # version is only part of the memo key, so a reload invalidates it
+        head, tail = self._template_parts(self._select_indices(user_story, k))
+        return head + user_story + tail
+
+    def _select_indices(self, user_story: str, k: int) -> Tuple[int, ...]:
+        """Indices of the few-shot examples to include for user_story"""
+        selector = self._selector
+        if k <= 0 or not self._examples:
+            return ()
+        if selector is None:
+            return tuple(range(min(k, len(self._examples))))
+        return tuple(
+            selector.select_indices(user_story, k, self.min_example_score))
+
+    def _template_parts(self, indices: Tuple[int, ...]) -> Tuple[str, str]:
+        """Template rendered around the story placeholder, split in two"""
+        with self._examples_lock:
+            parts = self._template_parts_cache.get(indices)
+            if parts is None:
+                rendered = self.user_template.render(
+                    user_story=_STORY_PLACEHOLDER,
+                    examples=[self._examples[i] for i in indices]
+                )
+                head, tail = rendered.split(_STORY_PLACEHOLDER, 1)
+                parts = self._template_parts_cache[indices] = (head, tail)
+            return parts
 
     def _load_examples(self):
-        """Load few-shot examples"""
+        """Load few-shot examples, re-reading the file only when it changes"""
         try:
-            with open('data/examples/user_stories.json') as f:
-                data = json.load(f)
-                return data['examples']
-        except:
-            return []
+            mtime = os.stat(self.examples_path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if mtime != self._examples_mtime:
+            with self._examples_lock:
+                if mtime != self._examples_mtime:
+                    try:
+                        with open(self.examples_path) as f:
+                            self._examples = json.load(f)['examples']
+                    except (OSError, ValueError, KeyError, TypeError):
+                        self._examples = []
+                    self._selector = (
+                        ExampleSelector(self._examples, self.embed_fn)
+                        if self.select_examples and self._examples else None
+                    )
+                    self._examples_mtime = mtime
+                    self._template_parts_cache.clear()
+
+        return self._examples
@@ -0,0 +1,383 @@
+# src/llm/repair.py
+"""
+Repair generated output that fails StructureValidator.
+
+Local fixes come first and cost nothing: markdown fences, trailing commas,
+a bare array instead of {"test_cases": [...]}, priority casing, duplicate
+or malformed TC_ ids, and too many test cases. Only if the output is still
+invalid does the repairer ask the model again, with a short prompt holding
+just the broken test cases and their validation errors. The test cases that
+already validate are kept as they are and merged with the repaired ones.
+
+Repair round trips are counted as llm_retries_total{reason="repair"}, and
+output that is still invalid afterwards as validation_failures_total.
+"""
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..shared.infrastructure.telemetry import get_telemetry
+from .parsing import extract_json
+from ..validators.structure import (
+    MAX_TEST_CASES,
+    MIN_TEST_CASES,
+    StructureValidator,
+)
+
+GenerateFn = Callable[[str, str], Dict[str, Any]]
+AsyncGenerateFn = Callable[[str, str], Awaitable[Dict[str, Any]]]
+
+_TEST_CASE_ID = re.compile(r"^TC_(\d+)$")
+_CASE_ERROR_FIELD = re.compile(r"^test_cases\.(\d+)(?:\.(.+))?$")
+_PRIORITIES = ("critical", "high", "medium", "low")
+
+# Longest unparseable output quoted back to the model
+MAX_RAW_CHARS = 4000
+
+REPAIR_SYSTEM_PROMPT = """You fix test cases that failed validation.
+
+Each test case has: id, title (10-200 characters), priority (critical, high, medium or low), given, when, then (each at least 10 characters).
+
+Respond with ONLY valid JSON: {"test_cases": [...]}"""
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """Drop commas directly before a closing } or ], outside strings"""
+    out: List[str] = []
+    in_string = escaped = False
+    pending_comma = None
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if pending_comma is not None:
+            if char.isspace():
+                pending_comma.append(char)
+                continue
+            if char not in "}]":
+                out.append(",")
+            out.extend(pending_comma)
+            pending_comma = None
+
+        if char == ",":
+            pending_comma = []
+        else:
+            out.append(char)
+            if char == '"':
+                in_string = True
+
+    if pending_comma is not None:
+        out.append(",")
+        out.extend(pending_comma)
+    return "".join(out)
+
+
+def parse_output(text: str) -> Tuple[Any, List[str]]:
+    """
+    Parse an LLM response, fixing trailing commas if needed.
+
+    Returns:
+        (parsed JSON, names of the fixes applied)
+
+    Raises:
+        ValueError: If the text still holds no JSON
+    """
+    try:
+        return extract_json(text), []
+    except ValueError:
+        fixed = _strip_trailing_commas(text or "")
+        if fixed == text:
+            raise
+        return extract_json(fixed), ["trailing_commas"]
+
+
+def _renumber_ids(cases: List[Any]) -> bool:
+    """Give duplicate, missing or malformed ids the next free TC_ number"""
+    used = set()
+    needs_id = []
+    for index, case in enumerate(cases):
+        match = _TEST_CASE_ID.match(str(case.get("id", "")))
+        if match and case["id"] not in used:
+            used.add(case["id"])
+        else:
+            needs_id.append(index)
+
+    numbers = {int(_TEST_CASE_ID.match(i).group(1)) for i in used}
+    next_number = 1
+    for index in needs_id:
+        while next_number in numbers:
+            next_number += 1
+        numbers.add(next_number)
+        cases[index]["id"] = f"TC_{next_number:03d}"
+    return bool(needs_id)
+
+
+def repair_locally(output: Any) -> Tuple[Any, List[str]]:
+    """
+    Apply the cheap structural fixes to parsed output.
+
+    Returns:
+        (possibly fixed output, names of the fixes applied)
+    """
+    fixes = []
+    if isinstance(output, list):
+        output = {"test_cases": output}
+        fixes.append("wrapped_array")
+    if not isinstance(output, dict) or not isinstance(output.get("test_cases"), list):
+        return output, fixes
+
+    cases = [case for case in output["test_cases"] if isinstance(case, dict)]
+    if len(cases) != len(output["test_cases"]):
+        fixes.append("dropped_non_objects")
+
+    for case in cases:
+        priority = case.get("priority")
+        if isinstance(priority, str) and priority not in _PRIORITIES:
+            normalized = priority.strip().lower()
+            if normalized in _PRIORITIES:
+                case["priority"] = normalized
+                if "priority_case" not in fixes:
+                    fixes.append("priority_case")
+
+    if len(cases) > MAX_TEST_CASES:
+        cases = cases[:MAX_TEST_CASES]
+        fixes.append("trimmed")
+    if _renumber_ids(cases):
+        fixes.append("renumbered_ids")
+
+    return {**output, "test_cases": cases}, fixes
+
+
+def _case_errors(errors: List[dict]) -> Tuple[Dict[int, List[dict]], List[dict]]:
+    """Split validation errors into per-test-case errors and list-level ones"""
+    by_case: Dict[int, List[dict]] = {}
+    other = []
+    for error in errors:
+        match = _CASE_ERROR_FIELD.match(error.get("field", ""))
+        if match:
+            by_case.setdefault(int(match.group(1)), []).append(
+                {**error, "field": match.group(2) or ""})
+        else:
+            other.append(error)
+    return by_case, other
+
+
+def build_repair_prompt(
+    invalid: List[Tuple[dict, List[dict]]],
+    missing: int = 0,
+    user_story: str = "",
+    raw_output: Optional[str] = None,
+    parse_error: Optional[str] = None,
+) -> Dict[str, str]:
+    """
+    Short prompt asking the model to fix only what failed.
+
+    Args:
+        invalid: (test case, its validation errors) pairs to fix
+        missing: Number of new test cases needed to reach the minimum
+        user_story: Story the test cases are for, for context
+        raw_output: Unparseable response to return as valid JSON instead
+        parse_error: Why raw_output could not be parsed
+    """
+    lines = []
+    if user_story:
+        lines += [f"User story: {user_story}", ""]
+
+    if raw_output is not None:
+        lines += [
+            f"This output is not valid JSON ({parse_error}):",
+            raw_output[:MAX_RAW_CHARS],
+            "",
+            "Return the same test cases as valid JSON.",
+        ]
+        return {"system": REPAIR_SYSTEM_PROMPT, "user": "\n".join(lines)}
+
+    if invalid:
+        lines.append("Fix these test cases:")
+        lines.append(json.dumps({"test_cases": [case for case, _ in invalid]}, indent=2))
+        lines.append("")
+        lines.append("Validation errors:")
+        for case, errors in invalid:
+            for error in errors:
+                field = f".{error['field']}" if error["field"] else ""
+                lines.append(f"- {case.get('id', '?')}{field}: {error['message']}")
+        lines.append("")
+
+    if missing:
+        lines.append(
+            f"Also write {missing} new test case(s) for the user story, "
+            f"different from the existing ones.")
+
+    wanted = len(invalid) + missing
+    lines.append(f"Return exactly {wanted} test case(s).")
+    return {"system": REPAIR_SYSTEM_PROMPT, "user": "\n".join(lines)}
+
+
+class RepairSession:
+    """
+    State of one repair: local fixes, then model round trips until valid.
+
+    Drive it with repair_output()/arepair_output(); each round,
+    next_prompt() returns the prompt to send (or None when done) and
+    apply() merges the model's answer.
+    """
+
+    def __init__(self, text: str, user_story: str = ""):
+        self.user_story = user_story
+        self.fixes: List[str] = []
+        self.llm_calls = 0
+        self.tokens = 0
+        self.prompt_chars = 0
+        self._raw: Optional[str] = None
+        self._parse_error: Optional[str] = None
+        self._valid_cases: List[dict] = []
+        self._invalid: List[Tuple[dict, List[dict]]] = []
+        self._missing = 0
+        self.result = self._check(text)
+
+    @property
+    def valid(self) -> bool:
+        return self.result["valid"]
+
+    def _check(self, text: str) -> dict:
+        try:
+            output, fixes = parse_output(text)
+        except ValueError as e:
+            self._raw, self._parse_error = text or "", str(e)
+            return {
+                "valid": False,
+                "errors": [{"field": "", "message": str(e), "type": "json_invalid"}],
+                "test_cases": [],
+                "count": 0,
+            }
+        self._raw = self._parse_error = None
+        self.fixes += fixes
+        return self._validate(output)
+
+    def _validate(self, output: Any) -> dict:
+        output, fixes = repair_locally(output)
+        self.fixes += [fix for fix in fixes if fix not in self.fixes]
+        result = StructureValidator.validate(output)
+        if result["valid"] or not isinstance(output, dict):
+            return result
+
+        cases = output.get("test_cases") or []
+        by_case, _ = _case_errors(result["errors"])
+        self._valid_cases = [c for i, c in enumerate(cases) if i not in by_case]
+        self._invalid = [(cases[i], errors) for i, errors in sorted(by_case.items())]
+        self._missing = max(0, MIN_TEST_CASES - len(cases))
+        return result
+
+    def next_prompt(self) -> Optional[Dict[str, str]]:
+        """Prompt for the next model round trip, or None if nothing to ask"""
+        if self.valid:
+            return None
+        if self._raw is not None:
+            prompt = build_repair_prompt(
+                [], user_story=self.user_story,
+                raw_output=self._raw, parse_error=self._parse_error)
+        elif self._invalid or self._missing:
+            prompt = build_repair_prompt(
+                self._invalid, self._missing, self.user_story)
+        else:
+            return None  # e.g. wrong top-level shape; nothing to target
+        self.prompt_chars += len(prompt["system"]) + len(prompt["user"])
+        return prompt
+
+    def apply(self, response: Dict[str, Any]) -> None:
+        """Merge the model's repair response into the output and re-validate"""
+        self.llm_calls += 1
+        self.tokens += response.get("tokens", 0) or 0
+        if response.get("error"):
+            return
+
+        if self._raw is not None:
+            self.result = self._check(response.get("text", ""))
+            return
+
+        try:
+            repaired, fixes = parse_output(response.get("text", ""))
+        except ValueError:
+            return
+        self.fixes += [fix for fix in fixes if fix not in self.fixes]
+        if isinstance(repaired, dict):
+            repaired = repaired.get("test_cases")
+        if not isinstance(repaired, list):
+            return
+
+        # Keep only as many as were asked for; schema-constrained models
+        # may pad the list up to its minimum length
+        wanted = len(self._invalid) + self._missing
+        merged = self._valid_cases + [
+            case for case in repaired if isinstance(case, dict)][:wanted]
+        self.result = self._validate({"test_cases": merged})
+
+    def summary(self) -> dict:
+        return {
+            "local_fixes": list(self.fixes),
+            "llm_calls": self.llm_calls,
+            "tokens": self.tokens,
+            "prompt_chars": self.prompt_chars,
+        }
+
+    def finish(self) -> dict:
+        telemetry = get_telemetry()
+        if self.llm_calls:
+            telemetry.retries.inc(self.llm_calls, reason="repair")
+        if not self.result["valid"]:
+            errors = self.result["errors"]
+            telemetry.validation_failures.inc(
+                error_type=errors[0]["type"] if errors else "unknown")
+        return {**self.result, "repair": self.summary()}
+
+
+def repair_output(
+    text: str,
+    generate: GenerateFn,
+    user_story: str = "",
+    max_attempts: int = 1,
+) -> dict:
+    """
+    Validate text, repairing it locally and then with up to max_attempts
+    short model calls.
+
+    Args:
+        text: The raw LLM response
+        generate: LLMClient.generate-style callable (prompt, system_prompt)
+        user_story: Story the test cases are for
+        max_attempts: Model round trips allowed; 0 for local fixes only
+
+    Returns:
+        StructureValidator.validate() result plus a "repair" summary
+        (local_fixes, llm_calls, tokens, prompt_chars)
+    """
+    session = RepairSession(text, user_story)
+    for _ in range(max_attempts):
+        prompt = session.next_prompt()
+        if prompt is None:
+            break
+        session.apply(generate(prompt["user"], prompt["system"]))
+    return session.finish()
+
+
+async def arepair_output(
+    text: str,
+    agenerate: AsyncGenerateFn,
+    user_story: str = "",
+    max_attempts: int = 1,
+) -> dict:
+    """repair_output() for AsyncLLMClient.agenerate-style callables"""
+    session = RepairSession(text, user_story)
+    for _ in range(max_attempts):
+        prompt = session.next_prompt()
+        if prompt is None:
+            break
+        session.apply(await agenerate(prompt["user"], prompt["system"]))
+    return session.finish()
@@ -0,0 +1,342 @@
+# src/llm/scheduler.py
+"""
+Priority scheduling and admission control in front of the model.
+
+Every generation takes one of max_concurrency model slots, sized to match
+Ollama's OLLAMA_NUM_PARALLEL on each endpoint, so requests queue here
+instead of piling up as blocked threads and sockets inside Ollama. Waiting
+requests are served:
+
+- by priority class: "interactive" before "batch", always. Batch work only
+  runs on free capacity. A scheduler shared by interactive and batch
+  callers (the API's) can keep reserved_interactive slots free of batch
+  work, so an interactive request never waits behind a long batch
+  generation while the model is saturated. Reserving on a batch-only
+  scheduler just leaves those slots idle, so the default is none.
+- round-robin across tenants within a class, so one tenant's backfill
+  cannot monopolize its class.
+
+Each class has a bounded queue; a request that finds it full is rejected
+at once with QueueFullError (a 503 for the API) rather than waiting. With
+max_wait, requests that wait longer are rejected with QueueTimeoutError.
+
+The class and tenant of a call come from the surrounding context:
+
+    with request_context(priority="batch", tenant="backfill-42"):
+        client.generate(prompt)          # queued as a batch request
+
+Slots are taken with slot() from threads and aslot() from asyncio tasks;
+one scheduler can serve both.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterator, Optional, Tuple
+
+from ..shared.infrastructure.telemetry import get_telemetry
+
+# Highest priority first
+PRIORITIES = ("interactive", "batch")
+DEFAULT_TENANT = "default"
+
+_request_context: ContextVar[Tuple[str, str]] = ContextVar(
+    "request_context", default=(PRIORITIES[0], DEFAULT_TENANT))
+
+
+class SchedulerRejectedError(Exception):
+    """A generation was not admitted; rejected=True marks it in result dicts"""
+
+    reason = "rejected"
+
+
+class QueueFullError(SchedulerRejectedError):
+    reason = "queue_full"
+
+
+class QueueTimeoutError(SchedulerRejectedError):
+    reason = "timeout"
+
+
+@contextmanager
+def request_context(
+    priority: Optional[str] = None, tenant: Optional[str] = None
+) -> Iterator[None]:
+    """Schedule generations started in this block with priority and tenant"""
+    current_priority, current_tenant = _request_context.get()
+    priority = priority or current_priority
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority {priority!r}; expected one of {PRIORITIES}")
+    token = _request_context.set((priority, tenant or current_tenant))
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+
+def current_request() -> Tuple[str, str]:
+    """(priority, tenant) generations in this context are scheduled with"""
+    return _request_context.get()
+
+
+class _Waiter:
+    __slots__ = ("priority", "tenant", "enqueued", "granted", "event", "loop", "future")
+
+    def __init__(self, priority: str, tenant: str):
+        self.priority = priority
+        self.tenant = tenant
+        self.enqueued = time.perf_counter()
+        self.granted = False
+        self.event: Optional[threading.Event] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.future: Optional[asyncio.Future] = None
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class GenerationScheduler:
+    """
+    Admission control and priority queueing for model calls; thread-safe.
+
+    Args:
+        max_concurrency: Model slots (generations in flight at once)
+        queue_limits: Most requests waiting per priority class
+        reserved_interactive: Slots batch requests may not take
+        max_wait: Seconds a request may wait for a slot (None = no limit)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        queue_limits: Optional[Dict[str, int]] = None,
+        reserved_interactive: int = 0,
+        max_wait: Optional[float] = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_limits = {"interactive": 64, "batch": 1024, **(queue_limits or {})}
+        # Batch always gets at least one slot
+        self.reserved_interactive = min(reserved_interactive, self.max_concurrency - 1)
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {
+            priority: OrderedDict() for priority in PRIORITIES}
+        self._queued = dict.fromkeys(PRIORITIES, 0)
+        self._active = dict.fromkeys(PRIORITIES, 0)
+        self._admitted = dict.fromkeys(PRIORITIES, 0)
+        self._rejected = dict.fromkeys(PRIORITIES, 0)
+        self._waits: Dict[str, Deque[float]] = {
+            priority: deque(maxlen=1000) for priority in PRIORITIES}
+
+    @classmethod
+    def from_config(cls, config) -> "GenerationScheduler":
+        """Scheduler for an LLMConfig: max_concurrency slots per endpoint"""
+        return cls(
+            max_concurrency=config.max_concurrency * len(config.ollama_endpoints()),
+            queue_limits={
+                "interactive": config.interactive_queue_size,
+                "batch": config.batch_queue_size,
+            },
+            reserved_interactive=config.reserved_interactive_slots,
+            max_wait=config.max_queue_wait,
+        )
+
+    @contextmanager
+    def slot(
+        self,
+        priority: Optional[str] = None,
+        tenant: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[None]:
+        """
+        Hold a model slot for the enclosed block, waiting in line for it.
+
+        priority and tenant default to the current request_context().
+
+        Raises:
+            QueueFullError: The class's queue is full
+            QueueTimeoutError: No slot within timeout (default max_wait)
+        """
+        waiter = self._enqueue(priority, tenant)
+        if not waiter.granted:
+            timeout = self.max_wait if timeout is None else timeout
+            if not waiter.event.wait(timeout) and self._withdraw(waiter):
+                raise self._reject(waiter, QueueTimeoutError(
+                    f"No model slot free within {timeout}s"))
+        self._admit(waiter)
+        try:
+            yield
+        finally:
+            self._release(waiter)
+
+    @asynccontextmanager
+    async def aslot(
+        self,
+        priority: Optional[str] = None,
+        tenant: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        """slot() for asyncio tasks; a cancelled wait leaves the queue"""
+        loop = asyncio.get_running_loop()
+        waiter = self._enqueue(priority, tenant, loop)
+        if not waiter.granted:
+            timeout = self.max_wait if timeout is None else timeout
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            except asyncio.TimeoutError:
+                if self._withdraw(waiter):
+                    raise self._reject(waiter, QueueTimeoutError(
+                        f"No model slot free within {timeout}s")) from None
+            except BaseException:
+                # Cancelled while waiting: give up the place or the slot
+                if not self._withdraw(waiter):
+                    self._release(waiter)
+                raise
+        self._admit(waiter)
+        try:
+            yield
+        finally:
+            self._release(waiter)
+
+    def stats(self) -> Dict[str, object]:
+        """Slots in use, queue depth, admissions, rejections and recent waits per class"""
+        with self._lock:
+            classes = {}
+            for priority in PRIORITIES:
+                waits = sorted(self._waits[priority])
+                classes[priority] = {
+                    "active": self._active[priority],
+                    "queued": self._queued[priority],
+                    "queue_limit": self.queue_limits[priority],
+                    "tenants_waiting": len(self._queues[priority]),
+                    "admitted": self._admitted[priority],
+                    "rejected": self._rejected[priority],
+                    "wait_p50": waits[len(waits) // 2] if waits else 0.0,
+                    "wait_p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+                    "wait_max": waits[-1] if waits else 0.0,
+                }
+            return {
+                "max_concurrency": self.max_concurrency,
+                "reserved_interactive": self.reserved_interactive,
+                "active": sum(self._active.values()),
+                "queued": sum(self._queued.values()),
+                "classes": classes,
+            }
+
+    def _enqueue(
+        self,
+        priority: Optional[str],
+        tenant: Optional[str],
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> _Waiter:
+        context_priority, context_tenant = current_request()
+        waiter = _Waiter(priority or context_priority, tenant or context_tenant)
+        if waiter.priority not in PRIORITIES:
+            raise ValueError(
+                f"Unknown priority {waiter.priority!r}; expected one of {PRIORITIES}")
+        if loop is None:
+            waiter.event = threading.Event()
+        else:
+            waiter.loop, waiter.future = loop, loop.create_future()
+
+        with self._lock:
+            self._queues[waiter.priority].setdefault(
+                waiter.tenant, deque()).append(waiter)
+            self._queued[waiter.priority] += 1
+            get_telemetry().queue_depth.inc(priority=waiter.priority)
+            woken = self._dispatch()
+            # Only a request that would have to wait counts against the limit
+            full = (not waiter.granted
+                    and self._queued[waiter.priority] > self.queue_limits[waiter.priority])
+            if full:
+                self._unqueue(waiter)
+        if full:
+            raise self._reject(waiter, QueueFullError(
+                f"{waiter.priority} queue is full "
+                f"({self.queue_limits[waiter.priority]} waiting)"))
+        for other in woken:
+            if other is not waiter:
+                other.wake()
+        return waiter
+
+    def _dispatch(self) -> list:
+        """Grant free slots to waiters by priority, then tenant round-robin; holds the lock"""
+        woken = []
+        while True:
+            in_use = sum(self._active.values())
+            if in_use >= self.max_concurrency:
+                return woken
+            for priority in PRIORITIES:
+                tenants = self._queues[priority]
+                if not tenants:
+                    continue
+                if (priority != PRIORITIES[0]
+                        and in_use >= self.max_concurrency - self.reserved_interactive):
+                    continue
+                tenant, waiters = next(iter(tenants.items()))
+                waiter = waiters.popleft()
+                # The tenant goes to the back of the line
+                del tenants[tenant]
+                if waiters:
+                    tenants[tenant] = waiters
+                self._queued[priority] -= 1
+                self._active[priority] += 1
+                waiter.granted = True
+                telemetry = get_telemetry()
+                telemetry.queue_depth.dec(priority=priority)
+                telemetry.active_requests.inc(priority=priority)
+                woken.append(waiter)
+                break
+            else:
+                return woken
+
+    def _withdraw(self, waiter: _Waiter) -> bool:
+        """Take a waiter out of the queue; False if it was granted meanwhile"""
+        with self._lock:
+            if waiter.granted:
+                return False
+            self._unqueue(waiter)
+            return True
+
+    def _unqueue(self, waiter: _Waiter) -> None:
+        """Remove a waiting (not granted) waiter; holds the lock"""
+        tenants = self._queues[waiter.priority]
+        waiters = tenants[waiter.tenant]
+        waiters.remove(waiter)
+        if not waiters:
+            del tenants[waiter.tenant]
+        self._queued[waiter.priority] -= 1
+        get_telemetry().queue_depth.dec(priority=waiter.priority)
+
+    def _admit(self, waiter: _Waiter) -> None:
+        waited = time.perf_counter() - waiter.enqueued
+        with self._lock:
+            self._admitted[waiter.priority] += 1
+            self._waits[waiter.priority].append(waited)
+        telemetry = get_telemetry()
+        telemetry.queue_wait.observe(waited, priority=waiter.priority)
+        telemetry.record("queue_wait", waited, priority=waiter.priority, tenant=waiter.tenant)
+
+    def _reject(self, waiter: _Waiter, error: SchedulerRejectedError) -> SchedulerRejectedError:
+        with self._lock:
+            self._rejected[waiter.priority] += 1
+        get_telemetry().rejections.inc(priority=waiter.priority, reason=error.reason)
+        return error
+
+    def _release(self, waiter: _Waiter) -> None:
+        with self._lock:
+            self._active[waiter.priority] -= 1
+            get_telemetry().active_requests.dec(priority=waiter.priority)
+            woken = self._dispatch()
+        for other in woken:
+            other.wake()
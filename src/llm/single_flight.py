@@ -0,0 +1,87 @@
+# src/llm/single_flight.py
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+def normalize_prompt(text: str) -> str:
+    """Collapse whitespace so trivially different copies of a story match"""
+    return " ".join(text.split())
+
+
+class SingleFlight:
+    """
+    Thread-safe single-flight: concurrent calls with the same key share one execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running block until it finishes and receive the same
+    result, or the same exception. Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn once per concurrent key.
+
+        Returns:
+            (result, shared) where shared is True for callers that reused
+            another caller's in-flight call
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result(), False
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently executing"""
+        with self._lock:
+            return len(self._in_flight)
+
+
+class AsyncSingleFlight:
+    """
+    asyncio flavour of SingleFlight for coroutine functions.
+
+    The shared call runs as its own task, so a caller that times out or is
+    cancelled does not cancel the call for the others waiting on it.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def do(
+        self, key: str, fn: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """Await fn once per concurrent key; returns (result, shared)"""
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if not shared:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    def in_flight(self) -> int:
+        return len(self._in_flight)
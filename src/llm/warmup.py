@@ -0,0 +1,207 @@
+# src/llm/warmup.py
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Sequence, Tuple
+
+from ..shared.infrastructure.environment_variables import (
+    KeepAlive,
+    parse_model_keep_alive,
+)
+
+# A load_duration above this means the model was not resident (seconds)
+COLD_START_THRESHOLD = 0.5
+
+
+def models_to_warm(
+    spec: str, default_model: str, default_keep_alive: KeepAlive
+) -> Dict[str, KeepAlive]:
+    """Models from a "model[=keep_alive],..." spec, or just default_model"""
+    return (parse_model_keep_alive(spec, default_keep_alive)
+            or {default_model: default_keep_alive})
+
+
+class LatencyStats:
+    """Bounded latency samples with count/avg/p50/p95/max"""
+
+    def __init__(self, max_samples: int = 512):
+        self.count = 0
+        self._samples: Deque[float] = deque(maxlen=max_samples)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self._samples.append(seconds)
+
+    def summary(self) -> dict:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"count": self.count}
+        return {
+            "count": self.count,
+            "avg": sum(samples) / len(samples),
+            "p50": samples[len(samples) // 2],
+            "p95": samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+            "max": samples[-1],
+        }
+
+
+class ModelWarmer:
+    """
+    Keep Ollama models loaded so requests do not pay for a cold start.
+
+    warm_up() loads every model on every endpoint with an empty-prompt
+    generate request (which Ollama answers by loading the model) and sets
+    its keep_alive. start() then re-pings each model every ping_interval
+    seconds, which should be shorter than the keep_alive, so idle periods
+    do not unload it.
+
+    Generation latencies, added with record(), are reported separately for
+    cold loads and warm calls: a response whose load_duration exceeds
+    cold_start_threshold counts as cold. Keep-alive pings are near-instant
+    empty prompts, so they get their own latency stats and a count of the
+    pings that found the model unloaded.
+    """
+
+    def __init__(
+        self,
+        models: Dict[str, KeepAlive],
+        base_urls: Sequence[str],
+        ping_interval: float = 240.0,
+        cold_start_threshold: float = COLD_START_THRESHOLD,
+        client_factory: Optional[Callable[[str], Any]] = None,
+    ):
+        self.models = dict(models)
+        self.base_urls = list(base_urls)
+        self.ping_interval = ping_interval
+        self.cold_start_threshold = cold_start_threshold
+        self._client_factory = client_factory or self._default_client
+        self._clients: Dict[str, Any] = {}
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._cold: Dict[str, LatencyStats] = {m: LatencyStats() for m in self.models}
+        self._warm: Dict[str, LatencyStats] = {m: LatencyStats() for m in self.models}
+        self._pings: Dict[str, LatencyStats] = {m: LatencyStats() for m in self.models}
+        self._ping_loads: Dict[str, int] = dict.fromkeys(self.models, 0)
+        self._last_ping: Dict[Tuple[str, str], float] = {}
+        self.errors: Deque[str] = deque(maxlen=20)
+
+    @classmethod
+    def from_config(cls, config, **kwargs) -> "ModelWarmer":
+        """Warmer for an LLMConfig's warm-up models and Ollama endpoints"""
+        return cls(
+            models_to_warm(config.warmup_models, config.model, config.keep_alive),
+            config.ollama_endpoints(),
+            ping_interval=config.keepalive_ping_interval,
+            **kwargs,
+        )
+
+    @staticmethod
+    def _default_client(host: str):
+        from ollama import Client
+        return Client(host=host)
+
+    def _client(self, host: str):
+        if host not in self._clients:
+            self._clients[host] = self._client_factory(host)
+        return self._clients[host]
+
+    def ping(self, model: str, host: str) -> Optional[float]:
+        """
+        Load model on host (or refresh its keep_alive).
+
+        Returns:
+            The request latency in seconds, or None if the request failed
+        """
+        start = time.time()
+        try:
+            response = self._client(host).generate(
+                model=model, prompt="", keep_alive=self.models[model])
+        except Exception as e:
+            self.errors.append(f"{host} {model}: {e}")
+            return None
+
+        latency = time.time() - start
+        load_duration = (response.get("load_duration") or 0) / 1e9
+        with self._lock:
+            self._pings.setdefault(model, LatencyStats()).add(latency)
+            if load_duration > self.cold_start_threshold:
+                self._ping_loads[model] = self._ping_loads.get(model, 0) + 1
+            self._last_ping[(host, model)] = time.time()
+        return latency
+
+    def warm_up(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Load every model on every endpoint.
+
+        Returns:
+            {model: {base_url: latency or None if it failed}}
+        """
+        return {
+            model: {host: self.ping(model, host) for host in self.base_urls}
+            for model in self.models
+        }
+
+    def record(
+        self, model: str, latency: float, load_duration: Optional[float] = None
+    ) -> bool:
+        """
+        Add one generation's latency to the cold or warm stats of model.
+
+        Returns:
+            True if the call counted as a cold start
+        """
+        cold = (load_duration or 0.0) > self.cold_start_threshold
+        with self._lock:
+            stats = self._cold if cold else self._warm
+            stats.setdefault(model, LatencyStats()).add(latency)
+        return cold
+
+    def start(self) -> None:
+        """Start re-pinging models in the background"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ollama-keepalive", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background pings"""
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(5)
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            close = getattr(client, "close", None)
+            if close is not None:
+                close()
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-model keep_alive, cold/warm generation latency and ping stats"""
+        with self._lock:
+            return {
+                model: {
+                    "keep_alive": self.models.get(model),
+                    "cold": self._cold.get(model, LatencyStats()).summary(),
+                    "warm": self._warm.get(model, LatencyStats()).summary(),
+                    "pings": self._pings.get(model, LatencyStats()).summary(),
+                    # Pings that had to (re)load the model
+                    "ping_loads": self._ping_loads.get(model, 0),
+                    "last_ping": {
+                        host: at for (host, m), at in self._last_ping.items()
+                        if m == model
+                    },
+                }
+                for model in set(self._cold) | set(self._warm) | set(self._pings)
+            }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.ping_interval):
+            for model in self.models:
+                for host in self.base_urls:
+                    if self._stop.is_set():
+                        return
+                    self.ping(model, host)
@@ -1,31 +1,31 @@
 import sys
 from pathlib import Path
-# from src.llm.prompts import PromptBuilder
-# from src.llm.client import LLMClient, LLMConfig
-from langchain_core.prompts import ChatPromptTemplate
 
 
 try:
-    from src.llm.client import LLMClient, LLMConfig
+    from src.llm.client import LLMClient, LLMConfig, make_load_balancer
     from src.llm.prompts import PromptBuilder
-    from src.llm.prompts import PromptBuilder
-    from src.llm.client import LLMClient, LLMConfig
 except ImportError:
     # Add parent directory to path for direct execution
     sys.path.insert(0, str(Path(__file__).parent.parent))
-    from src.llm.client import LLMClient, LLMConfig
-    from src.llm.prompts import PromptBuilder
+    from src.llm.client import LLMClient, LLMConfig, make_load_balancer
     from src.llm.prompts import PromptBuilder
-    from src.llm.client import LLMClient, LLMConfig
-
-# Create a simple prompt template
-prompt = ChatPromptTemplate.from_template(
-    "You are a helpful assistant. Answer the following question: {question}"
-)
 
 
 # Example usage
 if __name__ == "__main__":
+    # Only the demo needs langchain and the Ollama model wrapper
+    from langchain_core.prompts import ChatPromptTemplate
+
+    from src.shared.infrastructure import get_environment_config
+    from src.shared.models.llm_exeptions import OllamaCallError
+    from src.shared.models.ollama_qwen3vl4b import OllamaQwen3vl4b
+
+    # Create a simple prompt template
+    prompt = ChatPromptTemplate.from_template(
+        "You are a helpful assistant. Answer the following question: {question}"
+    )
+
     question = "What is the capital of France?"
     formatted_prompt = prompt.format(question=question)
 
@@ -33,13 +33,15 @@ if __name__ == "__main__":
     print("-" * 50)
 
     try:
-        # Initialize the Ollama Qwen3-VL:4B model with retry logic
-        qwen3vl4b_model = OllamaQwen3vl4b()
+        # Initialize the Ollama Qwen3-VL:4B model with retry logic, balanced
+        # across OLLAMA-SERVICE-HOSTS when it lists several hosts
+        qwen3vl4b_model = OllamaQwen3vl4b(
+            load_balancer=make_load_balancer(LLMConfig()))
 
         # Get response from the LLM with safe_call (includes retry logic)
         # response = qwen3vl4b_model.safe_call(formatted_prompt)
         response = qwen3vl4b_model.safe_call_with_tokens(
-            max_retries=ENVIRONMENT_CONFIG.MAX_RETRIES,
+            max_retries=get_environment_config().MAX_RETRIES,
             prompt=formatted_prompt
         )
 
@@ -1,15 +1,79 @@
 # src/mlflow_tracker.py
+import atexit
+import logging
+import queue
+import threading
+import time
 import mlflow
-import mlflow.pyfunc
+from mlflow.entities import Metric, Param
+from mlflow.tracking import MlflowClient
 from datetime import datetime
-import json
+from typing import Optional
+
+from src.shared.infrastructure.telemetry import get_telemetry
+
+logger = logging.getLogger(__name__)
 
 
 class MLflowTracker:
-    """Track experiments and metrics in MLflow"""
+    """
+    Track experiments and metrics in MLflow
+
+    By default log_generation() only enqueues the entry; a background worker
+    thread writes queued entries in batches. The queue is bounded: when it is
+    full, overflow_policy decides whether to drop the newest entry, drop the
+    oldest one, or block the caller for up to block_timeout seconds. Pending
+    entries are flushed at interpreter exit.
+
+    Coalescing happens per run, not across runs: MLflow has no multi-run
+    write, so each generation is still its own run. Its tags go with
+    create_run(), its params and metrics in one log_batch() call, and then
+    set_terminated(), so 3 round trips per entry. log_artifacts=False skips
+    the per-entry generation_result.json artifact, which is otherwise a
+    4th.
+    """
+
+    OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+    def __init__(
+        self,
+        experiment_name: str = "test-case-generation",
+        async_logging: bool = True,
+        max_queue_size: int = 1000,
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        overflow_policy: str = "drop_newest",
+        block_timeout: float = 0.1,
+        log_artifacts: bool = True,
+    ):
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
 
-    def __init__(self, experiment_name: str = "test-case-generation"):
-        mlflow.set_experiment(experiment_name)
+        experiment = mlflow.set_experiment(experiment_name)
+        self.experiment_id = experiment.experiment_id
+        self.client = MlflowClient()
+
+        self.async_logging = async_logging
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.log_artifacts = log_artifacts
+
+        # Counters are updated from request threads and the worker
+        self._lock = threading.Lock()
+        self.logged = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_queue_size)
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+        if async_logging:
+            self._worker = threading.Thread(
+                target=self._run_worker, name="mlflow-tracker", daemon=True)
+            self._worker.start()
+            atexit.register(self.close)
 
     def log_generation(
         self,
@@ -21,50 +85,187 @@ class MLflowTracker:
         latency: float,
         model_info: dict
     ):
-        """Log a single test case generation run"""
-
-        with mlflow.start_run():
-            # Log parameters
-            mlflow.log_param("model", model_info.get('model'))
-            mlflow.log_param("provider", model_info.get('provider'))
-            mlflow.log_param("user_story", user_story[:100])
-
-            # Log metrics
-            mlflow.log_metric("latency", latency)
-            mlflow.log_metric("structure_valid",
-                              1.0 if structure_validation['valid'] else 0.0)
-            mlflow.log_metric("test_case_count", structure_validation['count'])
-
-            if quality_metrics:
-                mlflow.log_metric("relevance_score",
-                                  quality_metrics['relevance'])
-                mlflow.log_metric("coverage_score",
-                                  quality_metrics['coverage'])
-                mlflow.log_metric("clarity_score", quality_metrics['clarity'])
-                mlflow.log_metric("overall_quality",
-                                  quality_metrics['overall'])
-
-            if coverage_metrics:
-                mlflow.log_metric("coverage_score",
-                                  coverage_metrics['coverage_score'])
-                mlflow.log_metric("priority_diversity",
-                                  coverage_metrics['priority_diversity'])
-
-            # Log artifacts
-            mlflow.log_dict({
-                "user_story": user_story,
-                "test_cases": test_cases,
-                "validations": {
-                    "structure": structure_validation,
-                    "quality": quality_metrics,
-                    "coverage": coverage_metrics
-                }
-            }, "generation_result.json")
-
-            # Log tags
-            mlflow.set_tag("timestamp", datetime.now().isoformat())
-            mlflow.set_tag("passed_validation", structure_validation['valid'])
-
-            run_id = mlflow.active_run().info.run_id
+        """
+        Log a single test case generation run
+
+        Returns:
+            The run id when logging synchronously, None when the entry was
+            queued for the background worker (or dropped)
+        """
+        entry = self._build_entry(
+            user_story, test_cases, structure_validation, quality_metrics,
+            coverage_metrics, latency, model_info)
+
+        if not self.async_logging:
+            return self._write_entry(entry)
+
+        self._enqueue(entry)
+        return None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued entry has been written.
+
+        Returns:
+            True if the queue drained within timeout
+        """
+        if not self.async_logging:
+            return True
 
+        # Queue.join() with a timeout: wait on the condition it uses
+        done = self._queue.all_tasks_done
+        with done:
+            return done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Flush pending entries and stop the worker thread"""
+        if self._worker is None:
+            return
+        self.flush(timeout)
+        self._stop.set()
+        self._worker.join(timeout)
+        self._worker = None
+
+    def stats(self) -> dict:
+        """Queue and write counters"""
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "logged": self.logged,
+                "dropped": self.dropped,
+                "failed": self.failed,
+            }
+
+    @staticmethod
+    def _build_entry(
+        user_story, test_cases, structure_validation, quality_metrics,
+        coverage_metrics, latency, model_info
+    ) -> dict:
+        # Log parameters
+        params = {
+            "model": model_info.get('model'),
+            "provider": model_info.get('provider'),
+            "user_story": user_story[:100],
+        }
+
+        # Log metrics
+        metrics = {
+            "latency": latency,
+            "structure_valid": 1.0 if structure_validation['valid'] else 0.0,
+            "test_case_count": structure_validation['count'],
+        }
+
+        if quality_metrics:
+            metrics["relevance_score"] = quality_metrics['relevance']
+            metrics["coverage_score"] = quality_metrics['coverage']
+            metrics["clarity_score"] = quality_metrics['clarity']
+            metrics["overall_quality"] = quality_metrics['overall']
+
+        if coverage_metrics:
+            metrics["coverage_score"] = coverage_metrics['coverage_score']
+            metrics["priority_diversity"] = coverage_metrics['priority_diversity']
+
+        # Log tags
+        tags = {
+            "timestamp": datetime.now().isoformat(),
+            "passed_validation": str(structure_validation['valid']),
+        }
+
+        # Log artifacts
+        artifact = {
+            "user_story": user_story,
+            "test_cases": test_cases,
+            "validations": {
+                "structure": structure_validation,
+                "quality": quality_metrics,
+                "coverage": coverage_metrics
+            }
+        }
+
+        return {
+            "params": params,
+            "metrics": metrics,
+            "tags": tags,
+            "artifact": artifact,
+            "timestamp_ms": int(time.time() * 1000),
+        }
+
+    def _write_entry(self, entry: dict) -> str:
+        """Write one entry as an MLflow run; returns its run id"""
+        timestamp = entry["timestamp_ms"]
+        run = self.client.create_run(
+            self.experiment_id, start_time=timestamp, tags=entry["tags"])
+        run_id = run.info.run_id
+
+        self.client.log_batch(
+            run_id,
+            metrics=[
+                Metric(key, float(value), timestamp, 0)
+                for key, value in entry["metrics"].items()
+            ],
+            params=[
+                Param(key, str(value)) for key, value in entry["params"].items()
+            ],
+        )
+        if self.log_artifacts:
+            self.client.log_dict(
+                run_id, entry["artifact"], "generation_result.json")
+        self.client.set_terminated(run_id)
+        with self._lock:
+            self.logged += 1
         return run_id
+
+    def _enqueue(self, entry: dict) -> None:
+        if self.overflow_policy == "block":
+            try:
+                self._queue.put(entry, timeout=self.block_timeout)
+            except queue.Full:
+                self._count_dropped()
+            return
+
+        while True:
+            try:
+                self._queue.put_nowait(entry)
+                return
+            except queue.Full:
+                if self.overflow_policy == "drop_newest":
+                    self._count_dropped()
+                    return
+                # drop_oldest: make room and retry
+                try:
+                    self._queue.get_nowait()
+                    self._queue.task_done()
+                    self._count_dropped()
+                except queue.Empty:
+                    pass
+
+    def _count_dropped(self) -> None:
+        with self._lock:
+            self.dropped += 1
+
+    def _run_worker(self) -> None:
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            for entry in batch:
+                try:
+                    with get_telemetry().span("tracking_write"):
+                        self._write_entry(entry)
+                except Exception as e:
+                    with self._lock:
+                        self.failed += 1
+                    logger.warning("MLflow logging failed: %s", e, exc_info=True)
+                finally:
+                    self._queue.task_done()
+
+    def _next_batch(self) -> list:
+        """Up to batch_size entries, waiting at most flush_interval for the first"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
@@ -0,0 +1,14 @@
+from .environment_variables import EnvironmentConfig, get_environment_config
+from .telemetry import Telemetry, TokenMeter, get_telemetry, set_telemetry
+
+__all__ = [
+    "EnvironmentConfig", "ENVIRONMENT_CONFIG", "get_environment_config",
+    "Telemetry", "TokenMeter", "get_telemetry", "set_telemetry",
+]
+
+
+def __getattr__(name: str):
+    # Loading the configuration is deferred until ENVIRONMENT_CONFIG is used
+    if name == "ENVIRONMENT_CONFIG":
+        return get_environment_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
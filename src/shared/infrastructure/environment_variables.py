@@ -1,9 +1,34 @@
 import os
-from dotenv import load_dotenv
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Union
+
 from pydantic import BaseModel, Field
 
-# Load environment variables from .env.dev
-load_dotenv(".env.dev")
+# Repository root, so .env.dev is found whatever the working directory
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+ENV_FILE = PROJECT_ROOT / ".env.dev"
+
+KeepAlive = Union[str, float]
+
+
+def parse_model_keep_alive(
+    spec: str, default_keep_alive: KeepAlive
+) -> Dict[str, KeepAlive]:
+    """
+    Parse "model[=keep_alive],..." (OLLAMA_WARMUP_MODELS) into {model: keep_alive}.
+
+    e.g. "qwen3-vl:4b=30m,llama3.2:3b" keeps qwen3-vl loaded for 30 minutes
+    and llama3.2 for default_keep_alive.
+    """
+    models: Dict[str, KeepAlive] = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        model, _, keep_alive = entry.partition("=")
+        models[model.strip()] = keep_alive.strip() or default_keep_alive
+    return models
 
 
 # // ─────────────────────────────────────
@@ -20,11 +45,44 @@ class EnvironmentConfig(BaseModel):
         alias="OLLAMA-SERVICE-HOST",
         description="The base URL of the Ollama service"
     )
+    OLLAMA_SERVICE_HOSTS: str = Field(
+        default="",
+        alias="OLLAMA-SERVICE-HOSTS",
+        description="Comma-separated Ollama base URLs to load balance across; "
+                    "empty means OLLAMA-SERVICE-HOST only"
+    )
+    OLLAMA_HEALTH_CHECK_INTERVAL: float = Field(
+        default=10.0,
+        alias="OLLAMA_HEALTH_CHECK_INTERVAL",
+        description="Seconds between health checks of each Ollama endpoint"
+    )
     OLLAMA_SERVICE_MODEL_QWEN3VL4B: str = Field(
         default="qwen3-vl:4b",
         alias="OLLAMA_SERVICE_MODEL_QWEN3VL4B",
         description="The Qwen3-VL:4B model name"
     )
+    OLLAMA_KEEP_ALIVE: str = Field(
+        default="30m",
+        alias="OLLAMA_KEEP_ALIVE",
+        description="How long Ollama keeps a model loaded after a request"
+    )
+    OLLAMA_WARMUP_MODELS: str = Field(
+        default="",
+        alias="OLLAMA_WARMUP_MODELS",
+        description="Models to load at startup as 'model[=keep_alive],...'; "
+                    "empty means the configured model"
+    )
+    OLLAMA_KEEPALIVE_PING_INTERVAL: float = Field(
+        default=240.0,
+        alias="OLLAMA_KEEPALIVE_PING_INTERVAL",
+        description="Seconds between pings that keep warm models loaded"
+    )
+    OLLAMA_NUM_PARALLEL: int = Field(
+        default=4,
+        alias="OLLAMA_NUM_PARALLEL",
+        description="Generations each Ollama endpoint runs at once; match the "
+                    "server's OLLAMA_NUM_PARALLEL"
+    )
 
     # // ─────────────────────────────────────
     # ERROR HANDLING & RETRIES
@@ -44,16 +102,75 @@ class EnvironmentConfig(BaseModel):
         alias="MAX_RETRIES_DEV_MSG",
         description="Developer error message template for retry failures"
     )
+    RETRY_BASE_DELAY: float = Field(
+        default=0.5,
+        alias="RETRY_BASE_DELAY",
+        description="Initial backoff delay in seconds (doubled per attempt, jittered)"
+    )
+    RETRY_MAX_DELAY: float = Field(
+        default=8.0,
+        alias="RETRY_MAX_DELAY",
+        description="Maximum backoff delay in seconds"
+    )
+    RETRY_DEADLINE: float = Field(
+        default=60.0,
+        alias="RETRY_DEADLINE",
+        description="Overall time budget in seconds for a call and its retries"
+    )
+    CIRCUIT_FAILURE_THRESHOLD: int = Field(
+        default=5,
+        alias="CIRCUIT_FAILURE_THRESHOLD",
+        description="Consecutive failures before the circuit breaker opens"
+    )
+    CIRCUIT_RECOVERY_TIMEOUT: float = Field(
+        default=30.0,
+        alias="CIRCUIT_RECOVERY_TIMEOUT",
+        description="Seconds the circuit stays open before a trial call"
+    )
+
+    # // ─────────────────────────────────────
+    # OBSERVABILITY
+    # // ─────────────────────────────────────
+    TRACE_SPAN_FILE: str = Field(
+        default="",
+        alias="TRACE_SPAN_FILE",
+        description="File to append finished spans to as OpenTelemetry (OTLP) "
+                    "JSON lines; empty disables span export"
+    )
+
+    @property
+    def ollama_hosts(self) -> list:
+        """Every configured Ollama base URL, falling back to OLLAMA_SERVICE_HOST"""
+        hosts = [h.strip() for h in self.OLLAMA_SERVICE_HOSTS.split(",") if h.strip()]
+        return hosts or [self.OLLAMA_SERVICE_HOST]
+
+    def model_keep_alive(self, model: str) -> KeepAlive:
+        """keep_alive for model: its OLLAMA_WARMUP_MODELS entry, else OLLAMA_KEEP_ALIVE"""
+        return parse_model_keep_alive(
+            self.OLLAMA_WARMUP_MODELS, self.OLLAMA_KEEP_ALIVE
+        ).get(model, self.OLLAMA_KEEP_ALIVE)
 
     def __str__(self) -> str:
         """String representation of environment configuration."""
         return (
             f"EnvironmentConfig(\n"
             f"  OLLAMA_SERVICE_HOST: {self.OLLAMA_SERVICE_HOST}\n"
+            f"  OLLAMA_SERVICE_HOSTS: {self.OLLAMA_SERVICE_HOSTS}\n"
+            f"  OLLAMA_HEALTH_CHECK_INTERVAL: {self.OLLAMA_HEALTH_CHECK_INTERVAL}\n"
             f"  OLLAMA_SERVICE_MODEL_QWEN3VL4B: {self.OLLAMA_SERVICE_MODEL_QWEN3VL4B}\n"
+            f"  OLLAMA_KEEP_ALIVE: {self.OLLAMA_KEEP_ALIVE}\n"
+            f"  OLLAMA_WARMUP_MODELS: {self.OLLAMA_WARMUP_MODELS}\n"
+            f"  OLLAMA_KEEPALIVE_PING_INTERVAL: {self.OLLAMA_KEEPALIVE_PING_INTERVAL}\n"
+            f"  OLLAMA_NUM_PARALLEL: {self.OLLAMA_NUM_PARALLEL}\n"
             f"  MAX_RETRIES: {self.MAX_RETRIES}\n"
             f"  MAX_RETRIES_USER_MSG: {self.MAX_RETRIES_USER_MSG}\n"
             f"  MAX_RETRIES_DEV_MSG: {self.MAX_RETRIES_DEV_MSG}\n"
+            f"  RETRY_BASE_DELAY: {self.RETRY_BASE_DELAY}\n"
+            f"  RETRY_MAX_DELAY: {self.RETRY_MAX_DELAY}\n"
+            f"  RETRY_DEADLINE: {self.RETRY_DEADLINE}\n"
+            f"  CIRCUIT_FAILURE_THRESHOLD: {self.CIRCUIT_FAILURE_THRESHOLD}\n"
+            f"  CIRCUIT_RECOVERY_TIMEOUT: {self.CIRCUIT_RECOVERY_TIMEOUT}\n"
+            f"  TRACE_SPAN_FILE: {self.TRACE_SPAN_FILE}\n"
             f")"
         )
 
@@ -69,16 +186,38 @@ class EnvironmentConfig(BaseModel):
 # Load and validate environment variables
 # ENVIRONMENT_CONFIG
 # // ─────────────────────────────────────
-ENVIRONMENT_CONFIG = EnvironmentConfig(
-    **{
+@lru_cache(maxsize=1)
+def get_environment_config() -> EnvironmentConfig:
+    """
+    Load .env.dev and validate the environment, once, on first use.
+
+    Variables already set in the process environment take precedence over
+    the file. Importing this module has no side effects.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv(ENV_FILE)
+    return EnvironmentConfig(**{
         "OLLAMA-SERVICE-HOST": os.getenv(
             "OLLAMA-SERVICE-HOST",
             "http://localhost:11435"
         ),
+        "OLLAMA-SERVICE-HOSTS": os.getenv("OLLAMA-SERVICE-HOSTS", ""),
+        "OLLAMA_HEALTH_CHECK_INTERVAL": os.getenv(
+            "OLLAMA_HEALTH_CHECK_INTERVAL",
+            "10.0"
+        ),
         "OLLAMA_SERVICE_MODEL_QWEN3VL4B": os.getenv(
             "OLLAMA_SERVICE_MODEL_QWEN3VL4B",
             "qwen3-vl:4b"
         ),
+        "OLLAMA_KEEP_ALIVE": os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+        "OLLAMA_WARMUP_MODELS": os.getenv("OLLAMA_WARMUP_MODELS", ""),
+        "OLLAMA_KEEPALIVE_PING_INTERVAL": os.getenv(
+            "OLLAMA_KEEPALIVE_PING_INTERVAL",
+            "240.0"
+        ),
+        "OLLAMA_NUM_PARALLEL": os.getenv("OLLAMA_NUM_PARALLEL", "4"),
         "MAX_RETRIES": os.getenv(
             "MAX_RETRIES",
             "3"
@@ -91,9 +230,20 @@ ENVIRONMENT_CONFIG = EnvironmentConfig(
             "MAX_RETRIES_DEV_MSG",
             "Failed to call Ollama. Attempt # "
         ),
-    }
-)
+        "RETRY_BASE_DELAY": os.getenv("RETRY_BASE_DELAY", "0.5"),
+        "RETRY_MAX_DELAY": os.getenv("RETRY_MAX_DELAY", "8.0"),
+        "RETRY_DEADLINE": os.getenv("RETRY_DEADLINE", "60.0"),
+        "CIRCUIT_FAILURE_THRESHOLD": os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"),
+        "CIRCUIT_RECOVERY_TIMEOUT": os.getenv("CIRCUIT_RECOVERY_TIMEOUT", "30.0"),
+        "TRACE_SPAN_FILE": os.getenv("TRACE_SPAN_FILE", ""),
+    })
+
+
+def __getattr__(name: str):
+    # ENVIRONMENT_CONFIG is resolved lazily (PEP 562) for existing callers
+    if name == "ENVIRONMENT_CONFIG":
+        return get_environment_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-print(f"ENVIRONMENT_CONFIG {ENVIRONMENT_CONFIG.__str__}")
 
-__all__ = ["EnvironmentConfig", "ENVIRONMENT_CONFIG"]
+__all__ = ["EnvironmentConfig", "ENVIRONMENT_CONFIG", "get_environment_config"]
@@ -0,0 +1,608 @@
+# src/shared/infrastructure/telemetry.py
+"""
+Lightweight tracing and metrics, with no third-party dependencies.
+
+Pipeline stages run inside spans:
+
+    telemetry = get_telemetry()
+    with telemetry.span("prompt_build", story_id="42"):
+        prompts = builder.build(story)
+
+Every finished span (and every duration reported with record()) is observed
+in the stage_duration_seconds{stage=...} histogram. Spans nest per thread and
+per asyncio task, and with TRACE_SPAN_FILE set they are also appended to that
+file as OpenTelemetry (OTLP/JSON) lines, one export request per span, which
+an OpenTelemetry collector's file receiver can ingest. Lines are written by
+a background thread, so no request (or event loop) waits on file I/O.
+
+render_prometheus() returns every metric in the Prometheus text exposition
+format, as served by the API's /metrics endpoint.
+"""
+import atexit
+import json
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; spans pipeline stages from sub-millisecond parsing to slow generations
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+SERVICE_NAME = "test-case-generator"
+
+logger = logging.getLogger(__name__)
+
+# TokenUsage durations timed by the model server, and the stage each is
+# recorded as
+USAGE_STAGES = {
+    "load_duration": "model_load",
+    "prompt_eval_duration": "prefill",
+    "eval_duration": "decode",
+}
+
+# OTLP span status codes
+_STATUS_OK = 1
+_STATUS_ERROR = 2
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    """Named metric with a fixed set of label names; thread-safe"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(list(zip(self.labelnames, key)), value))
+        return lines
+
+    def _render_sample(self, labels, value) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        # Per-bucket (non-cumulative) counts; the last slot is +Inf
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self, **labels) -> Dict[str, Any]:
+        """{"count", "sum", "buckets": {upper bound: cumulative count}}"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            counts, total, count = (
+                (list(state[0]), state[1], state[2]) if state
+                else ([0] * (len(self.buckets) + 1), 0.0, 0))
+        cumulative, running = {}, 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            running += bucket_count
+            cumulative[bound] = running
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+    def _render_sample(self, labels, value) -> List[str]:
+        counts, total, count = value
+        lines, running = [], 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            running += bucket_count
+            bucket_labels = labels + [("le", _format_value(bound))]
+            lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {running}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Span:
+    """One timed operation; attributes can be added while it runs"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns",
+                 "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str, start_ns: int,
+                 attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = start_ns
+        self.end_ns = start_ns
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def to_otlp(self) -> Dict[str, Any]:
+        status = {"code": _STATUS_OK}
+        if self.error is not None:
+            status = {"code": _STATUS_ERROR, "message": self.error}
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items() if value is not None
+            ],
+            "status": status,
+        }
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class TokenMeter:
+    """
+    Token totals per model, with throughput over a rolling window.
+
+    record() takes a TokenUsage (or anything with its attributes). Two
+    rolling rates are kept per model: decode speed (completion tokens per
+    second of the provider's own eval_duration, i.e. how fast one stream
+    generates) and generated tokens per wall-clock second (how much the
+    fleet produced). Only provider-reported durations count towards decode
+    speed; estimated usages still count towards the totals.
+    """
+
+    name = "llm_tokens"
+
+    _TOTALS = ("requests", "estimated_requests", "prompt_tokens",
+               "completion_tokens", "prompt_eval_duration", "eval_duration")
+
+    def __init__(self, window: float = 60.0, clock=time.monotonic):
+        self.window = window
+        self._clock = clock
+        self._totals: Dict[str, Dict[str, float]] = {}
+        # (time, model, completion tokens, eval seconds) within the window
+        self._recent: Deque[Tuple[float, str, int, float]] = deque()
+        self._lock = threading.Lock()
+
+    def record(self, usage) -> None:
+        model = usage.model or "unknown"
+        now = self._clock()
+        with self._lock:
+            totals = self._totals.get(model)
+            if totals is None:
+                totals = self._totals[model] = dict.fromkeys(self._TOTALS, 0)
+            totals["requests"] += 1
+            totals["estimated_requests"] += bool(usage.estimated)
+            totals["prompt_tokens"] += usage.prompt_tokens
+            totals["completion_tokens"] += usage.completion_tokens
+            totals["prompt_eval_duration"] += usage.prompt_eval_duration or 0.0
+            totals["eval_duration"] += usage.eval_duration or 0.0
+            self._recent.append(
+                (now, model, usage.completion_tokens, usage.eval_duration or 0.0))
+            self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        while self._recent and self._recent[0][0] < now - self.window:
+            self._recent.popleft()
+
+    def _rates(self) -> Dict[str, Tuple[float, float]]:
+        """{model: (decode tokens/sec, generated tokens/sec)} over the window"""
+        with self._lock:
+            self._prune(self._clock())
+            recent = list(self._recent)
+        tokens: Dict[str, List[float]] = {}
+        for _, model, completion, eval_seconds in recent:
+            sums = tokens.setdefault(model, [0, 0, 0.0])
+            sums[0] += completion
+            if eval_seconds:
+                sums[1] += completion
+                sums[2] += eval_seconds
+        return {
+            model: (timed / eval_seconds if eval_seconds else 0.0, total / self.window)
+            for model, (total, timed, eval_seconds) in tokens.items()
+        }
+
+    def tokens_per_second(self, model: Optional[str] = None) -> float:
+        """Decode speed over the window, for model or across all models"""
+        with self._lock:
+            self._prune(self._clock())
+            recent = [r for r in self._recent if r[3] and model in (None, r[1])]
+        eval_seconds = sum(r[3] for r in recent)
+        return sum(r[2] for r in recent) / eval_seconds if eval_seconds else 0.0
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Totals and rolling rates per model"""
+        rates = self._rates()
+        with self._lock:
+            totals = {model: dict(values) for model, values in self._totals.items()}
+        for model, values in totals.items():
+            decode, generated = rates.get(model, (0.0, 0.0))
+            values["decode_tokens_per_second"] = decode
+            values["generated_tokens_per_second"] = generated
+        return totals
+
+    def render(self) -> List[str]:
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP llm_tokens_total Tokens processed by the model, by model and type",
+            "# TYPE llm_tokens_total counter",
+        ]
+        for model, values in sorted(snapshot.items()):
+            for kind in ("prompt", "completion"):
+                labels = _format_labels([("model", model), ("type", kind)])
+                lines.append(f"llm_tokens_total{labels} {_format_value(values[f'{kind}_tokens'])}")
+        for name, key, documentation in (
+            ("llm_decode_tokens_per_second", "decode_tokens_per_second",
+             f"Completion tokens per second of model decode time, last {self.window:g}s"),
+            ("llm_generated_tokens_per_second", "generated_tokens_per_second",
+             f"Completion tokens generated per second, last {self.window:g}s"),
+        ):
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            for model, values in sorted(snapshot.items()):
+                labels = _format_labels([("model", model)])
+                lines.append(f"{name}{labels} {_format_value(values[key])}")
+        return lines
+
+
+class _SpanWriter:
+    """Appends export lines to a file from a background thread"""
+
+    def __init__(self, path: str, max_pending: int = 10000):
+        self.path = path
+        self.dropped = 0
+        self._closed = False
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="span-export", daemon=True)
+        self._thread.start()
+
+    def write(self, line: str) -> None:
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            # Shed spans rather than block the request being traced
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write every pending line, then stop"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        file = None
+        try:
+            while True:
+                lines = [self._queue.get()]
+                # Everything already waiting goes out in the same write
+                while True:
+                    try:
+                        lines.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in lines
+                lines = [line for line in lines if line is not None]
+                if lines:
+                    try:
+                        if file is None:
+                            file = open(self.path, "a", encoding="utf-8")
+                        file.write("".join(line + "\n" for line in lines))
+                        file.flush()
+                    except OSError as e:
+                        logger.warning("Span export to %s failed: %s", self.path, e)
+                if stop:
+                    return
+        finally:
+            if file is not None:
+                file.close()
+
+
+class Telemetry:
+    """
+    Metrics registry and tracer for one process.
+
+    The standard pipeline metrics are attributes: stage_seconds, llm_requests,
+    cache_requests, retries, validation_failures, the tokens TokenMeter and
+    the GenerationScheduler's queue_depth, active_requests, queue_wait and
+    rejections. Further metrics can be added with counter(), gauge() and
+    histogram().
+
+    Args:
+        span_file: Append finished spans here as OTLP/JSON lines (None = off)
+        service_name: service.name resource attribute of exported spans
+        token_window: Seconds over which tokens/sec rates are computed
+    """
+
+    def __init__(
+        self,
+        span_file: Optional[str] = None,
+        service_name: str = SERVICE_NAME,
+        token_window: float = 60.0,
+    ):
+        self.span_file = span_file or None
+        self.service_name = service_name
+        self._metrics: Dict[str, Any] = {}
+        self._writer: Optional[_SpanWriter] = None
+        self._writer_lock = threading.Lock()
+
+        self.stage_seconds = self.histogram(
+            "stage_duration_seconds", "Time spent in each pipeline stage", ["stage"])
+        self.llm_requests = self.counter(
+            "llm_requests_total", "Model calls by provider and outcome",
+            ["provider", "outcome"])
+        self.cache_requests = self.counter(
+            "llm_cache_requests_total",
+            "Generation lookups answered by the response cache (hit), a shared "
+            "in-flight call (coalesced) or the model (miss)", ["result"])
+        self.retries = self.counter(
+            "llm_retries_total", "Extra model calls made to recover a request",
+            ["reason"])
+        self.validation_failures = self.counter(
+            "validation_failures_total",
+            "Generations that failed validation, by first error type", ["error_type"])
+        self.tokens = self._register(TokenMeter(token_window))
+        self.queue_depth = self.gauge(
+            "scheduler_queue_depth", "Generations waiting for a model slot",
+            ["priority"])
+        self.active_requests = self.gauge(
+            "scheduler_active_requests", "Generations holding a model slot",
+            ["priority"])
+        self.queue_wait = self.histogram(
+            "scheduler_wait_seconds", "Time generations waited for a model slot",
+            ["priority"])
+        self.rejections = self.counter(
+            "scheduler_rejections_total",
+            "Generations turned away by admission control (queue_full, timeout)",
+            ["priority", "reason"])
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render_prometheus(self) -> str:
+        """Every metric in the Prometheus text exposition format (0.0.4)"""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    @contextmanager
+    def span(self, stage: str, **attributes) -> Iterator[Span]:
+        """
+        Time the enclosed block as a span named stage.
+
+        The span is a child of the span active in this thread or task, and
+        its duration is observed in stage_seconds. An exception marks the
+        span as failed and propagates.
+        """
+        parent = _current_span.get()
+        span = Span(
+            stage,
+            parent.trace_id if parent is not None else os.urandom(16).hex(),
+            parent.span_id if parent is not None else "",
+            time.time_ns(),
+            attributes,
+        )
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            elapsed = time.perf_counter() - started
+            span.end_ns = span.start_ns + int(elapsed * 1e9)
+            self.stage_seconds.observe(elapsed, stage=stage)
+            self._export(span)
+
+    def record(self, stage: str, seconds: float, **attributes) -> None:
+        """
+        Report a stage timed elsewhere (e.g. by the model server) as ending
+        now; it is observed and exported like a span.
+        """
+        self.stage_seconds.observe(seconds, stage=stage)
+        if self.span_file is None:
+            return
+        parent = _current_span.get()
+        end_ns = time.time_ns()
+        span = Span(
+            stage,
+            parent.trace_id if parent is not None else os.urandom(16).hex(),
+            parent.span_id if parent is not None else "",
+            end_ns - int(seconds * 1e9),
+            attributes,
+        )
+        span.end_ns = end_ns
+        self._export(span)
+
+    def record_usage(self, usage) -> None:
+        """Add a TokenUsage to the token totals and record its server-timed stages"""
+        self.tokens.record(usage)
+        for key, stage in USAGE_STAGES.items():
+            seconds = getattr(usage, key)
+            if seconds:
+                self.record(stage, seconds, model=usage.model)
+
+    def _export(self, span: Span) -> None:
+        if self.span_file is None:
+            return
+        line = json.dumps({"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [span.to_otlp()],
+            }],
+        }]})
+        writer = self._writer
+        if writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = _SpanWriter(self.span_file)
+                    atexit.register(self._writer.close)
+                writer = self._writer
+        writer.write(line)
+
+    def close(self) -> None:
+        """Write out pending spans and close the span file"""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+
+
+_telemetry: Optional[Telemetry] = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry() -> Telemetry:
+    """The process-wide Telemetry, created on first use from TRACE_SPAN_FILE"""
+    global _telemetry
+    if _telemetry is None:
+        with _telemetry_lock:
+            if _telemetry is None:
+                from .environment_variables import get_environment_config
+
+                _telemetry = Telemetry(get_environment_config().TRACE_SPAN_FILE)
+    return _telemetry
+
+
+def set_telemetry(telemetry: Optional[Telemetry]) -> Optional[Telemetry]:
+    """Replace the process-wide Telemetry (None: recreate on next use); returns the old one"""
+    global _telemetry
+    with _telemetry_lock:
+        previous, _telemetry = _telemetry, telemetry
+    return previous
@@ -2,16 +2,23 @@
 class OllamaCallError(Exception):
     """Exception raised when Ollama call fails after retries."""
 
-    def __init__(self, message: str, user_message: str | None = None):
+    def __init__(
+        self,
+        message: str,
+        user_message: str | None = None,
+        breaker_state: dict | None = None,
+    ):
         """
         Initialize OllamaCallError.
 
         Args:
             message: Technical error message for developers
             user_message: User-friendly error message (defaults to generic message)
+            breaker_state: Circuit breaker snapshot at the time of failure
         """
         super().__init__(message)
         self._dev_message = message
+        self._breaker_state = breaker_state or {}
         self._user_message = user_message or (
             "Unable to process your request. Please try again later."
         )
@@ -25,3 +32,13 @@ class OllamaCallError(Exception):
     def dev_message(self) -> str:
         """Get the developer/technical error message."""
         return self._dev_message
+
+    @property
+    def breaker_state(self) -> dict:
+        """Get the circuit breaker snapshot (name, state, failures)."""
+        return self._breaker_state
+
+    @property
+    def circuit_open(self) -> bool:
+        """Whether the call was rejected because the circuit is open."""
+        return self._breaker_state.get("state") == "open"
@@ -1,6 +1,7 @@
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Iterator, Mapping, Optional
 
 
 @dataclass
@@ -11,28 +12,95 @@ class TokenUsage:
     prompt_tokens: int = 0
     completion_tokens: int = 0
     total_cost: float = 0.0
+    # Seconds the provider spent loading the model, evaluating the prompt
+    # (prefill) and generating the completion (decode); None if not reported
+    load_duration: Optional[float] = None
+    prompt_eval_duration: Optional[float] = None
+    eval_duration: Optional[float] = None
+    model: str = ""
+    # True if the counts were estimated locally, not reported by the provider
+    estimated: bool = False
+
+    def __post_init__(self):
+        if not self.total_tokens:
+            self.total_tokens = self.prompt_tokens + self.completion_tokens
+
+    @classmethod
+    def from_ollama(cls, metadata: Mapping[str, Any], model: str = "") -> "TokenUsage":
+        """
+        Usage reported by Ollama.
+
+        Args:
+            metadata: A chat/generate response, the final streamed chunk or
+                LangChain's generation_info; counts are *_count fields and
+                durations are in nanoseconds
+            model: Model name, if metadata does not carry one
+        """
+        def seconds(key: str) -> Optional[float]:
+            value = metadata.get(key)
+            return value / 1e9 if value is not None else None
+
+        return cls(
+            prompt_tokens=metadata.get("prompt_eval_count") or 0,
+            completion_tokens=metadata.get("eval_count") or 0,
+            load_duration=seconds("load_duration"),
+            prompt_eval_duration=seconds("prompt_eval_duration"),
+            eval_duration=seconds("eval_duration"),
+            model=metadata.get("model") or model,
+        )
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Decode speed: completion tokens per second of generation"""
+        if not self.eval_duration:
+            return 0.0
+        return self.completion_tokens / self.eval_duration
+
+    @property
+    def prompt_tokens_per_second(self) -> float:
+        """Prefill speed: prompt tokens per second of prompt evaluation"""
+        if not self.prompt_eval_duration:
+            return 0.0
+        return self.prompt_tokens / self.prompt_eval_duration
 
     def __str__(self) -> str:
         """String representation of token usage."""
-        return (
-            f"Tokens used: {self.total_tokens}\n"
+        text = (
+            f"Tokens used: {self.total_tokens}"
+            f"{' (estimated)' if self.estimated else ''}\n"
             f"Prompt tokens: {self.prompt_tokens}\n"
             f"Completion tokens: {self.completion_tokens}\n"
             f"Total cost: ${self.total_cost:.4f}"
         )
+        if self.eval_duration:
+            text += f"\nTokens/sec: {self.tokens_per_second:.1f}"
+        return text
+
+
+@dataclass
+class StreamChunk:
+    """A piece of a streamed LLM response."""
+
+    text: str = ""
+    done: bool = False
+    # Only set on the final chunk (done=True)
+    response: str = ""
+    token_usage: Optional[TokenUsage] = None
+    time_to_first_token: float = 0.0
+    tokens_per_second: float = 0.0
 
 
 class LLMModelBase(ABC):
     """Abstract base class for Language Model implementations."""
 
     @abstractmethod
-    def safe_call(self, prompt: str, max_retries: int = 3) -> str:
+    def safe_call(self, prompt: str, max_retries: Optional[int] = None) -> str:
         """
         Execute an LLM call with retry logic.
 
         Args:
             prompt: The prompt to send to the LLM
-            max_retries: Maximum number of retry attempts
+            max_retries: Maximum number of retry attempts (None = implementation default)
 
         Raises:
             Exception: Implementation-specific exceptions for call failures
@@ -51,7 +119,7 @@ class LLMModelBase(ABC):
 
     @abstractmethod
     def safe_call_with_tokens(
-        self, prompt: str, max_retries: int = 3
+        self, prompt: str, max_retries: Optional[int] = None
     ) -> tuple[str, TokenUsage]:
         """
         Execute an LLM call with retry logic and token tracking.
@@ -68,6 +136,43 @@ class LLMModelBase(ABC):
 
         Note:
             Each implementation must provide its own token tracking mechanism
-            appropriate for the LLM provider (OpenAI, Ollama, etc.)
+            appropriate for the LLM provider (OpenAI, Ollama, etc.): counts
+            and durations reported by the provider where it returns them,
+            else a local estimate with estimated=True
         """
         pass
+
+    def safe_stream(
+        self, prompt: str, max_retries: Optional[int] = None
+    ) -> Iterator[StreamChunk]:
+        """
+        Stream an LLM response chunk by chunk.
+
+        Yields StreamChunk(text=<delta>) as text arrives, then a final
+        StreamChunk(done=True) carrying the full response, token usage,
+        time-to-first-token and tokens/sec.
+
+        The default implementation does not stream: it yields the whole
+        safe_call_with_tokens() response as a single chunk. Providers that
+        support streaming should override it.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            max_retries: Maximum number of retry attempts
+
+        Raises:
+            Exception: Implementation-specific exceptions for call failures
+        """
+        start = time.time()
+        response, token_usage = self.safe_call_with_tokens(prompt, max_retries)
+        elapsed = time.time() - start
+
+        yield StreamChunk(text=response)
+        yield StreamChunk(
+            done=True,
+            response=response,
+            token_usage=token_usage,
+            time_to_first_token=elapsed,
+            tokens_per_second=token_usage.tokens_per_second or (
+                token_usage.completion_tokens / elapsed if elapsed else 0.0),
+        )
@@ -1,15 +1,29 @@
-import re
-from langchain_ollama import OllamaLLM
+import itertools
+import time
+from dataclasses import replace
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, Optional, Tuple, TypeVar
 
-from src.shared.infrastructure import ENVIRONMENT_CONFIG
-from .llm_model_base import LLMModelBase, TokenUsage
+from src.shared.infrastructure import get_environment_config, get_telemetry
+from .llm_model_base import LLMModelBase, StreamChunk, TokenUsage
 from .llm_exeptions import OllamaCallError
+from .retry_policy import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    get_circuit_breaker,
+)
+from .token_counter import get_token_counter
+
+if TYPE_CHECKING:
+    from langchain_ollama import OllamaLLM
 
 
 def estimate_tokens(text: str) -> int:
     """
-    Estimate token count for text using word-based approximation.
-    Approximately 1.3 tokens per word on average.
+    Count tokens for text with the process-wide TokenCounter.
+
+    Falls back to the word-based approximation (~1.3 tokens per word) unless
+    a real tokenizer was installed with set_token_counter().
 
     Args:
         text: The text to estimate tokens for
@@ -17,25 +31,67 @@ def estimate_tokens(text: str) -> int:
     Returns:
         Estimated number of tokens
     """
-    # Remove extra whitespace and normalize
-    text = re.sub(r'\s+', ' ', text).strip()
-    # Split by whitespace and count words
-    words = text.split()
-    # Estimate: ~1.3 tokens per word (common approximation)
-    estimated_tokens = max(1, int(len(words) * 1.3))
-    return estimated_tokens
+    return max(1, get_token_counter().count(text))
+
+
+T = TypeVar("T")
 
 
 class OllamaQwen3vl4b(LLMModelBase):
     """Qwen3-VL:4B model implementation using Ollama."""
 
-    def __init__(self):
-        self.llm = OllamaLLM(
-            model=ENVIRONMENT_CONFIG.OLLAMA_SERVICE_MODEL_QWEN3VL4B,
-            base_url=ENVIRONMENT_CONFIG.OLLAMA_SERVICE_HOST
+    def __init__(
+        self,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        load_balancer=None,
+    ):
+        """
+        Args:
+            retry_policy: Backoff policy for failed calls (defaults from config)
+            circuit_breaker: Breaker guarding the Ollama service; defaults to
+                the process-wide breaker for the configured host(s), so every
+                instance fails fast together while the service is down
+            load_balancer: Routes calls across several Ollama endpoints
+                (an OllamaLoadBalancer from src.llm.load_balancer, or anything
+                with its urls and acquire()); None sends every call to the
+                first of OLLAMA-SERVICE-HOSTS. A retried call goes to another
+                endpoint when one is free.
+        """
+        # langchain is only imported once a model is actually created
+        from langchain_ollama import OllamaLLM
+
+        config = get_environment_config()
+        hosts = config.ollama_hosts
+        self.load_balancer = load_balancer
+        if load_balancer is not None:
+            hosts = load_balancer.urls
+
+        model = config.OLLAMA_SERVICE_MODEL_QWEN3VL4B
+        keep_alive = config.model_keep_alive(model)
+        self.model = model
+        self._llms = {
+            host: OllamaLLM(
+                model=model,
+                base_url=host,
+                keep_alive=keep_alive,
+            )
+            for host in hosts
+        }
+        self.llm = self._llms[hosts[0]]
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_attempts=config.MAX_RETRIES,
+            base_delay=config.RETRY_BASE_DELAY,
+            max_delay=config.RETRY_MAX_DELAY,
+            deadline=config.RETRY_DEADLINE,
+        )
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker(
+            ",".join(hosts),
+            failure_threshold=config.CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=config.CIRCUIT_RECOVERY_TIMEOUT,
         )
 
-    def get_llm(self) -> OllamaLLM:
+    def get_llm(self) -> "OllamaLLM":
         """
         Get the underlying OllamaLLM instance.
 
@@ -44,49 +100,139 @@ class OllamaQwen3vl4b(LLMModelBase):
         """
         return self.llm
 
-    def safe_call(self, prompt: str, max_retries: int = 3) -> str:
+    def _invoke(self, prompt: str) -> str:
+        if self.load_balancer is None:
+            return self.llm.invoke(prompt)
+        with self.load_balancer.acquire() as endpoint:
+            return self._llms[endpoint.url].invoke(prompt)
+
+    def _generate(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        """Response text and Ollama's generation_info (counts, ns durations)"""
+        def run(llm) -> Tuple[str, Dict[str, Any]]:
+            generation = llm.generate([prompt]).generations[0][0]
+            return generation.text, generation.generation_info or {}
+
+        if self.load_balancer is None:
+            return run(self.llm)
+        with self.load_balancer.acquire() as endpoint:
+            return run(self._llms[endpoint.url])
+
+    def _stream(self, prompt: str) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """(text delta, generation_info) pairs"""
+        if self.load_balancer is None:
+            yield from self._stream_chunks(self.llm, prompt)
+            return
+        # The endpoint stays busy until the stream is exhausted or closed
+        with self.load_balancer.acquire() as endpoint:
+            yield from self._stream_chunks(self._llms[endpoint.url], prompt)
+
+    @staticmethod
+    def _stream_chunks(llm, prompt: str) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        # stream() yields bare text; the generation it reports to callbacks
+        # when the stream ends carries Ollama's counts and durations
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        class UsageHandler(BaseCallbackHandler):
+            generation_info: Optional[Dict[str, Any]] = None
+
+            def on_llm_end(self, response, **kwargs) -> None:
+                generations = response.generations
+                if generations and generations[0]:
+                    self.generation_info = generations[0][0].generation_info
+
+        handler = UsageHandler()
+        for text in llm.stream(prompt, config={"callbacks": [handler]}):
+            yield text, None
+        yield "", handler.generation_info
+
+    def _token_usage(
+        self, prompt: str, response: str, metadata: Optional[Dict[str, Any]]
+    ) -> TokenUsage:
+        """
+        Usage reported by Ollama, else estimated from the texts; either way
+        added to the process-wide token totals.
+        """
+        if metadata and metadata.get("eval_count") is not None:
+            usage = TokenUsage.from_ollama(metadata, self.model)
+        else:
+            usage = TokenUsage(
+                prompt_tokens=estimate_tokens(prompt),
+                completion_tokens=estimate_tokens(response),
+                total_cost=0.0,  # Ollama runs locally, no cost
+                model=self.model,
+                estimated=True,
+            )
+        get_telemetry().record_usage(usage)
+        return usage
+
+    def _call_with_retries(
+        self, fn: Callable[[], T], max_retries: Optional[int]
+    ) -> T:
+        """
+        Run fn under the retry policy and circuit breaker.
+
+        Raises:
+            OllamaCallError: With the breaker state, if the circuit is open or
+                the call still fails after retrying
+        """
+        policy = self.retry_policy
+        if max_retries is not None:
+            policy = replace(policy, max_attempts=max_retries)
+
+        attempts = [1]
+
+        def count_retry(attempt, error, delay):
+            attempts[0] += 1
+            get_telemetry().retries.inc(reason="transient_error")
+
+        try:
+            return policy.call(fn, breaker=self.circuit_breaker, on_retry=count_retry)
+        except CircuitOpenError as e:
+            raise OllamaCallError(
+                message=f"Ollama circuit breaker is open. {e}",
+                user_message=get_environment_config().MAX_RETRIES_USER_MSG,
+                breaker_state=self.circuit_breaker.snapshot(),
+            ) from e
+        except Exception as e:
+            dev_message = (
+                f"{get_environment_config().MAX_RETRIES_DEV_MSG}"
+                f"{attempts[0]}. Last error: {str(e)}"
+            )
+            raise OllamaCallError(
+                message=dev_message,
+                user_message=get_environment_config().MAX_RETRIES_USER_MSG,
+                breaker_state=self.circuit_breaker.snapshot(),
+            ) from e
+
+    def safe_call(self, prompt: str, max_retries: Optional[int] = None) -> str:
         """
         Execute an LLM call with retry logic.
 
+        Retryable failures (connection errors, timeouts, 429/5xx) are retried
+        with exponential backoff and jitter within the policy's deadline;
+        while the shared circuit breaker is open the call fails immediately.
+
         Args:
             prompt: The prompt to send to the LLM
-            max_retries: Maximum number of retry attempts (default from config if not provided)
+            max_retries: Maximum number of attempts (default from config if not provided)
 
         Returns:
             The LLM response as a string
 
         Raises:
-            OllamaCallError: If all retry attempts fail
+            OllamaCallError: If all retry attempts fail or the circuit is open
         """
-        # Use provided max_retries or fall back to config value
-        if max_retries == 3:
-            max_retries = ENVIRONMENT_CONFIG.MAX_RETRIES
-
-        for attempt in range(max_retries):
-            try:
-                response = self.llm.invoke(prompt)
-                return response
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    continue
-                else:
-                    dev_message = (
-                        f"{ENVIRONMENT_CONFIG.MAX_RETRIES_DEV_MSG}"
-                        f"{max_retries}. Last error: {str(e)}"
-                    )
-                    user_message = ENVIRONMENT_CONFIG.MAX_RETRIES_USER_MSG
-                    raise OllamaCallError(
-                        message=dev_message,
-                        user_message=user_message,
-                    ) from e
+        return self._call_with_retries(lambda: self._invoke(prompt), max_retries)
 
     def safe_call_with_tokens(
-        self, prompt: str, max_retries: int = 3
+        self, prompt: str, max_retries: Optional[int] = None
     ) -> tuple[str, TokenUsage]:
         """
         Execute an LLM call with retry logic and token usage tracking.
 
-        Estimates tokens based on word count approximation (~1.3 tokens per word).
+        Token counts and load/prefill/decode durations are the ones Ollama
+        reports for the call; if a response lacks them, counts are estimated
+        with estimate_tokens() and the usage is marked estimated.
 
         Args:
             prompt: The prompt to send to the LLM
@@ -98,20 +244,76 @@ class OllamaQwen3vl4b(LLMModelBase):
         Raises:
             OllamaCallError: If all retry attempts fail
         """
-        # Get the response using safe_call
-        response = self.safe_call(prompt, max_retries)
-
-        # Estimate tokens for prompt and response
-        prompt_tokens = estimate_tokens(prompt)
-        completion_tokens = estimate_tokens(response)
-        total_tokens = prompt_tokens + completion_tokens
-
-        # Create TokenUsage object
-        token_usage = TokenUsage(
-            total_tokens=total_tokens,
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
-            total_cost=0.0,  # Ollama runs locally, no cost
-        )
+        response, metadata = self._call_with_retries(
+            lambda: self._generate(prompt), max_retries)
+        return response, self._token_usage(prompt, response, metadata)
 
-        return response, token_usage
+    def safe_stream(
+        self, prompt: str, max_retries: Optional[int] = None
+    ) -> Iterator[StreamChunk]:
+        """
+        Stream the LLM response with retry logic.
+
+        Opening the stream and receiving the first chunk is retried like
+        safe_call; once text has been yielded a failure is raised immediately,
+        since the caller has already consumed part of the response.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            max_retries: Maximum number of retry attempts
+
+        Yields:
+            StreamChunk deltas, then a final StreamChunk(done=True) with the
+            full response, token usage (reported by Ollama's final chunk,
+            else estimated), time-to-first-token and tokens/sec
+
+        Raises:
+            OllamaCallError: If all retry attempts fail or the stream breaks
+        """
+        start = time.time()
+
+        def open_stream():
+            stream = self._stream(prompt)
+            return stream, next(stream, None)
+
+        stream, first = self._call_with_retries(open_stream, max_retries)
+        first_token_at = None
+        parts = []
+        metadata = None
+
+        try:
+            for item in itertools.chain([first], stream):
+                if item is None:
+                    continue
+                delta, info = item
+                if info and info.get("eval_count") is not None:
+                    metadata = info
+                if not delta:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.time()
+                parts.append(delta)
+                yield StreamChunk(text=delta)
+        except Exception as e:
+            raise OllamaCallError(
+                message=f"Ollama stream failed after {len(parts)} chunks: {str(e)}",
+                user_message=get_environment_config().MAX_RETRIES_USER_MSG,
+                breaker_state=self.circuit_breaker.snapshot(),
+            ) from e
+
+        end = time.time()
+        response = "".join(parts)
+        token_usage = self._token_usage(prompt, response, metadata)
+        # Prefer Ollama's own decode time, else measure from the first token
+        decode_seconds = token_usage.eval_duration or (
+            end - first_token_at if first_token_at else 0.0)
+
+        yield StreamChunk(
+            done=True,
+            response=response,
+            token_usage=token_usage,
+            time_to_first_token=(first_token_at or end) - start,
+            tokens_per_second=(
+                token_usage.completion_tokens / decode_seconds
+                if decode_seconds else 0.0),
+        )
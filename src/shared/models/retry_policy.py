@@ -0,0 +1,224 @@
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: rate limited or temporarily unavailable
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def _default_retryable_errors() -> Tuple[Type[BaseException], ...]:
+    errors: Tuple[Type[BaseException], ...] = (ConnectionError, TimeoutError)
+    try:
+        import httpx
+        errors += (httpx.TransportError,)
+    except ImportError:
+        pass
+    return errors
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the service while the circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(
+            f"Circuit '{name}' is open; retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker shared by every caller of one service.
+
+    closed: calls go through; consecutive failures are counted.
+    open: after failure_threshold failures, calls fail fast for
+        recovery_timeout seconds.
+    half_open: then a limited number of trial calls are let through; a
+        success closes the circuit, a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str = "default",
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if (self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= self.recovery_timeout):
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    def before_call(self) -> None:
+        """
+        Reserve permission to call the service.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with all
+                trial calls already in flight
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return
+            retry_after = max(
+                0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+            raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def release(self) -> None:
+        """Give back a reserved call that ended without a verdict (e.g. cancelled)"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            state = self._current_state()
+            self._failures += 1
+            if state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, object]:
+        """State and failure count, for errors and metrics"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self._current_state(),
+                "failures": self._failures,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Process-wide breaker for name (e.g. a service URL), created on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **kwargs)
+        return breaker
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter and an overall deadline.
+
+    Attempt n (0-based) waits a random time in
+    [0, min(max_delay, base_delay * multiplier ** n)] before the next try.
+    Only errors matched by is_retryable() are retried.
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    multiplier: float = 2.0
+    deadline: Optional[float] = 60.0  # seconds for all attempts; None = no limit
+    retryable_errors: Tuple[Type[BaseException], ...] = field(
+        default_factory=_default_retryable_errors)
+
+    def is_retryable(self, error: BaseException) -> bool:
+        if isinstance(error, CircuitOpenError):
+            return False
+        if isinstance(error, self.retryable_errors):
+            return True
+        status_code = getattr(error, "status_code", None)
+        return status_code in RETRYABLE_STATUS_CODES
+
+    def backoff(self, attempt: int) -> float:
+        """Jittered delay after the given failed attempt (0-based)"""
+        ceiling = min(self.max_delay, self.base_delay * self.multiplier ** attempt)
+        return random.uniform(0, ceiling)
+
+    def call(
+        self,
+        fn: Callable[[], T],
+        breaker: Optional[CircuitBreaker] = None,
+        on_retry: Optional[Callable[[int, BaseException, float], None]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> T:
+        """
+        Call fn, retrying retryable failures.
+
+        Args:
+            fn: Zero-argument callable to run
+            breaker: Optional circuit breaker guarding the service
+            on_retry: Called with (attempt, error, delay) before each retry
+
+        Raises:
+            CircuitOpenError: If the breaker rejects the call
+            Exception: The last error once it is not retryable, attempts are
+                exhausted or the next wait would pass the deadline
+        """
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.before_call()
+            try:
+                result = fn()
+            except Exception as e:
+                retryable = self.is_retryable(e)
+                if breaker is not None:
+                    # A non-retryable error still means the service answered
+                    if retryable:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                if not retryable or attempt + 1 >= self.max_attempts:
+                    raise
+                delay = self.backoff(attempt)
+                if (self.deadline is not None
+                        and time.monotonic() - start + delay > self.deadline):
+                    raise
+                if on_retry is not None:
+                    on_retry(attempt, e, delay)
+                sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # KeyboardInterrupt, CancelledError...: says nothing about the
+                # service, but a half-open probe slot must not leak
+                if breaker is not None:
+                    breaker.release()
+                raise
+
+            if breaker is not None:
+                breaker.record_success()
+            return result
@@ -0,0 +1,113 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+def heuristic_token_count(text: str) -> int:
+    """
+    Estimate token count for text using word-based approximation.
+    Approximately 1.3 tokens per word on average.
+
+    Args:
+        text: The text to estimate tokens for
+
+    Returns:
+        Estimated number of tokens
+    """
+    # Remove extra whitespace and normalize
+    text = re.sub(r'\s+', ' ', text).strip()
+    # Split by whitespace and count words
+    words = text.split()
+    # Estimate: ~1.3 tokens per word (common approximation)
+    estimated_tokens = max(1, int(len(words) * 1.3))
+    return estimated_tokens
+
+
+class TokenCounter:
+    """
+    Count tokens with a pluggable tokenizer, caching results per text hash.
+
+    Prompts are mostly built from the same few pieces (system prompt,
+    few-shot sections), so repeated counts are served from an LRU cache
+    keyed on a digest of the text instead of re-tokenizing.
+    """
+
+    def __init__(
+        self,
+        tokenize: Optional[Callable[[str], int]] = None,
+        cache_size: int = 4096,
+        name: str = "heuristic",
+    ):
+        """
+        Args:
+            tokenize: Function returning the token count of a string
+                (defaults to heuristic_token_count)
+            cache_size: Maximum number of cached counts
+            name: Label of the tokenizer, for logs and metrics
+        """
+        self.tokenize = tokenize or heuristic_token_count
+        self.cache_size = cache_size
+        self.name = name
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, text: str) -> int:
+        """Number of tokens in text"""
+        if not text:
+            return 0
+
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        tokens = self.tokenize(text)
+
+        with self._lock:
+            self._cache[key] = tokens
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    @classmethod
+    def from_huggingface(cls, name: str, **kwargs) -> "TokenCounter":
+        """
+        Counter backed by a Hugging Face tokenizer (requires `tokenizers`).
+
+        Args:
+            name: Tokenizer repo id, e.g. "Qwen/Qwen3-4B"
+        """
+        from tokenizers import Tokenizer
+
+        tokenizer = Tokenizer.from_pretrained(name)
+        return cls(
+            lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids),
+            name=name,
+            **kwargs,
+        )
+
+    @classmethod
+    def from_tiktoken(cls, model: str, **kwargs) -> "TokenCounter":
+        """Counter backed by tiktoken for OpenAI models (requires `tiktoken`)"""
+        import tiktoken
+
+        encoding = tiktoken.encoding_for_model(model)
+        return cls(lambda text: len(encoding.encode(text)), name=model, **kwargs)
+
+
+_default_counter = TokenCounter()
+
+
+def get_token_counter() -> TokenCounter:
+    """Process-wide default token counter"""
+    return _default_counter
+
+
+def set_token_counter(counter: TokenCounter) -> None:
+    """Replace the process-wide default token counter"""
+    global _default_counter
+    _default_counter = counter
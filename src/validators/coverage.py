@@ -0,0 +1,226 @@
+# src/validators/coverage.py
+"""
+Deterministic coverage metrics for generated test suites (no model calls).
+
+For every suite (the test cases generated for one story) this scores:
+- scenario coverage: positive, negative and edge cases, by keywords
+- priority distribution: counts, distinct priorities and normalized entropy
+- near-duplicates: test cases whose word-shingle sets have a Jaccard
+  similarity of at least duplicate_threshold
+
+Pure Python, so it runs wherever the validators do. Shingles are hashed to
+32-bit ints (each distinct word once per analyze_many call) and compared
+as frozensets; suites are small, so exact pairwise Jaccard within each
+suite is cheaper than MinHash and tens of thousands of suites score in
+seconds.
+"""
+import math
+import re
+import zlib
+from collections import Counter
+from itertools import combinations
+from typing import Dict, FrozenSet, List, Sequence
+
+PRIORITIES = ("critical", "high", "medium", "low")
+SCENARIO_KINDS = ("positive", "negative", "edge")
+
+NEGATIVE_WORDS = frozenset(
+    "error errors fail fails failed failure invalid incorrect wrong reject "
+    "rejected denied deny unauthorized expired missing cannot not".split()
+)
+EDGE_WORDS = frozenset(
+    "edge boundary limit maximum minimum max min empty zero long special "
+    "concurrent duplicate timeout large exceeds".split()
+)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_MAX_HASH = (1 << 32) - 1
+_SHINGLE_BASE = 1_000_003
+
+
+def _case_words(test_case: dict) -> List[str]:
+    text = " ".join(
+        str(test_case.get(field, ""))
+        for field in ("title", "given", "when", "then"))
+    return _WORD_RE.findall(text.lower())
+
+
+def _classify_words(words: List[str]) -> str:
+    present = set(words)
+    if present & NEGATIVE_WORDS:
+        return "negative"
+    if present & EDGE_WORDS:
+        return "edge"
+    return "positive"
+
+
+def classify_scenario(test_case: dict) -> str:
+    """'negative', 'edge' or 'positive', from the words in the test case"""
+    return _classify_words(_case_words(test_case))
+
+
+class CoverageAnalyzer:
+    """
+    Score test suites for scenario coverage, priority spread and duplicates.
+
+    analyze(test_cases) scores one suite; analyze_many(suites) scores many
+    with the word hashing shared across all of them. Results are
+    deterministic and JSON-serializable.
+
+    coverage_score (0-1) weights scenario coverage 0.5, priority spread 0.3
+    and meeting min_count 0.2, scaled down by the share of near-duplicates.
+    """
+
+    def __init__(
+        self,
+        min_count: int = 3,
+        shingle_size: int = 3,
+        duplicate_threshold: float = 0.8,
+    ):
+        self.min_count = min_count
+        self.shingle_size = shingle_size
+        self.duplicate_threshold = duplicate_threshold
+
+    def analyze(self, test_cases: Sequence[dict]) -> dict:
+        """Coverage metrics for one suite"""
+        return self.analyze_many([test_cases])[0]
+
+    def analyze_many(self, suites: Sequence[Sequence[dict]]) -> List[dict]:
+        """Coverage metrics for many suites, one dict per suite, in order"""
+        words = [_case_words(case) for suite in suites for case in suite]
+        duplicates = self._duplicates(suites, self.shingle_sets(words))
+
+        results = []
+        offset = 0
+        for suite, duplicate_pairs in zip(suites, duplicates):
+            kinds = [_classify_words(w) for w in words[offset:offset + len(suite)]]
+            results.append(self._suite_metrics(suite, kinds, duplicate_pairs))
+            offset += len(suite)
+        return results
+
+    def shingle_sets(self, documents: Sequence[List[str]]) -> List[FrozenSet[int]]:
+        """32-bit hashes of each document's word shingles (empty if no words)"""
+        word_hashes: Dict[str, int] = {}
+        size = self.shingle_size
+        results = []
+        for words in documents:
+            tokens = []
+            for word in words:
+                token = word_hashes.get(word)
+                if token is None:
+                    token = word_hashes[word] = zlib.crc32(word.encode("utf-8"))
+                tokens.append(token)
+            # Documents shorter than one shingle fall back to their single words
+            if len(tokens) < size:
+                results.append(frozenset(tokens))
+                continue
+            shingles = set()
+            for start in range(len(tokens) - size + 1):
+                shingle = 0
+                for token in tokens[start:start + size]:
+                    shingle = shingle * _SHINGLE_BASE + token
+                shingles.add(shingle & _MAX_HASH)
+            results.append(frozenset(shingles))
+        return results
+
+    def _duplicates(
+        self, suites: Sequence[Sequence[dict]], shingle_sets: List[FrozenSet[int]]
+    ) -> List[List[List[int]]]:
+        """Near-duplicate [i, j] index pairs (i < j) within each suite"""
+        results: List[List[List[int]]] = []
+        offset = 0
+        for suite in suites:
+            sets = shingle_sets[offset:offset + len(suite)]
+            offset += len(suite)
+            pairs = []
+            for i, j in combinations(range(len(sets)), 2):
+                # Empty test cases have no shingles and cannot be near-duplicates
+                if not sets[i] or not sets[j]:
+                    continue
+                shared = len(sets[i] & sets[j])
+                if shared >= self.duplicate_threshold * (len(sets[i]) + len(sets[j]) - shared):
+                    pairs.append([i, j])
+            results.append(pairs)
+        return results
+
+    def _suite_metrics(
+        self, suite: Sequence[dict], kinds: List[str], duplicate_pairs: List[List[int]]
+    ) -> dict:
+        count = len(suite)
+        kind_counts = Counter(kinds)
+        priority_counts = Counter(
+            str(case.get("priority", "")).lower() for case in suite)
+        distinct = [p for p in PRIORITIES if priority_counts.get(p)]
+
+        entropy = 0.0
+        if len(distinct) > 1:
+            total = sum(priority_counts[p] for p in distinct)
+            entropy = -sum(
+                (priority_counts[p] / total) * math.log(priority_counts[p] / total)
+                for p in distinct
+            ) / math.log(len(PRIORITIES))
+
+        duplicated = {j for _, j in duplicate_pairs}
+        duplicate_ratio = len(duplicated) / count if count else 0.0
+
+        scenario_coverage = sum(1 for k in SCENARIO_KINDS if kind_counts[k]) / len(SCENARIO_KINDS)
+        priority_spread = min(1.0, max(0, len(distinct) - 1) / 2)
+        count_met = count >= self.min_count
+        coverage_score = (
+            0.5 * scenario_coverage + 0.3 * priority_spread + 0.2 * count_met
+        ) * (1.0 - duplicate_ratio)
+
+        return {
+            "count": count,
+            "min_count_met": count_met,
+            "scenarios": {k: kind_counts[k] for k in SCENARIO_KINDS},
+            "has_positive_cases": kind_counts["positive"] > 0,
+            "has_negative_cases": kind_counts["negative"] > 0,
+            "has_edge_cases": kind_counts["edge"] > 0,
+            "scenario_coverage": scenario_coverage,
+            "priority_distribution": {p: priority_counts.get(p, 0) for p in PRIORITIES},
+            "priority_diversity": len(distinct),
+            "priority_entropy": entropy,
+            "duplicate_pairs": duplicate_pairs,
+            "duplicate_ratio": duplicate_ratio,
+            "coverage_score": coverage_score,
+            "passed": coverage_score >= 0.7,
+        }
+
+
+_default_analyzer = None
+
+
+def analyze_coverage(test_cases: Sequence[dict]) -> dict:
+    """Coverage metrics for one suite with a shared default CoverageAnalyzer"""
+    global _default_analyzer
+    if _default_analyzer is None:
+        _default_analyzer = CoverageAnalyzer()
+    return _default_analyzer.analyze(test_cases)
+
+
+# Score a BatchRunner results file: python -m src.validators.coverage results.jsonl
+if __name__ == "__main__":
+    import json
+    import sys
+    import time
+
+    with open(sys.argv[1], encoding="utf-8") as f:
+        suites = [
+            record.get("test_cases") or []
+            for record in (json.loads(line) for line in f if line.strip())
+            if "test_cases" in record
+        ]
+
+    start = time.perf_counter()
+    scored = CoverageAnalyzer().analyze_many(suites)
+    elapsed = time.perf_counter() - start
+
+    n = len(scored) or 1
+    print(f"Suites scored:        {len(scored)} in {elapsed:.2f}s")
+    print(f"Mean coverage_score:  {sum(r['coverage_score'] for r in scored) / n:.3f}")
+    print(f"Passed:               {sum(r['passed'] for r in scored)}")
+    print(f"With duplicates:      {sum(1 for r in scored if r['duplicate_pairs'])}")
+    for kind in SCENARIO_KINDS:
+        share = sum(1 for r in scored if r['scenarios'][kind]) / n
+        print(f"With {kind + ' cases:':<16} {share:.1%}")
@@ -0,0 +1,272 @@
+# src/validators/quality.py
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.llm.cache import MemoryCache, ResponseCache, make_cache_key
+from src.llm.client import LLMClient, LLMConfig
+from src.llm.repair import parse_output
+from src.validators.coverage import SCENARIO_KINDS, classify_scenario
+
+# Bump when the judge prompt changes, so cached judgments are not reused
+JUDGE_VERSION = "1"
+
+JUDGE_SYSTEM_PROMPT = """You are evaluating generated test cases for quality.
+
+For each numbered item (a user story and its test cases) rate, from 0 to 10:
+1. relevance_score: relevance to the user story
+2. coverage_score: coverage of scenarios (happy path, negative, edge cases)
+3. clarity_score: clarity of the Given/When/Then steps
+
+Respond with ONLY this JSON, one entry per item:
+{"scores": [{"item": <n>, "relevance_score": <0-10>, "coverage_score": <0-10>, "clarity_score": <0-10>, "reasoning": "<brief explanation>"}]}"""
+
+_SCORE = {"type": "integer", "minimum": 0, "maximum": 10}
+JUDGE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "scores": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "item": {"type": "integer"},
+                    "relevance_score": _SCORE,
+                    "coverage_score": _SCORE,
+                    "clarity_score": _SCORE,
+                    "reasoning": {"type": "string"},
+                },
+                "required": [
+                    "item", "relevance_score", "coverage_score",
+                    "clarity_score", "reasoning",
+                ],
+            },
+        }
+    },
+    "required": ["scores"],
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and any are as at be by can for from has have i if in is it its my "
+    "of on or so that the their them they this to user want when will with".split()
+)
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def _content_words(text: str) -> set:
+    return {w for w in _words(text) if w not in _STOPWORDS and len(w) > 2}
+
+
+def _case_text(test_case: dict) -> str:
+    return " ".join(
+        str(test_case.get(field, ""))
+        for field in ("title", "given", "when", "then"))
+
+
+def lexical_overlap(user_story: str, test_cases: Sequence[dict]) -> float:
+    """Share of the story's content words that the test cases mention"""
+    story_words = _content_words(user_story)
+    if not story_words:
+        return 0.0
+    case_words = set()
+    for test_case in test_cases:
+        case_words |= _content_words(_case_text(test_case))
+    return len(story_words & case_words) / len(story_words)
+
+
+def _scores(relevance: float, coverage: float, clarity: float, **extra) -> dict:
+    overall = (relevance + coverage + clarity) / 3
+    return {
+        "relevance": relevance,
+        "coverage": coverage,
+        "clarity": clarity,
+        "overall": overall,
+        "passed": relevance >= 0.7,
+        **extra,
+    }
+
+
+def heuristic_scores(user_story: str, test_cases: Sequence[dict]) -> dict:
+    """
+    Model-free estimate of the judge's scores, on the same 0-1 scale.
+
+    relevance: lexical overlap with the story; coverage: share of
+    positive/negative/edge scenario kinds present (see coverage.py);
+    clarity: how many steps are at least a short sentence (8 words).
+    """
+    kinds = {classify_scenario(test_case) for test_case in test_cases}
+    steps = [
+        str(test_case.get(f, ""))
+        for test_case in test_cases for f in ("given", "when", "then")]
+
+    clarity = (
+        sum(min(1.0, len(_words(step)) / 8) for step in steps) / len(steps)
+        if steps else 0.0)
+    return _scores(
+        lexical_overlap(user_story, test_cases),
+        len(kinds) / len(SCENARIO_KINDS),
+        clarity,
+        reasoning="Heuristic estimate (lexical overlap prefilter)",
+        source="heuristic",
+    )
+
+
+def _failed(reason: str) -> dict:
+    return _scores(0.0, 0.0, 0.0, reasoning=reason, source="judge", passed=False)
+
+
+class QualityValidator:
+    """
+    Evaluate test case quality with an LLM judge.
+
+    Many (user story, test cases) pairs are judged per model call, in
+    prompts of up to batch_size items. Judgments are cached by a hash of the
+    story, the test cases and the judge model, so re-evaluating the same
+    output is free.
+
+    With prefilter=True, outputs whose lexical overlap with the story is
+    clearly high (>= accept_overlap) or clearly low (< reject_overlap) are
+    scored by heuristic_scores() instead, and only the borderline ones go
+    to the judge.
+
+    Scores are normalized to 0-1: relevance, coverage, clarity, overall
+    (their mean), plus reasoning, passed (relevance >= 0.7) and source
+    ("judge", "cache" or "heuristic").
+    """
+
+    def __init__(
+        self,
+        llm_client: Optional[LLMClient] = None,
+        cache: Optional[ResponseCache] = None,
+        batch_size: int = 8,
+        prefilter: bool = True,
+        accept_overlap: float = 0.8,
+        reject_overlap: float = 0.2,
+    ):
+        self.llm_client = llm_client or LLMClient(
+            LLMConfig(temperature=0.0, output_schema=JUDGE_SCHEMA))
+        self.cache = cache if cache is not None else MemoryCache()
+        self.batch_size = batch_size
+        self.prefilter = prefilter
+        self.accept_overlap = accept_overlap
+        self.reject_overlap = reject_overlap
+        self.judge_calls = 0
+
+    def evaluate_relevance(self, user_story: str, test_cases: list) -> dict:
+        """Score one story's test cases"""
+        return self.evaluate_many([(user_story, test_cases)])[0]
+
+    def evaluate_many(
+        self, items: Sequence[Tuple[str, list]]
+    ) -> List[dict]:
+        """
+        Score many (user story, test cases) pairs with as few judge calls as
+        possible.
+
+        Returns:
+            One score dict per item, in order
+        """
+        results: List[Optional[dict]] = [None] * len(items)
+        pending = self._resolve_without_judge(items, results)
+
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            prompt = self._judge_prompt([items[i] for i, _ in batch])
+            response = self.llm_client.generate(prompt, JUDGE_SYSTEM_PROMPT)
+            self.judge_calls += 1
+            self._store(batch, response, results)
+
+        return results
+
+    async def aevaluate_many(
+        self, items: Sequence[Tuple[str, list]], agenerate
+    ) -> List[dict]:
+        """evaluate_many() with an AsyncLLMClient.agenerate-style judge call"""
+        results: List[Optional[dict]] = [None] * len(items)
+        pending = self._resolve_without_judge(items, results)
+
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            prompt = self._judge_prompt([items[i] for i, _ in batch])
+            response = await agenerate(prompt, JUDGE_SYSTEM_PROMPT)
+            self.judge_calls += 1
+            self._store(batch, response, results)
+
+        return results
+
+    def _cache_key(self, user_story: str, test_cases: list) -> str:
+        return make_cache_key(
+            "quality-judge",
+            self.llm_client.config.model,
+            JUDGE_VERSION,
+            user_story,
+            {"test_cases": test_cases},
+        )
+
+    def _resolve_without_judge(
+        self, items: Sequence[Tuple[str, list]], results: List[Optional[dict]]
+    ) -> List[Tuple[int, str]]:
+        """Fill results from the cache and prefilter; return (index, key) to judge"""
+        pending = []
+        for index, (user_story, test_cases) in enumerate(items):
+            key = self._cache_key(user_story, test_cases)
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[index] = {**cached, "source": "cache"}
+                continue
+            if self.prefilter:
+                overlap = lexical_overlap(user_story, test_cases)
+                if overlap >= self.accept_overlap or overlap < self.reject_overlap:
+                    results[index] = heuristic_scores(user_story, test_cases)
+                    continue
+            pending.append((index, key))
+        return pending
+
+    @staticmethod
+    def _judge_prompt(items: Sequence[Tuple[str, list]]) -> str:
+        parts = []
+        for number, (user_story, test_cases) in enumerate(items, 1):
+            parts.append(
+                f"Item {number}\n"
+                f"User Story: {user_story}\n"
+                f"Test Cases: {json.dumps(test_cases, separators=(',', ':'))}")
+        return "\n\n".join(parts) + f"\n\nScore all {len(items)} items."
+
+    def _store(
+        self,
+        batch: List[Tuple[int, str]],
+        response: Dict[str, Any],
+        results: List[Optional[dict]],
+    ) -> None:
+        scores_by_item = {}
+        if not response.get("error"):
+            try:
+                parsed, _ = parse_output(response.get("text", ""))
+                entries = parsed.get("scores", []) if isinstance(parsed, dict) else parsed
+                for entry in entries:
+                    scores_by_item[int(entry["item"])] = entry
+            except (ValueError, TypeError, KeyError, AttributeError):
+                pass
+
+        for number, (index, key) in enumerate(batch, 1):
+            entry = scores_by_item.get(number)
+            if entry is None:
+                results[index] = _failed("Failed to parse judge response")
+                continue
+            try:
+                score = _scores(
+                    float(entry.get("relevance_score", 0)) / 10,
+                    float(entry.get("coverage_score", 0)) / 10,
+                    float(entry.get("clarity_score", 0)) / 10,
+                    reasoning=entry.get("reasoning", ""),
+                    source="judge",
+                )
+            except (TypeError, ValueError):
+                results[index] = _failed("Failed to parse judge response")
+                continue
+            self.cache.set(key, score)
+            results[index] = score
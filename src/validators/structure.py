@@ -1,60 +1,175 @@
-from pydantic import BaseModel, Field, validator
-from typing import List, Literal
+import json
+import time
+from functools import lru_cache
+from typing import Annotated, Any, Dict, List, Literal, Sequence, Union
+
+from pydantic import AfterValidator, BaseModel, Field, TypeAdapter, ValidationError
+from typing_extensions import TypedDict
+
+
+def _not_empty(v: str) -> str:
+    if not v or v.strip() == "":
+        raise ValueError("Field cannot be empty")
+    return v.strip()
+
+
+def _ids_unique(v: list) -> list:
+    ids = [tc["id"] if isinstance(tc, dict) else tc.id for tc in v]
+    if len(ids) != len(set(ids)):
+        raise ValueError("Test case IDs must be unique")
+    return v
+
+
+# Field constraints shared by the model and the fast-path schema
+TestCaseId = Annotated[str, Field(pattern=r"^TC_\d+$")]
+Title = Annotated[str, Field(min_length=10, max_length=200)]
+Priority = Literal["critical", "high", "medium", "low"]
+Step = Annotated[str, Field(min_length=10), AfterValidator(_not_empty)]
+
+MIN_TEST_CASES = 3
+MAX_TEST_CASES = 10
 
 
 class TestCase(BaseModel):
     """Single test case structure"""
-    id: str = Field(..., pattern=r"^TC_\d+$")
-    title: str = Field(..., min_length=10, max_length=200)
-    priority: Literal["critical", "high", "medium", "low"]
-    given: str = Field(..., min_length=10)
-    when: str = Field(..., min_length=10)
-    then: str = Field(..., min_length=10)
-
-    @validator('given', 'when', 'then')
-    def not_empty(cls, v):
-        if not v or v.strip() == "":
-            raise ValueError("Field cannot be empty")
-        return v.strip()
+    id: TestCaseId
+    title: Title
+    priority: Priority
+    given: Step
+    when: Step
+    then: Step
 
 
 class TestCaseOutput(BaseModel):
     """Complete output structure"""
-    test_cases: List[TestCase] = Field(..., min_items=3, max_items=10)
+    test_cases: Annotated[
+        List[TestCase],
+        Field(min_length=MIN_TEST_CASES, max_length=MAX_TEST_CASES),
+        AfterValidator(_ids_unique),
+    ]
+
+
+class _TestCaseDict(TypedDict):
+    id: TestCaseId
+    title: Title
+    priority: Priority
+    given: Step
+    when: Step
+    then: Step
+
+
+class _TestCaseOutputDict(TypedDict):
+    test_cases: Annotated[
+        List[_TestCaseDict],
+        Field(min_length=MIN_TEST_CASES, max_length=MAX_TEST_CASES),
+        AfterValidator(_ids_unique),
+    ]
+
+
+# Built once: the same rules as TestCaseOutput, but validated straight into
+# plain dicts by pydantic-core, so no model objects are created and nothing
+# needs re-serializing afterwards.
+_OUTPUT_ADAPTER = TypeAdapter(_TestCaseOutputDict)
+
+
+@lru_cache(maxsize=1)
+def output_json_schema() -> Dict[str, Any]:
+    """
+    JSON schema of TestCaseOutput, for schema-constrained generation.
 
-    @validator('test_cases')
-    def validate_ids_unique(cls, v):
-        ids = [tc.id for tc in v]
-        if len(ids) != len(set(ids)):
-            raise ValueError("Test case IDs must be unique")
-        return v
+    Passed as Ollama's "format" so decoding can only produce JSON with the
+    expected fields, priorities and number of test cases. Treat the returned
+    dict as read-only; it is shared.
+    """
+    return TestCaseOutput.model_json_schema()
+
+
+def _format_errors(error: ValidationError) -> List[Dict[str, Any]]:
+    """One {"field", "message", "type"} dict per failed constraint"""
+    return [
+        {
+            "field": ".".join(str(part) for part in e["loc"]),
+            "message": e["msg"],
+            "type": e["type"],
+        }
+        for e in error.errors(include_url=False, include_context=False)
+    ]
+
+
+def _invalid(errors: List[Dict[str, Any]]) -> dict:
+    return {"valid": False, "errors": errors, "test_cases": [], "count": 0}
 
 
 class StructureValidator:
     """Validate test case structure"""
 
     @staticmethod
-    def validate(output_json: dict) -> dict:
+    def validate(output_json: Union[dict, str, bytes]) -> dict:
         """
+        Validate one output against the TestCaseOutput rules.
+
+        Args:
+            output_json: Parsed output dict, or the raw JSON text/bytes,
+                which are validated without a separate json.loads pass
+
         Returns:
         {
             "valid": bool,
-            "errors": list,
-            "test_cases": list (if valid)
+            "errors": list of {"field", "message", "type"} dicts,
+            "test_cases": list of test case dicts (if valid),
+            "count": int
         }
         """
         try:
-            validated = TestCaseOutput(**output_json)
-            return {
-                "valid": True,
-                "errors": [],
-                "test_cases": [tc.dict() for tc in validated.test_cases],
-                "count": len(validated.test_cases)
-            }
-        except Exception as e:
-            return {
-                "valid": False,
-                "errors": [str(e)],
-                "test_cases": [],
-                "count": 0
+            if isinstance(output_json, (str, bytes, bytearray)):
+                validated = _OUTPUT_ADAPTER.validate_json(output_json)
+            else:
+                validated = _OUTPUT_ADAPTER.validate_python(output_json)
+        except ValidationError as e:
+            return _invalid(_format_errors(e))
+
+        test_cases = validated["test_cases"]
+        return {
+            "valid": True,
+            "errors": [],
+            "test_cases": test_cases,
+            "count": len(test_cases)
+        }
+
+    @staticmethod
+    def validate_many(outputs: Sequence[Union[dict, str, bytes]]) -> List[dict]:
+        """Validate several outputs; one result per output, in order"""
+        return [StructureValidator.validate(output) for output in outputs]
+
+
+# Microbenchmark: fast path vs building TestCaseOutput and dumping each case
+if __name__ == "__main__":
+    sample = {
+        "test_cases": [
+            {
+                "id": f"TC_{i:03d}",
+                "title": f"User resets password scenario {i}",
+                "priority": "high",
+                "given": "a registered user on the login page",
+                "when": "they request a password reset link",
+                "then": "an email with a single-use link is sent",
             }
+            for i in range(1, 6)
+        ]
+    }
+    raw = json.dumps(sample).encode()
+    n = 20000
+
+    def bench(label, fn):
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        per_call = (time.perf_counter() - start) / n
+        print(f"{label:<32} {per_call * 1e6:8.1f} µs/output")
+
+    bench("model + model_dump (dict)", lambda: [
+        tc.model_dump() for tc in TestCaseOutput(**sample).test_cases])
+    bench("StructureValidator (dict)", lambda: StructureValidator.validate(sample))
+    bench("model + model_dump (json)", lambda: [
+        tc.model_dump() for tc in TestCaseOutput(**json.loads(raw)).test_cases])
+    bench("StructureValidator (json)", lambda: StructureValidator.validate(raw))
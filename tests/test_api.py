@@ -7,11 +7,13 @@ from pathlib import Path
 try:
     from src.llm.client import LLMClient, LLMConfig
     from src.llm.prompts import PromptBuilder
+    from src.validators.structure import output_json_schema
 except ImportError:
     # Add parent directory to path for direct execution
     sys.path.insert(0, str(Path(__file__).parent.parent))
     from src.llm.client import LLMClient, LLMConfig
     from src.llm.prompts import PromptBuilder
+    from src.validators.structure import output_json_schema
 
 
 def check_service_health(config):
@@ -29,7 +31,8 @@ def check_service_health(config):
 def test_prompt_quality():
     """Test prompt on sample user stories"""
 
-    config = LLMConfig()
+    # Constrain the response to the TestCaseOutput schema
+    config = LLMConfig(output_schema=output_json_schema())
 
     # Check service health
     print("Checking Ollama service...")
@@ -56,7 +59,8 @@ def test_prompt_quality():
         print(f"Testing: {story}")
         print(f"{'='*60}")
 
-        prompts = prompt_builder.build(story)
+        prompts = prompt_builder.build(
+            story, structured_output=llm_client.structured_output)
         print(f"="*60)
         print(prompts)
         print(f"="*60)
@@ -92,7 +96,7 @@ def test_prompt_quality():
                     f"⚠️  DEBUG - Full response: {json.dumps(response, indent=2)}")
                 raise ValueError("Empty response from LLM")
 
-            # Extract JSON if wrapped in markdown
+            # Extract JSON if wrapped in markdown (only without a schema)
             if '```json' in output_text:
                 output_text = output_text.split('```json')[1].split('```')[0]
             elif '```' in output_text:
@@ -0,0 +1,170 @@
+# tests/test_api_service.py
+"""FastAPI service tests against a fake LLM client (no Ollama needed)"""
+import json
+
+from fastapi.testclient import TestClient
+
+from src.api.main import create_app
+from src.benchmarks.fake_ollama import FakeOllamaServer
+from src.llm.client import LLMClient, LLMConfig
+from src.llm.warmup import ModelWarmer
+from src.validators.quality import JUDGE_SCHEMA, QualityValidator
+
+
+FAKE_OUTPUT = {
+    "test_cases": [
+        {
+            "id": f"TC_00{i}",
+            "title": f"Password reset scenario {i}",
+            "priority": "high",
+            "given": "User is on the forgot password page",
+            "when": "User submits a registered email address",
+            "then": "A reset link is emailed to the user",
+        }
+        for i in range(1, 4)
+    ]
+}
+
+
+class FakeAsyncLLMClient:
+    """Stands in for AsyncLLMClient; returns FAKE_OUTPUT for every prompt"""
+
+    def __init__(self):
+        self.config = LLMConfig()
+        self.calls = 0
+
+    async def agenerate(self, prompt, system_prompt="", timeout=None):
+        self.calls += 1
+        if "BROKEN" in prompt:
+            return {"text": "not json", "latency": 0.1, "tokens": 0}
+        if "INCOMPLETE" in prompt:
+            return {"text": json.dumps({"test_cases": [{"id": "TC_001"}]}),
+                    "latency": 0.1, "tokens": 5}
+        return {"text": json.dumps(FAKE_OUTPUT), "latency": 0.1, "tokens": 42,
+                "model": "fake", "provider": "ollama"}
+
+    async def agenerate_stream(self, prompt, system_prompt="", priority=None, tenant=None):
+        text = json.dumps(FAKE_OUTPUT)
+        for start in range(0, len(text), 16):
+            yield {"text": text[start:start + 16], "done": False}
+        yield {"text": text, "done": True, "latency": 0.1, "tokens": 42, "model": "fake"}
+
+    async def ahealth(self):
+        return True
+
+    async def aclose(self):
+        pass
+
+
+def make_test_client():
+    app = create_app(
+        llm_client=FakeAsyncLLMClient(), enable_tracking=False, warm_up=False)
+    return TestClient(app)
+
+
+def test_generate_endpoint():
+    with make_test_client() as client:
+        response = client.post("/generate", json={
+            "user_story": "As a user, I want to reset my password so that I can log in"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["validation"] == {"structure_valid": True, "count": 3}
+    assert body["metadata"]["tokens"] == 42
+
+
+def test_invalid_model_output_is_a_bad_gateway():
+    with make_test_client() as client:
+        response = client.post("/generate", json={
+            "user_story": "As a user, I want an INCOMPLETE answer from the model"})
+
+    assert response.status_code == 502
+    assert "Invalid test case structure" in response.json()["detail"]
+
+
+def test_generate_batch_endpoint_reports_per_item_errors():
+    with make_test_client() as client:
+        response = client.post("/generate/batch", json={"user_stories": [
+            "As a user, I want to reset my password so that I can log in",
+            "As a user, I want a BROKEN response from the model please",
+        ]})
+
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (1, 1)
+    assert "parse" in body["results"][1]["error"]
+
+
+def test_generate_stream_endpoint_emits_test_cases():
+    with make_test_client() as client:
+        response = client.post("/generate/stream", json={
+            "user_story": "As a user, I want to reset my password so that I can log in"})
+
+    events = [line.split(": ", 1)[1] for line in response.text.splitlines()
+              if line.startswith("event: ")]
+    assert events.count("test_case") == 3
+    assert events[-1] == "done"
+
+
+def test_generate_batch_survives_unexpected_errors():
+    class ExplodingClient(FakeAsyncLLMClient):
+        async def agenerate(self, prompt, system_prompt="", timeout=None):
+            if "EXPLODE" in prompt:
+                raise RuntimeError("connection reset")
+            return await super().agenerate(prompt, system_prompt, timeout)
+
+    app = create_app(llm_client=ExplodingClient(), enable_tracking=False, warm_up=False)
+    with TestClient(app) as client:
+        response = client.post("/generate/batch", json={"user_stories": [
+            "As a user, I want to reset my password so that I can log in",
+            "As a user, I want the model call to EXPLODE right now",
+        ]})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert (body["succeeded"], body["failed"]) == (1, 1)
+    assert body["results"][1]["error"] == "RuntimeError: connection reset"
+
+
+def test_generate_batch_judges_quality_in_one_call():
+    stories = [
+        f"As a user, I want to reset my password from device {i}" for i in range(3)]
+    judged = json.dumps({"scores": [
+        {"item": n, "relevance_score": 8, "coverage_score": 7, "clarity_score": 9,
+         "reasoning": "ok"} for n in range(1, 4)]})
+
+    with FakeOllamaServer(response_text=judged) as judge_server:
+        validator = QualityValidator(
+            llm_client=LLMClient(LLMConfig(
+                ollama_base_url=judge_server.url, output_schema=JUDGE_SCHEMA)),
+            prefilter=False)
+        app = create_app(
+            llm_client=FakeAsyncLLMClient(), enable_tracking=False, warm_up=False,
+            quality_validator=validator)
+        with TestClient(app) as client:
+            response = client.post("/generate/batch", json={"user_stories": stories})
+
+    body = response.json()
+    assert body["succeeded"] == 3
+    assert judge_server.requests["/api/chat"] == 1
+    assert validator.judge_calls == 1
+    for result in body["results"]:
+        assert result["quality_metrics"]["source"] == "judge"
+        assert result["quality_metrics"]["relevance"] == 0.8
+
+
+def test_stream_latency_is_recorded_by_the_warmer():
+    class PingClient:
+        def generate(self, model, prompt, keep_alive):
+            return {"response": "", "load_duration": 0}
+
+    warmer = ModelWarmer(
+        {"fake": "30m"}, ["http://n1:11434"], client_factory=lambda host: PingClient())
+    app = create_app(
+        llm_client=FakeAsyncLLMClient(), enable_tracking=False, warmer=warmer)
+    with TestClient(app) as client:
+        client.post("/generate/stream", json={
+            "user_story": "As a user, I want to reset my password so that I can log in"})
+
+    stats = warmer.stats()["fake"]
+    assert stats["warm"]["count"] == 1 and stats["warm"]["p50"] == 0.1
+    assert stats["pings"]["count"] == 1
@@ -0,0 +1,55 @@
+# tests/test_async_client.py
+import asyncio
+
+from src.llm.async_client import AsyncLLMClient
+from src.llm.client import LLMConfig
+
+
+class SlowFakeClient(AsyncLLMClient):
+    """AsyncLLMClient whose model call just sleeps and counts concurrency"""
+
+    def __init__(self, config, delay=0.02):
+        super().__init__(config)
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    async def _call_ollama(self, prompt, system_prompt):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return {"text": prompt.upper(), "tokens": 3}
+
+
+def test_agenerate_many_preserves_order_and_bounds_concurrency():
+    client = SlowFakeClient(LLMConfig(max_concurrency=3))
+    prompts = [f"story {i}" for i in range(10)]
+
+    results = asyncio.run(client.agenerate_many(prompts))
+
+    assert [r["text"] for r in results] == [p.upper() for p in prompts]
+    assert all(r["provider"] == "ollama" and r["tokens"] == 3 for r in results)
+    assert client.peak == 3
+
+
+def test_agenerate_times_out():
+    client = SlowFakeClient(LLMConfig(), delay=0.5)
+
+    result = asyncio.run(client.agenerate("story", timeout=0.01))
+
+    assert result["text"] == ""
+    assert "timed out" in result["error"]
+
+
+def test_identical_concurrent_requests_are_coalesced():
+    client = SlowFakeClient(LLMConfig(max_concurrency=10))
+
+    async def run():
+        return await client.agenerate_many(["same story"] * 5 + ["other"])
+
+    results = asyncio.run(run())
+
+    assert client.peak == 2
+    assert [r["text"] for r in results] == ["SAME STORY"] * 5 + ["OTHER"]
+    assert sum(1 for r in results if r.get("coalesced")) == 4
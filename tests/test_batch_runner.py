@@ -0,0 +1,128 @@
+# tests/test_batch_runner.py
+import json
+
+from src.batch_runner import BatchRunner, iter_stories
+from src.llm.parsing import extract_json
+
+VALID_OUTPUT = {
+    "test_cases": [
+        {
+            "id": f"TC_00{i}",
+            "title": f"Generated scenario number {i}",
+            "priority": "high",
+            "given": "User is on the reset page",
+            "when": "User submits the reset form",
+            "then": "Reset email is sent to the user",
+        }
+        for i in range(1, 4)
+    ]
+}
+
+
+class FakeLLMClient:
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt, system_prompt=""):
+        self.calls += 1
+        text = "```json\n" + json.dumps(VALID_OUTPUT) + "\n```"
+        return {"text": text, "latency": 0.0, "tokens": 10, "model": "fake"}
+
+
+def test_extract_json_handles_fences_and_chatter():
+    assert extract_json('```json\n{"a": 1}\n```') == {"a": 1}
+    assert extract_json('Sure! Here it is: {"a": 1} Hope it helps') == {"a": 1}
+
+
+def test_iter_stories_reads_json_array_and_jsonl(tmp_path):
+    array_file = tmp_path / "stories.json"
+    array_file.write_text(json.dumps([{"id": "a", "user_story": "story a"}]))
+    jsonl_file = tmp_path / "stories.jsonl"
+    jsonl_file.write_text('{"user_story": "story b"}\n\n{"user_story": "story c"}\n')
+
+    assert list(iter_stories(str(array_file))) == [
+        {"id": "a", "user_story": "story a"}]
+    assert [s["id"] for s in iter_stories(str(jsonl_file))] == ["0", "2"]
+
+
+def test_run_writes_results_and_resumes(tmp_path):
+    input_file = tmp_path / "stories.jsonl"
+    input_file.write_text("".join(
+        json.dumps({"id": f"s{i}", "user_story": f"As a user I want {i}"}) + "\n"
+        for i in range(5)
+    ))
+    output_file = tmp_path / "results.jsonl"
+    output_file.write_text(json.dumps({"id": "s0", "success": True}) + "\n")
+
+    llm = FakeLLMClient()
+    summary = BatchRunner(llm_client=llm, workers=2).run(
+        str(input_file), str(output_file))
+
+    results = [json.loads(line) for line in output_file.read_text().splitlines()]
+    assert summary["skipped"] == 1 and summary["processed"] == 4
+    assert llm.calls == 4
+    assert sorted(r["id"] for r in results) == [f"s{i}" for i in range(5)]
+    assert all(r["success"] and r["count"] == 3 for r in results[1:])
+
+
+def test_corrupt_lines_are_reported_without_aborting_the_run(tmp_path):
+    input_file = tmp_path / "stories.jsonl"
+    input_file.write_text(
+        '{"id": "s0", "user_story": "As a user I want 0"}\n'
+        '{"id": "s1", "user_story": \n'
+        '42\n'
+        '{"id": "s3", "user_story": "As a user I want 3"}\n')
+    output_file = tmp_path / "results.jsonl"
+
+    summary = BatchRunner(llm_client=FakeLLMClient(), workers=2).run(
+        str(input_file), str(output_file))
+
+    results = {r["id"]: r for r in map(json.loads, output_file.read_text().splitlines())}
+    assert summary["processed"] == 4 and summary["succeeded"] == 2
+    assert results["s0"]["success"] and results["s3"]["success"]
+    assert results["1"]["success"] is False and "Invalid JSON" in results["1"]["error"]
+    assert results["2"] == {
+        "id": "2", "error": "Expected an object or string, got int", "success": False}
+
+
+def test_process_reports_exceptions_and_resume_retries_failures(tmp_path):
+    class ExplodingPromptBuilder:
+        def build(self, story, **kwargs):
+            if "explode" in story:
+                raise RuntimeError("template missing")
+            return {"user": story, "system": ""}
+
+    input_file = tmp_path / "stories.jsonl"
+    input_file.write_text("".join(
+        json.dumps({"id": f"s{i}", "user_story": story}) + "\n"
+        for i, story in enumerate(["As a user I want x", "please explode", "As a user I want y"])
+    ))
+    output_file = tmp_path / "results.jsonl"
+    output_file.write_text(json.dumps({"id": "s0", "success": False}) + "\n")
+
+    summary = BatchRunner(
+        llm_client=FakeLLMClient(), prompt_builder=ExplodingPromptBuilder(), workers=2,
+    ).run(str(input_file), str(output_file))
+
+    results = {r["id"]: r for r in map(json.loads, output_file.read_text().splitlines()[1:])}
+    assert summary["skipped"] == 0 and summary["processed"] == 3
+    assert results["s0"]["success"] and results["s2"]["success"]
+    assert results["s1"] == {
+        "id": "s1", "user_story": "please explode", "success": False,
+        "error": "RuntimeError: template missing"}
+
+
+def test_repair_tokens_are_counted():
+    class RepairingLLMClient(FakeLLMClient):
+        def generate(self, prompt, system_prompt=""):
+            self.calls += 1
+            if self.calls == 1:
+                return {"text": "not json", "latency": 0.0, "tokens": 10, "model": "fake"}
+            return {"text": json.dumps(VALID_OUTPUT), "latency": 0.0, "tokens": 7}
+
+    result = BatchRunner(llm_client=RepairingLLMClient()).process(
+        {"id": "s0", "user_story": "As a user I want to reset my password"})
+
+    assert result["success"]
+    assert result["repair"]["llm_calls"] == 1
+    assert result["tokens"] == 17
@@ -0,0 +1,64 @@
+# tests/test_benchmarks.py
+import json
+
+from src.benchmarks.fake_ollama import FakeOllamaServer
+from src.benchmarks.run import compare, percentile, run_suite
+from src.llm.client import LLMClient, LLMConfig
+from src.llm.load_balancer import OllamaLoadBalancer
+from src.validators.structure import StructureValidator
+
+
+def test_fake_server_answers_chat_like_ollama():
+    with FakeOllamaServer() as server:
+        with LLMClient(LLMConfig(ollama_base_url=server.url)) as client:
+            response = client.generate("Write test cases", "You are a QA engineer")
+            chunks = list(client.generate_stream("Write test cases"))
+
+    assert StructureValidator.validate(response["text"])["valid"]
+    assert response["tokens"] == len(server.tokens) + 8
+    assert "".join(c["text"] for c in chunks[:-1]) == server.response_text
+    assert chunks[-1]["completion_tokens"] == len(server.tokens)
+    assert server.requests["/api/chat"] == 2
+
+
+def test_fake_server_injects_errors_and_reports_health():
+    with FakeOllamaServer(error_rate=1.0) as server:
+        with LLMClient(LLMConfig(ollama_base_url=server.url)) as client:
+            response = client.generate("Write test cases")
+        balancer = OllamaLoadBalancer([server.url], health_checks=False)
+        endpoint = balancer.endpoints[0]
+        balancer.check_health(endpoint)
+
+    assert "500" in response["error"]
+    assert server.errors == 1
+    assert endpoint.healthy
+
+
+def test_percentile_interpolates():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 100) == 4.0
+    assert percentile([], 95) == 0.0
+
+
+def test_suite_report_and_regression_check():
+    with FakeOllamaServer() as server:
+        report = run_suite(
+            server, ["As a user, I want to log in so that I see my data"],
+            concurrency_levels=(1, 2), iterations=4, cpu_iterations=4)
+
+    json.dumps(report)
+    names = [(r["name"], r["concurrency"]) for r in report["results"]]
+    assert names == [
+        ("prompt_build", 1), ("structure_validate", 1),
+        ("llm_generate", 1), ("llm_generate", 2),
+        ("pipeline", 1), ("pipeline", 2),
+    ]
+    assert all(r["errors"] == 0 for r in report["results"])
+    assert set(report["results"][0]["latency_ms"]) == {"p50", "p95", "p99", "mean", "max"}
+
+    assert compare(report, report) == []
+    faster = json.loads(json.dumps(report))
+    for result in faster["results"]:
+        result["latency_ms"]["p95"] /= 2
+    assert len(compare(faster, report)) == len(report["results"])
@@ -0,0 +1,131 @@
+# tests/test_cache.py
+import asyncio
+import threading
+import time
+
+from src.benchmarks.fake_ollama import FakeOllamaServer
+from src.llm.async_client import AsyncLLMClient
+from src.llm.cache import MemoryCache, SQLiteCache, make_cache_key
+from src.llm.client import LLMClient, LLMConfig
+
+
+class CountingClient(LLMClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+
+    def _call_ollama(self, prompt, system_prompt):
+        self.calls += 1
+        return {"text": f"answer to {prompt}", "tokens": 5}
+
+
+def test_cache_key_depends_on_options():
+    base = make_cache_key("ollama", "m", "sys", "story", {"temperature": 0.3})
+    assert base == make_cache_key("ollama", "m", "sys", "story", {"temperature": 0.3})
+    assert base != make_cache_key("ollama", "m", "sys", "story", {"temperature": 0.7})
+    assert base != make_cache_key("ollama", "other", "sys", "story", {"temperature": 0.3})
+
+
+def test_memory_cache_evicts_lru_and_expires():
+    cache = MemoryCache(max_size=2, ttl=0.05)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")
+    cache.set("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    time.sleep(0.06)
+    assert cache.get("c") is None
+    assert cache.stats() == {"hits": 2, "misses": 2}
+
+
+def test_sqlite_cache_persists(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache(path)
+    cache.set("k", {"text": "hello"})
+    cache.close()
+
+    assert SQLiteCache(path).get("k") == {"text": "hello"}
+
+
+def test_generate_returns_cached_response():
+    client = CountingClient(LLMConfig(), cache=MemoryCache())
+
+    first = client.generate("story", "sys")
+    second = client.generate("story", "sys")
+
+    assert client.calls == 1
+    assert first["cached"] is False and second["cached"] is True
+    assert second["text"] == first["text"]
+    assert second["cache"] == {"hits": 1, "misses": 1}
+    # A hit spends no tokens; the original count is reported separately
+    assert first["tokens"] == 5
+    assert second["tokens"] == 0 and second["cached_tokens"] == 5
+
+
+def test_cached_entry_is_isolated_from_returned_results():
+    cache = MemoryCache()
+    client = CountingClient(LLMConfig(coalesce_requests=False), cache=cache)
+
+    first = client.generate("story")
+    first["text"] = "mutated by caller"
+    second = client.generate("story")
+    second["text"] = "mutated again"
+
+    key = next(iter(cache._data))
+    entry = cache.get(key)
+    assert "cached" not in entry and "cache" not in entry
+    assert client.generate("story")["text"] == "answer to story"
+    assert client.calls == 1
+
+
+def test_async_stream_shares_the_response_cache():
+    async def run(client):
+        streamed = [chunk async for chunk in client.agenerate_stream("story", "sys")]
+        again = [chunk async for chunk in client.agenerate_stream("story", "sys")]
+        generated = await client.agenerate("story", "sys")
+        await client.aclose()
+        return streamed, again, generated
+
+    with FakeOllamaServer(response_text="cached answer") as server:
+        client = AsyncLLMClient(
+            LLMConfig(ollama_base_url=server.url), cache=MemoryCache())
+        streamed, again, generated = asyncio.run(run(client))
+
+    assert streamed[-1]["cached"] is False
+    assert len(again) == 2 and again[0]["text"] == "cached answer"
+    assert again[-1]["cached"] is True and generated["cached"] is True
+    assert again[-1]["tokens"] == generated["tokens"] == 0
+    assert again[-1]["cached_tokens"] == streamed[-1]["tokens"] > 0
+    assert generated["text"] == "cached answer"
+    assert server.requests["/api/chat"] == 1
+
+
+def test_async_client_keeps_disk_cache_io_off_the_event_loop(tmp_path):
+    io_threads = []
+
+    class RecordingSQLiteCache(SQLiteCache):
+        def _get(self, key):
+            io_threads.append(threading.get_ident())
+            return super()._get(key)
+
+        def _set(self, key, value):
+            io_threads.append(threading.get_ident())
+            super()._set(key, value)
+
+    async def run(client):
+        loop_thread = threading.get_ident()
+        first = await client.agenerate("story", "sys")
+        second = await client.agenerate("story", "sys")
+        await client.aclose()
+        return loop_thread, first, second
+
+    with FakeOllamaServer() as server:
+        client = AsyncLLMClient(
+            LLMConfig(ollama_base_url=server.url),
+            cache=RecordingSQLiteCache(str(tmp_path / "cache.sqlite3")))
+        loop_thread, first, second = asyncio.run(run(client))
+
+    assert second["cached"] is True and second["text"] == first["text"]
+    assert len(io_threads) == 3 and loop_thread not in io_threads
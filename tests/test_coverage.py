@@ -0,0 +1,80 @@
+# tests/test_coverage.py
+import json
+
+from src.validators.coverage import CoverageAnalyzer, analyze_coverage, classify_scenario
+
+
+def case(i, title, priority="high", then="the user sees the account dashboard page"):
+    return {
+        "id": f"TC_{i:03d}",
+        "title": title,
+        "priority": priority,
+        "given": "a registered user on the login page",
+        "when": "they submit their email and password",
+        "then": then,
+    }
+
+
+def balanced_suite():
+    return [
+        case(1, "Login with valid credentials", "critical"),
+        case(2, "Login fails with invalid password", "high",
+             then="an error message asks them to try again"),
+        case(3, "Login with maximum length email address", "medium",
+             then="the long address is accepted and they are signed in"),
+    ]
+
+
+def test_classify_scenario():
+    assert classify_scenario(case(1, "Login with valid credentials")) == "positive"
+    assert classify_scenario(case(1, "Login rejected for expired account")) == "negative"
+    assert classify_scenario(case(1, "Login with empty password field")) == "edge"
+
+
+def test_balanced_suite_scores_full_coverage():
+    metrics = analyze_coverage(balanced_suite())
+
+    assert metrics["scenarios"] == {"positive": 1, "negative": 1, "edge": 1}
+    assert metrics["priority_diversity"] == 3
+    assert metrics["priority_distribution"]["low"] == 0
+    assert metrics["duplicate_pairs"] == []
+    assert metrics["coverage_score"] == 1.0 and metrics["passed"]
+    json.dumps(metrics)  # logged as an MLflow artifact
+
+
+def test_near_duplicates_are_detected_and_penalized():
+    suite = balanced_suite() + [
+        case(4, "Login with valid credentials", "critical"),
+        case(5, "Login with valid credentials again", "critical"),
+    ]
+    metrics = analyze_coverage(suite)
+
+    assert [0, 3] in metrics["duplicate_pairs"]
+    assert all(1 not in pair and 2 not in pair for pair in metrics["duplicate_pairs"])
+    assert metrics["duplicate_ratio"] > 0
+    assert metrics["coverage_score"] < 1.0
+
+
+def test_single_priority_and_kind_scores_low():
+    suite = [case(i, f"Login with valid credentials on device {name}")
+             for i, name in enumerate(["alpha", "bravo", "charlie"], 1)]
+    metrics = CoverageAnalyzer(duplicate_threshold=1.01).analyze(suite)
+
+    assert metrics["priority_diversity"] == 1 and metrics["priority_entropy"] == 0.0
+    assert metrics["scenario_coverage"] == 1 / 3
+    assert not metrics["passed"]
+
+
+def test_analyze_many_matches_one_at_a_time():
+    analyzer = CoverageAnalyzer()
+    suites = [balanced_suite(), [], balanced_suite()[:1] * 2, balanced_suite()[::-1]]
+
+    assert analyzer.analyze_many(suites) == [analyzer.analyze(s) for s in suites]
+    assert analyzer.analyze_many(suites)[2]["duplicate_pairs"] == [[0, 1]]
+
+
+def test_empty_test_cases_are_not_duplicates():
+    empty = {"id": "TC_009", "title": "", "priority": "low", "given": "", "when": "", "then": ""}
+    metrics = CoverageAnalyzer().analyze([empty, dict(empty), case(1, "Login with valid credentials")])
+
+    assert metrics["duplicate_pairs"] == []
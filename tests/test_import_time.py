@@ -0,0 +1,92 @@
+# tests/test_import_time.py
+"""
+Import-time guard: CLI tools and API workers restart often, so importing an
+entry point must stay cheap, print nothing, load no configuration and leave
+the heavy libraries for the code paths that use them.
+
+Wall-clock budgets are only checked with CHECK_IMPORT_TIME=1, since a
+loaded CI machine can miss them whatever the code does; they are generous
+multiples of the measured cost and scale with IMPORT_TIME_BUDGET_SCALE.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = (
+    "dotenv", "langchain_core", "langchain_ollama", "mlflow",
+    "numpy", "openai", "uvicorn",
+)
+
+# Cumulative import time budgets, in milliseconds
+IMPORT_BUDGET_MS = {
+    "src.llm.client": 750,
+    "src.batch_runner": 1000,
+    "src.shared.models.ollama_qwen3vl4b": 750,
+    "src.api.main": 2000,
+}
+
+
+def run_python(code, cwd, *args):
+    env = {k: v for k, v in os.environ.items()
+           if not k.startswith(("OLLAMA", "MAX_RETRIES"))}
+    env["PYTHONPATH"] = str(PROJECT_ROOT)
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True)
+
+
+def import_code(module):
+    return (
+        f"import json, sys, {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGET_MS))
+def test_import_is_lazy_and_quiet(module, tmp_path):
+    result = run_python(import_code(module), tmp_path)
+
+    assert json.loads(result.stdout) == [], "no output, no heavy imports"
+
+
+@pytest.mark.skipif(
+    os.getenv("CHECK_IMPORT_TIME") != "1",
+    reason="wall-clock budget; set CHECK_IMPORT_TIME=1 to check")
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGET_MS))
+def test_import_is_within_budget(module, tmp_path):
+    code = import_code(module)
+    budget = IMPORT_BUDGET_MS[module] * float(
+        os.getenv("IMPORT_TIME_BUDGET_SCALE", "1"))
+
+    timings = []
+    for _ in range(2):  # best of two, to ride out a cold disk cache
+        result = run_python(code, tmp_path, "-X", "importtime")
+        # "import time: self | cumulative | name"; the module is the last line
+        last = result.stderr.strip().splitlines()[-1]
+        timings.append(int(last.split("|")[1]) / 1000)
+
+    assert min(timings) < budget, f"{module} took {min(timings):.0f} ms"
+
+
+def test_config_loads_on_first_use_from_project_root(tmp_path):
+    result = run_python(
+        "from src.shared.infrastructure import get_environment_config; "
+        "print(get_environment_config().OLLAMA_SERVICE_MODEL_QWEN3VL4B)",
+        tmp_path)
+
+    # Read from <project root>/.env.dev, not the working directory
+    assert result.stdout.strip() == "qwen3-vl:8b"
+
+
+def test_shared_layer_does_not_import_llm_package(tmp_path):
+    result = run_python(
+        "import sys, src.shared.models.ollama_qwen3vl4b; "
+        "print(sorted(m for m in sys.modules if m.startswith('src.llm')))",
+        tmp_path)
+
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,175 @@
+# tests/test_llm_client.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.llm.client import LLMClient, LLMConfig
+
+
+def test_ollama_client_is_shared_across_threads():
+    client = LLMClient(LLMConfig(pool_max_connections=4))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        clients = list(pool.map(lambda _: client._get_ollama_client(), range(32)))
+
+    assert all(c is clients[0] for c in clients)
+    client.close()
+
+
+def test_close_releases_pool_and_client_is_reusable():
+    with LLMClient(LLMConfig()) as client:
+        first = client._get_ollama_client()
+
+    assert not client._ollama_clients
+    assert client._get_ollama_client() is not first
+    client.close()
+
+
+class StreamingFakeClient(LLMClient):
+    def _stream_ollama(self, prompt, system_prompt):
+        for word in ["Hello", " ", "world"]:
+            yield word, None
+        yield "", {"prompt_tokens": 4, "completion_tokens": 3, "eval_duration": 0.5}
+
+
+def test_generate_stream_yields_chunks_then_summary():
+    chunks = list(StreamingFakeClient(LLMConfig()).generate_stream("hi"))
+
+    assert [c["text"] for c in chunks[:-1]] == ["Hello", " ", "world"]
+    final = chunks[-1]
+    assert final["done"] is True and final["text"] == "Hello world"
+    assert final["tokens"] == 7 and final["tokens_per_second"] == 6.0
+    assert 0 <= final["time_to_first_token"] <= final["latency"]
+
+
+def test_safe_stream_retries_only_before_first_chunk():
+    from src.shared.models.ollama_qwen3vl4b import OllamaQwen3vl4b
+    from src.shared.models.retry_policy import CircuitBreaker, RetryPolicy
+
+    class FlakyLLM:
+        calls = 0
+
+        def stream(self, prompt, config=None):
+            FlakyLLM.calls += 1
+            if FlakyLLM.calls == 1:
+                raise ConnectionError("model loading")
+            yield "Hello"
+            yield " world"
+
+    model = OllamaQwen3vl4b(
+        retry_policy=RetryPolicy(base_delay=0), circuit_breaker=CircuitBreaker())
+    model.llm = FlakyLLM()
+    chunks = list(model.safe_stream("hi", max_retries=2))
+
+    assert FlakyLLM.calls == 2
+    assert [c.text for c in chunks[:-1]] == ["Hello", " world"]
+    assert chunks[-1].done and chunks[-1].response == "Hello world"
+    assert chunks[-1].token_usage.completion_tokens > 0
+
+
+def test_safe_stream_takes_usage_from_the_public_stream_callbacks():
+    from langchain_core.outputs import Generation, LLMResult
+
+    from src.shared.models.ollama_qwen3vl4b import OllamaQwen3vl4b
+    from src.shared.models.retry_policy import CircuitBreaker, RetryPolicy
+
+    info = {"prompt_eval_count": 30, "eval_count": 12, "eval_duration": 6 * 10**8}
+
+    class StreamingLLM:
+        def stream(self, prompt, config=None):
+            yield "Hello"
+            yield " world"
+            for handler in config["callbacks"]:
+                handler.on_llm_end(LLMResult(generations=[[
+                    Generation(text="Hello world", generation_info=info)]]))
+
+    model = OllamaQwen3vl4b(
+        retry_policy=RetryPolicy(base_delay=0), circuit_breaker=CircuitBreaker())
+    model.llm = StreamingLLM()
+    final = list(model.safe_stream("hi"))[-1]
+
+    assert final.response == "Hello world"
+    assert (final.token_usage.prompt_tokens, final.token_usage.completion_tokens) == (30, 12)
+    assert not final.token_usage.estimated
+    assert final.tokens_per_second == 20.0
+
+
+def test_concurrent_identical_requests_share_one_model_call():
+    calls = []
+
+    class SlowClient(LLMClient):
+        def _call_ollama(self, prompt, system_prompt):
+            calls.append(prompt)
+            time.sleep(0.1)
+            return {"text": "shared answer", "tokens": 1}
+
+    client = SlowClient(LLMConfig())
+    stories = ["As a user,  I want X", "As a user, I want X", "As a user, I want Y"]
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda s: client.generate(s), stories * 2))
+
+    assert sorted(" ".join(c.split()) for c in calls) == [
+        "As a user, I want X", "As a user, I want Y"]
+    assert sum(1 for r in results if r.get("coalesced")) == 4
+
+
+class SchemaAwareOllama:
+    """Records the format of each chat call; optionally rejects schemas"""
+
+    def __init__(self, reject_schema=False):
+        self.formats = []
+        self.reject_schema = reject_schema
+
+    def chat(self, format=None, **kwargs):
+        from ollama import ResponseError
+
+        self.formats.append(format)
+        if format is not None and self.reject_schema:
+            raise ResponseError('invalid format: expected "json" or a JSON schema', 400)
+        return {"message": {"content": '{"test_cases": []}'}}
+
+    def close(self):
+        pass
+
+
+def make_schema_client(fake):
+    from src.validators.structure import output_json_schema
+
+    class FakeClient(LLMClient):
+        def _get_ollama_client(self, host=None):
+            return fake
+
+    return FakeClient(LLMConfig(output_schema=output_json_schema()))
+
+
+def test_output_schema_is_sent_as_ollama_format():
+    fake = SchemaAwareOllama()
+    client = make_schema_client(fake)
+
+    assert client.structured_output
+    assert client.generate("story")["text"] == '{"test_cases": []}'
+    assert fake.formats[0]["properties"]["test_cases"]["maxItems"] == 10
+
+
+
+def test_structured_output_only_for_capable_providers():
+    from src.llm.async_client import AsyncLLMClient
+    from src.validators.structure import output_json_schema
+
+    schema = output_json_schema()
+    assert AsyncLLMClient(LLMConfig(output_schema=schema)).structured_output
+    assert not AsyncLLMClient(
+        LLMConfig(provider="openai", output_schema=schema)).structured_output
+    assert not AsyncLLMClient(LLMConfig()).structured_output
+
+
+def test_rejected_schema_falls_back_to_plain_generation():
+    fake = SchemaAwareOllama(reject_schema=True)
+    client = make_schema_client(fake)
+
+    result = client.generate("story")
+
+    assert "error" not in result
+    assert fake.formats[0] is not None and fake.formats[1] is None
+    assert not client.structured_output
+    client.generate("another story")
+    assert fake.formats[2] is None
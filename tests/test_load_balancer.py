@@ -0,0 +1,138 @@
+# tests/test_load_balancer.py
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from src.llm.client import LLMClient, LLMConfig
+from src.llm.load_balancer import OllamaLoadBalancer
+
+
+def make_balancer(n=2, **kwargs):
+    urls = [f"http://node{i}:11434" for i in range(n)]
+    return OllamaLoadBalancer(urls, health_checks=False, **kwargs)
+
+
+def test_routes_to_endpoint_with_fewest_outstanding_requests():
+    balancer = make_balancer(3)
+
+    first = balancer.choose()
+    second = balancer.choose()
+    third = balancer.choose()
+    assert len({first.url, second.url, third.url}) == 3
+
+    balancer.release(second, 0.1)
+    assert balancer.choose() is second
+
+
+def test_ejects_after_consecutive_failures_and_skips_endpoint():
+    balancer = make_balancer(2, failure_threshold=2)
+    bad = balancer.endpoints[0]
+
+    with pytest.raises(ConnectionError):
+        with balancer.acquire() as endpoint:
+            assert endpoint is bad
+            raise ConnectionError("down")
+    assert bad.healthy
+    # A failing endpoint loses ties, so the next request goes elsewhere
+    assert balancer.choose() is not bad
+
+    bad.outstanding += 1  # a second request already routed to bad
+    balancer.release(bad, 0.1, success=False)
+    assert not bad.healthy
+    assert all(balancer.choose() is balancer.endpoints[1] for _ in range(3))
+    assert balancer.stats()[bad.url]["ejections"] == 1
+
+
+def test_client_errors_do_not_count_against_endpoint():
+    class BadRequest(Exception):
+        status_code = 400
+
+    balancer = make_balancer(1, failure_threshold=1)
+    with pytest.raises(BadRequest):
+        with balancer.acquire():
+            raise BadRequest()
+
+    assert balancer.endpoints[0].healthy
+    assert balancer.endpoints[0].outstanding == 0
+
+
+def test_all_ejected_still_routes():
+    balancer = make_balancer(2)
+    for endpoint in balancer.endpoints:
+        endpoint.healthy = False
+
+    assert balancer.choose() in balancer.endpoints
+
+
+class TagsHandler(BaseHTTPRequestHandler):
+    status = 200
+
+    def do_GET(self):
+        self.send_response(self.status if self.path == "/api/tags" else 404)
+        self.end_headers()
+        self.wfile.write(b'{"models": []}')
+
+    def log_message(self, *args):
+        pass
+
+
+def test_health_check_ejects_and_readmits():
+    server = HTTPServer(("127.0.0.1", 0), TagsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}"
+        balancer = OllamaLoadBalancer([url], health_checks=False)
+        endpoint = balancer.endpoints[0]
+
+        TagsHandler.status = 503
+        assert balancer.check_health(endpoint) is False
+        assert not endpoint.healthy
+
+        TagsHandler.status = 200
+        assert balancer.check_health(endpoint) is True
+        assert endpoint.healthy
+    finally:
+        TagsHandler.status = 200
+        server.shutdown()
+        server.server_close()
+
+
+class RecordingOllama:
+    def __init__(self, host, calls):
+        self.host = host
+        self.calls = calls
+
+    def chat(self, **kwargs):
+        self.calls.append(self.host)
+        return {"message": {"content": "ok"}, "eval_count": 1, "prompt_eval_count": 1}
+
+    def close(self):
+        pass
+
+
+def test_llm_client_spreads_requests_over_endpoints():
+    calls = []
+
+    class FakeClient(LLMClient):
+        def _get_ollama_client(self, host=None):
+            return RecordingOllama(host, calls)
+
+    config = LLMConfig(
+        ollama_base_urls=["http://a:11434", "http://b:11434"],
+        coalesce_requests=False,
+    )
+    client = FakeClient(config)
+    client.balancer._health_checks = False
+
+    for i in range(4):
+        assert client.generate(f"prompt {i}")["text"] == "ok"
+
+    assert sorted(set(calls)) == ["http://a:11434", "http://b:11434"]
+    stats = client.endpoint_stats()
+    assert all(s["requests"] == 2 and s["outstanding"] == 0 for s in stats.values())
+    client.close()
+
+
+def test_single_endpoint_has_no_balancer():
+    assert LLMClient(LLMConfig(ollama_base_urls=[])).balancer is None
@@ -0,0 +1,116 @@
+# tests/test_mlflow_tracker.py
+import time
+
+import mlflow
+import pytest
+
+from src.mlflow_tracker import MLflowTracker
+
+GENERATION = dict(
+    user_story="As a user, I want to reset my password",
+    test_cases=[{"id": "TC_001"}],
+    structure_validation={"valid": True, "count": 1, "errors": []},
+    quality_metrics={},
+    coverage_metrics={"coverage_score": 0.7, "priority_diversity": 2},
+    latency=1.5,
+    model_info={"model": "qwen3-vl:4b", "provider": "ollama"},
+)
+
+
+@pytest.fixture(autouse=True)
+def tracking_uri(tmp_path):
+    mlflow.set_tracking_uri(f"sqlite:///{tmp_path / 'mlflow.db'}")
+    for name in ("tracker-test", "tracker-drop", "tracker-sync"):
+        mlflow.create_experiment(
+            name, artifact_location=(tmp_path / name).as_uri())
+    yield
+    mlflow.set_tracking_uri(None)
+
+
+def test_log_generation_returns_immediately_and_flushes_in_background():
+    tracker = MLflowTracker(experiment_name="tracker-test")
+
+    start = time.perf_counter()
+    for _ in range(5):
+        assert tracker.log_generation(**GENERATION) is None
+    enqueue_seconds = time.perf_counter() - start
+
+    tracker.close()
+    runs = mlflow.search_runs(experiment_names=["tracker-test"])
+
+    assert enqueue_seconds < 0.05
+    assert tracker.stats()["logged"] == 5 and len(runs) == 5
+    assert set(runs["metrics.coverage_score"]) == {0.7}
+    assert set(runs["params.provider"]) == {"ollama"}
+
+
+def test_full_queue_drops_instead_of_blocking():
+    tracker = MLflowTracker(
+        experiment_name="tracker-drop", max_queue_size=1, flush_interval=60)
+    tracker._stop.set()  # keep the worker from draining between puts
+
+    for _ in range(20):
+        tracker.log_generation(**GENERATION)
+
+    assert tracker.stats()["dropped"] > 0
+    tracker.close()
+
+
+def test_flush_times_out_while_a_write_is_pending(monkeypatch):
+    tracker = MLflowTracker(experiment_name="tracker-drop")
+    write_entry = tracker._write_entry
+    monkeypatch.setattr(
+        tracker, "_write_entry", lambda entry: time.sleep(0.3) or write_entry(entry))
+    tracker.log_generation(**GENERATION)
+
+    start = time.perf_counter()
+    assert tracker.flush(timeout=0.05) is False
+    assert time.perf_counter() - start < 0.2
+    assert tracker.flush(timeout=5) is True
+    assert tracker.stats()["logged"] == 1
+    tracker.close()
+
+
+def test_failed_writes_are_logged(monkeypatch, caplog):
+    tracker = MLflowTracker(experiment_name="tracker-drop")
+
+    def fail(entry):
+        raise RuntimeError("tracking server down")
+
+    monkeypatch.setattr(tracker, "_write_entry", fail)
+    with caplog.at_level("WARNING", logger="src.mlflow_tracker"):
+        tracker.log_generation(**GENERATION)
+        tracker.close()
+
+    assert tracker.stats()["failed"] == 1
+    assert "tracking server down" in caplog.text
+
+
+def test_entry_is_written_in_three_calls_without_artifacts(monkeypatch):
+    tracker = MLflowTracker(
+        experiment_name="tracker-sync", async_logging=False, log_artifacts=False)
+    calls = []
+
+    def recording(name, method):
+        def call(*args, **kwargs):
+            calls.append(name)
+            return method(*args, **kwargs)
+        return call
+
+    for name in ("create_run", "log_batch", "log_dict", "set_terminated"):
+        monkeypatch.setattr(tracker.client, name, recording(name, getattr(tracker.client, name)))
+
+    run_id = tracker.log_generation(**GENERATION)
+
+    assert calls == ["create_run", "log_batch", "set_terminated"]
+    run = mlflow.get_run(run_id)
+    assert run.data.tags["passed_validation"] == "True"
+    assert run.data.params["provider"] == "ollama"
+
+
+def test_sync_mode_returns_run_id():
+    tracker = MLflowTracker(experiment_name="tracker-sync", async_logging=False)
+
+    run_id = tracker.log_generation(**GENERATION)
+
+    assert mlflow.get_run(run_id).data.metrics["latency"] == 1.5
@@ -0,0 +1,67 @@
+# tests/test_parsing.py
+import json
+
+from src.llm.parsing import IncrementalTestCaseParser, iter_test_cases
+
+
+def make_case(number, **overrides):
+    case = {
+        "id": f"TC_{number:03d}",
+        "title": f"Scenario {number} with {{braces}} and \"quotes\"",
+        "priority": "high",
+        "given": "User is on the password reset page",
+        "when": "User submits the form with a valid email",
+        "then": "A reset link is sent to the email address",
+    }
+    case.update(overrides)
+    return case
+
+
+def make_response(cases):
+    body = json.dumps({"test_cases": cases}, indent=2)
+    return f"Here are your test cases:\n```json\n{body}\n```\nDone."
+
+
+def test_parser_emits_each_case_when_its_brace_closes():
+    response = make_response([make_case(1), make_case(2), make_case(3)])
+    parser = IncrementalTestCaseParser()
+
+    emitted_at = []
+    for position, char in enumerate(response):
+        for test_case in parser.feed(char):
+            emitted_at.append((test_case.id, position))
+
+    assert [tc_id for tc_id, _ in emitted_at] == ["TC_001", "TC_002", "TC_003"]
+    # The first case is available long before the response ends
+    assert emitted_at[0][1] < len(response) // 2
+    assert parser.done and parser.errors == []
+
+
+def test_parser_reports_invalid_and_duplicate_cases():
+    response = make_response(
+        [make_case(1), make_case(2, priority="urgent"), make_case(1)])
+    parser = IncrementalTestCaseParser()
+
+    valid = parser.feed(response)
+
+    assert [tc.id for tc in valid] == ["TC_001"]
+    assert len(parser.errors) == 2
+    assert "Duplicate" in parser.errors[1]["error"]
+
+
+def test_iter_test_cases_stops_early_and_closes_stream():
+    response = make_response([make_case(i) for i in range(1, 6)])
+    closed = []
+
+    def stream():
+        try:
+            for start in range(0, len(response), 7):
+                yield {"text": response[start:start + 7], "done": False}
+            yield {"text": response, "done": True}
+        finally:
+            closed.append(True)
+
+    cases = list(iter_test_cases(stream(), max_cases=2))
+
+    assert [tc.id for tc in cases] == ["TC_001", "TC_002"]
+    assert closed == [True]
@@ -0,0 +1,113 @@
+# tests/test_prompts.py
+import json
+import os
+
+from src.llm.prompts import PromptBuilder
+
+
+def write_examples(path, stories):
+    path.write_text(json.dumps({"examples": [
+        {"user_story": story, "test_cases": [{"id": "TC_001"}]}
+        for story in stories
+    ]}))
+
+
+def test_build_matches_direct_template_render(tmp_path):
+    examples_file = tmp_path / "examples.json"
+    write_examples(examples_file, ["story one", "story two", "story three"])
+    builder = PromptBuilder(examples_path=str(examples_file))
+    examples = json.loads(examples_file.read_text())["examples"][:2]
+
+    prompts = builder.build("As a user, I want {{ braces }} kept")
+
+    assert prompts["user"] == builder.user_template.render(
+        user_story="As a user, I want {{ braces }} kept", examples=examples)
+    assert "story three" not in prompts["user"]
+
+
+def test_examples_reload_when_file_changes(tmp_path):
+    examples_file = tmp_path / "examples.json"
+    write_examples(examples_file, ["old example"])
+    builder = PromptBuilder(examples_path=str(examples_file))
+    assert "old example" in builder.build("story")["user"]
+
+    write_examples(examples_file, ["new example"])
+    stat = examples_file.stat()
+    os.utime(examples_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    user_prompt = builder.build("story")["user"]
+    assert "new example" in user_prompt and "old example" not in user_prompt
+
+
+def test_missing_examples_file_builds_without_examples(tmp_path):
+    builder = PromptBuilder(examples_path=str(tmp_path / "missing.json"))
+
+    assert "Examples of good test cases" not in builder.build("story")["user"]
+
+
+def test_build_selects_most_similar_examples(tmp_path):
+    examples_file = tmp_path / "examples.json"
+    write_examples(examples_file, [
+        "As a user, I want to log in with my password",
+        "As a customer, I want to add items to my cart",
+        "As a seller, I want to upload product images",
+    ])
+    builder = PromptBuilder(examples_path=str(examples_file))
+
+    user_prompt = builder.build(
+        "As a seller, I want to upload product videos", num_examples=1)["user"]
+
+    assert "upload product images" in user_prompt
+    assert "log in" not in user_prompt and "items to my cart" not in user_prompt
+
+
+def test_example_selector_batches_queries():
+    from src.llm.example_selector import ExampleSelector
+
+    selector = ExampleSelector([
+        {"user_story": "reset my password by email"},
+        {"user_story": "export reports as csv"},
+    ])
+
+    assert selector.select_indices_many(
+        ["export csv reports", "forgot password email", "unrelated"], k=1
+    ) == [[1], [0], [0]]
+    assert selector.select_indices("unrelated", k=2, min_score=0.0) == []
+
+
+def test_build_drops_examples_to_fit_token_budget(tmp_path):
+    examples_file = tmp_path / "examples.json"
+    write_examples(examples_file, ["upload images " * 50, "upload files " * 50])
+    builder = PromptBuilder(examples_path=str(examples_file))
+
+    unbounded = builder.build("upload images", max_prompt_tokens=10**6)
+    budget = unbounded["prompt_tokens"] - 1
+    bounded = builder.build("upload images", max_prompt_tokens=budget)
+
+    assert unbounded["num_examples"] == 2
+    assert bounded["num_examples"] == 1 and bounded["prompt_tokens"] <= budget
+    assert "upload images upload images" in bounded["user"]
+    assert "upload files" not in bounded["user"]
+
+
+def test_token_counter_caches_counts():
+    from src.shared.models.token_counter import TokenCounter
+
+    calls = []
+    counter = TokenCounter(lambda text: calls.append(text) or len(text))
+
+    assert counter.count("hello") == 5
+    assert counter.count("hello") == 5
+    assert counter.count("") == 0
+    assert calls == ["hello"]
+
+
+def test_structured_output_uses_short_system_prompt(tmp_path):
+    builder = PromptBuilder(examples_path=str(tmp_path / "missing.json"))
+
+    full = builder.build("As a user, I want to log in")
+    short = builder.build("As a user, I want to log in", structured_output=True)
+
+    assert short["user"] == full["user"]
+    assert "OUTPUT FORMAT" in full["system"] and "OUTPUT FORMAT" not in short["system"]
+    assert len(short["system"]) < len(full["system"]) / 2
@@ -0,0 +1,108 @@
+# tests/test_quality.py
+import json
+import re
+
+from src.llm.client import LLMConfig
+from src.validators.quality import QualityValidator, heuristic_scores, lexical_overlap
+
+STORY = "As a user, I want to reset my password so that I can regain account access"
+
+
+def make_cases(*titles):
+    return [
+        {
+            "id": f"TC_00{i}",
+            "title": title,
+            "priority": "high",
+            "given": "a registered user on the login page of the site",
+            "when": "they submit the request form with their details",
+            "then": "the system responds with a confirmation message shown",
+        }
+        for i, title in enumerate(titles, 1)
+    ]
+
+
+class FakeJudge:
+    """Scores every item in a batched prompt; counts calls"""
+
+    def __init__(self):
+        self.config = LLMConfig(model="judge")
+        self.prompts = []
+
+    def generate(self, prompt, system_prompt=""):
+        self.prompts.append(prompt)
+        n = len(re.findall(r"^Item \d+$", prompt, re.M))
+        scores = [
+            {"item": i, "relevance_score": 8, "coverage_score": 6,
+             "clarity_score": 7, "reasoning": "ok"}
+            for i in range(1, n + 1)
+        ]
+        return {"text": json.dumps({"scores": scores}), "tokens": 10}
+
+
+def test_lexical_overlap():
+    assert lexical_overlap(STORY, make_cases("Reset password and regain account access")) == 1.0
+    assert lexical_overlap(STORY, make_cases("Upload a profile picture")) == 0.0
+
+
+def test_batches_judge_calls_and_normalizes_scores():
+    judge = FakeJudge()
+    validator = QualityValidator(judge, batch_size=4, prefilter=False)
+    items = [(f"{STORY} #{i}", make_cases(f"Case {i}")) for i in range(10)]
+
+    results = validator.evaluate_many(items)
+
+    assert len(judge.prompts) == 3  # 4 + 4 + 2
+    assert results[0]["relevance"] == 0.8 and results[0]["source"] == "judge"
+    assert abs(results[9]["overall"] - 0.7) < 1e-9
+    assert results[0]["passed"]
+
+
+def test_judgments_are_cached_by_content():
+    judge = FakeJudge()
+    validator = QualityValidator(judge, prefilter=False)
+    cases = make_cases("Reset password via email link")
+
+    validator.evaluate_relevance(STORY, cases)
+    again = validator.evaluate_relevance(STORY, list(cases))
+
+    assert len(judge.prompts) == 1
+    assert again["source"] == "cache" and again["relevance"] == 0.8
+
+
+def test_prefilter_only_sends_borderline_outputs():
+    judge = FakeJudge()
+    validator = QualityValidator(judge)
+    clear_pass = make_cases("Reset password and regain account access")
+    clear_fail = make_cases("Upload a profile picture")
+    borderline = make_cases("Reset password with an invalid token")
+
+    results = validator.evaluate_many(
+        [(STORY, clear_pass), (STORY, clear_fail), (STORY, borderline)])
+
+    assert [r["source"] for r in results] == ["heuristic", "heuristic", "judge"]
+    assert len(judge.prompts) == 1 and "Item 2" not in judge.prompts[0]
+    assert results[1]["relevance"] == 0.0 and not results[1]["passed"]
+
+
+def test_unparseable_judge_response_scores_zero_and_is_not_cached():
+    class BrokenJudge(FakeJudge):
+        def generate(self, prompt, system_prompt=""):
+            self.prompts.append(prompt)
+            return {"text": "I think they are fine", "tokens": 3}
+
+    judge = BrokenJudge()
+    validator = QualityValidator(judge, prefilter=False)
+    first = validator.evaluate_relevance(STORY, make_cases("Reset password"))
+    validator.evaluate_relevance(STORY, make_cases("Reset password"))
+
+    assert first["overall"] == 0.0 and not first["passed"]
+    assert len(judge.prompts) == 2
+
+
+def test_heuristic_scores_detect_scenario_kinds():
+    scores = heuristic_scores(STORY, make_cases(
+        "Reset password successfully", "Reset fails with invalid email",
+        "Password at maximum length"))
+    assert scores["coverage"] == 1.0
+    assert set(scores) >= {"relevance", "coverage", "clarity", "overall"}
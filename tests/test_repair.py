@@ -0,0 +1,100 @@
+# tests/test_repair.py
+import json
+
+from src.llm.repair import (
+    build_repair_prompt,
+    parse_output,
+    repair_locally,
+    repair_output,
+)
+
+
+def make_case(i, **fields):
+    case = {
+        "id": f"TC_{i:03d}",
+        "title": f"Password reset scenario {i}",
+        "priority": "high",
+        "given": "a registered user on the login page",
+        "when": "they request a password reset link",
+        "then": "an email with a single-use link is sent",
+    }
+    case.update(fields)
+    return case
+
+
+class RecordingGenerate:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def __call__(self, prompt, system_prompt=""):
+        self.prompts.append((prompt, system_prompt))
+        return {"text": self.responses.pop(0), "tokens": 5}
+
+
+def test_trailing_commas_and_fences_are_fixed_locally():
+    text = "```json\n" + '{"test_cases": [{"a": "x, ]",},],}' + "\n```"
+    output, fixes = parse_output(text)
+    assert output == {"test_cases": [{"a": "x, ]"}]}
+    assert fixes == ["trailing_commas"]
+
+
+def test_duplicate_ids_priorities_and_length_fixed_without_model():
+    cases = [make_case(1), make_case(1), make_case(2, id="case 3", priority="High")]
+    cases += [make_case(i) for i in range(4, 14)]
+
+    output, fixes = repair_locally({"test_cases": cases})
+
+    ids = [c["id"] for c in output["test_cases"]]
+    assert len(ids) == 10 and len(set(ids)) == 10
+    assert output["test_cases"][2]["priority"] == "high"
+    assert set(fixes) == {"priority_case", "trimmed", "renumbered_ids"}
+
+    generate = RecordingGenerate()
+    result = repair_output(json.dumps(cases), generate)
+    assert result["valid"] and generate.prompts == []
+    assert result["repair"]["llm_calls"] == 0
+
+
+def test_only_invalid_cases_are_sent_for_repair():
+    cases = [make_case(1), make_case(2, title="short"), make_case(3)]
+    fixed = {"test_cases": [make_case(2)]}
+    generate = RecordingGenerate(json.dumps(fixed))
+
+    result = repair_output(json.dumps(cases), generate, user_story="As a user...")
+
+    assert result["valid"] and result["count"] == 3
+    assert [c["id"] for c in result["test_cases"]] == ["TC_001", "TC_003", "TC_002"]
+    prompt, system = generate.prompts[0]
+    assert "TC_002.title" in prompt
+    assert "TC_001" not in prompt and "TC_003" not in prompt
+    assert result["repair"]["llm_calls"] == 1 and result["repair"]["tokens"] == 5
+
+
+def test_missing_cases_are_requested_and_padding_ignored():
+    padded = {"test_cases": [make_case(7), make_case(8), make_case(9)]}
+    generate = RecordingGenerate(json.dumps(padded))
+
+    result = repair_output(
+        json.dumps({"test_cases": [make_case(1), make_case(2)]}), generate)
+
+    assert result["valid"] and result["count"] == 3
+    assert "1 new test case" in generate.prompts[0][0]
+
+
+def test_unparseable_output_is_resent_and_failures_are_reported():
+    cases = {"test_cases": [make_case(i) for i in range(1, 4)]}
+    result = repair_output("Sorry, here you go: test_cases...", RecordingGenerate(json.dumps(cases)))
+    assert result["valid"]
+
+    result = repair_output("not json", RecordingGenerate("still not json"))
+    assert not result["valid"] and result["errors"][0]["type"] == "json_invalid"
+
+    result = repair_output("not json", RecordingGenerate(), max_attempts=0)
+    assert result["repair"]["llm_calls"] == 0
+
+
+def test_repair_prompt_is_short():
+    prompt = build_repair_prompt(
+        [(make_case(2, title="short"), [{"field": "title", "message": "too short"}])])
+    assert len(prompt["system"]) + len(prompt["user"]) < 1000
@@ -0,0 +1,113 @@
+# tests/test_retry_policy.py
+import pytest
+
+from src.shared.models.llm_exeptions import OllamaCallError
+from src.shared.models.retry_policy import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+)
+
+
+class Flaky:
+    def __init__(self, failures, error=ConnectionError):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error("boom")
+        return "ok"
+
+
+def test_backoff_grows_exponentially_with_jitter_and_cap():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+
+    for attempt, ceiling in [(0, 1.0), (1, 2.0), (2, 4.0), (5, 5.0)]:
+        delays = [policy.backoff(attempt) for _ in range(200)]
+        assert all(0 <= d <= ceiling for d in delays)
+        assert max(delays) > ceiling / 2
+
+
+def test_retries_retryable_errors_only():
+    sleeps = []
+    policy = RetryPolicy(max_attempts=3, base_delay=0.01)
+
+    assert policy.call(Flaky(2), sleep=sleeps.append) == "ok"
+    assert len(sleeps) == 2
+
+    not_retryable = Flaky(1, error=ValueError)
+    with pytest.raises(ValueError):
+        policy.call(not_retryable, sleep=sleeps.append)
+    assert not_retryable.calls == 1
+
+
+def test_deadline_stops_retrying():
+    policy = RetryPolicy(max_attempts=10, base_delay=10, max_delay=10, deadline=0.001)
+    flaky = Flaky(5)
+
+    with pytest.raises(ConnectionError):
+        policy.call(flaky, sleep=lambda _: None)
+    assert flaky.calls == 1
+
+
+def test_breaker_opens_fails_fast_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+    policy = RetryPolicy(max_attempts=1)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            policy.call(Flaky(1), breaker=breaker)
+    assert breaker.state == "open"
+
+    never_called = Flaky(0)
+    with pytest.raises(CircuitOpenError):
+        policy.call(never_called, breaker=breaker)
+    assert never_called.calls == 0
+
+    import time
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert policy.call(Flaky(0), breaker=breaker) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_interrupted_probe_releases_the_half_open_slot():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.0)
+    policy = RetryPolicy(max_attempts=1)
+    with pytest.raises(ConnectionError):
+        policy.call(Flaky(1), breaker=breaker)
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        policy.call(interrupted, breaker=breaker)
+    assert breaker.state == "half_open"
+    assert policy.call(Flaky(0), breaker=breaker) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_safe_call_reports_breaker_state():
+    from src.shared.models.ollama_qwen3vl4b import OllamaQwen3vl4b
+
+    class DownLLM:
+        def invoke(self, prompt):
+            raise ConnectionError("connection refused")
+
+    model = OllamaQwen3vl4b(
+        retry_policy=RetryPolicy(max_attempts=2, base_delay=0),
+        circuit_breaker=CircuitBreaker(failure_threshold=2),
+    )
+    model.llm = DownLLM()
+
+    with pytest.raises(OllamaCallError) as first:
+        model.safe_call("hi")
+    with pytest.raises(OllamaCallError) as second:
+        model.safe_call("hi")
+
+    assert "2. Last error" in first.value.dev_message
+    assert first.value.breaker_state["state"] == "open"
+    assert second.value.circuit_open
@@ -0,0 +1,229 @@
+# tests/test_scheduler.py
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.main import create_app
+from src.benchmarks.fake_ollama import FakeOllamaServer
+from src.llm.async_client import AsyncLLMClient
+from src.llm.client import LLMClient, LLMConfig
+from src.llm.scheduler import (
+    GenerationScheduler,
+    QueueFullError,
+    QueueTimeoutError,
+    current_request,
+    request_context,
+)
+from src.shared.infrastructure.telemetry import Telemetry, set_telemetry
+
+
+@pytest.fixture
+def telemetry():
+    fresh = Telemetry()
+    previous = set_telemetry(fresh)
+    yield fresh
+    set_telemetry(previous)
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.001)
+
+
+def test_interactive_first_then_tenants_round_robin(telemetry):
+    scheduler = GenerationScheduler(max_concurrency=1, reserved_interactive=0)
+    order = []
+
+    async def job(name, priority, tenant):
+        async with scheduler.aslot(priority, tenant):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async def run():
+        async with scheduler.aslot("batch", "a"):
+            tasks = [asyncio.create_task(job(*args)) for args in [
+                ("a1", "batch", "a"), ("a2", "batch", "a"), ("a3", "batch", "a"),
+                ("b1", "batch", "b"), ("i1", "interactive", "c")]]
+            await asyncio.sleep(0.01)
+            stats = scheduler.stats()
+            assert stats["queued"] == 5
+            assert stats["classes"]["batch"]["tenants_waiting"] == 2
+            assert telemetry.queue_depth.value(priority="batch") == 4
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+    assert order == ["i1", "a1", "b1", "a2", "a3"]
+    assert scheduler.stats()["classes"]["batch"]["admitted"] == 5
+    assert telemetry.queue_wait.snapshot(priority="batch")["count"] == 5
+    assert telemetry.queue_depth.value(priority="batch") == 0
+
+
+def test_reserved_slot_is_kept_free_of_batch_work(telemetry):
+    scheduler = GenerationScheduler(max_concurrency=2, reserved_interactive=1)
+
+    with scheduler.slot("batch"):
+        with pytest.raises(QueueTimeoutError):
+            with scheduler.slot("batch", timeout=0.01):
+                pass
+        with scheduler.slot("interactive", timeout=0.01):
+            assert scheduler.stats()["active"] == 2
+
+    stats = scheduler.stats()
+    assert stats["active"] == stats["queued"] == 0
+    assert stats["classes"]["batch"]["rejected"] == 1
+    assert telemetry.rejections.value(priority="batch", reason="timeout") == 1
+    assert telemetry.active_requests.value(priority="batch") == 0
+
+
+def test_full_queue_rejects_at_once(telemetry):
+    scheduler = GenerationScheduler(max_concurrency=1, queue_limits={"interactive": 1})
+    admitted = []
+
+    def waiter():
+        with scheduler.slot():
+            admitted.append(True)
+
+    with scheduler.slot():
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        wait_until(lambda: scheduler.stats()["queued"] == 1)
+
+        start = time.perf_counter()
+        with pytest.raises(QueueFullError):
+            with scheduler.slot():
+                pass
+        assert time.perf_counter() - start < 0.1
+    thread.join(2)
+
+    assert admitted == [True]
+    assert telemetry.rejections.value(priority="interactive", reason="queue_full") == 1
+
+
+def test_cancelled_waiter_leaves_the_queue(telemetry):
+    scheduler = GenerationScheduler(max_concurrency=1)
+
+    async def run():
+        async with scheduler.aslot():
+            async def wait_for_slot():
+                async with scheduler.aslot():
+                    pass
+
+            task = asyncio.create_task(wait_for_slot())
+            await asyncio.sleep(0.01)
+            assert scheduler.stats()["queued"] == 1
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert scheduler.stats()["queued"] == 0
+        async with scheduler.aslot(timeout=0.1):
+            return scheduler.stats()["active"]
+
+    assert asyncio.run(run()) == 1
+    assert scheduler.stats()["active"] == 0
+
+
+def test_request_context_sets_priority_and_tenant():
+    assert current_request() == ("interactive", "default")
+    with request_context("batch", "backfill"):
+        with request_context(tenant="other"):
+            assert current_request() == ("batch", "other")
+    assert current_request() == ("interactive", "default")
+    with pytest.raises(ValueError):
+        with request_context("urgent"):
+            pass
+
+
+def test_clients_report_rejection_without_raising(telemetry):
+    scheduler = GenerationScheduler(max_concurrency=1, queue_limits={"batch": 0})
+    with FakeOllamaServer() as server:
+        config = LLMConfig(ollama_base_url=server.url)
+        client = LLMClient(config, scheduler=scheduler)
+        async_client = AsyncLLMClient(config, scheduler=scheduler)
+
+        with scheduler.slot(), request_context("batch", "backfill"):
+            result = client.generate("Write test cases")
+            async_result = asyncio.run(async_client.agenerate("Write test cases"))
+        ok = client.generate("Write test cases")
+        client.close()
+
+    for rejected in (result, async_result):
+        assert rejected["rejected"] is True
+        assert "queue is full" in rejected["error"]
+    assert not ok.get("error")
+    assert server.requests["/api/chat"] == 1
+    assert telemetry.llm_requests.value(provider="ollama", outcome="rejected") == 2
+
+
+def test_api_answers_503_when_capacity_is_exhausted(telemetry):
+    scheduler = GenerationScheduler(max_concurrency=1, queue_limits={"interactive": 0})
+    with FakeOllamaServer() as server:
+        llm_client = AsyncLLMClient(
+            LLMConfig(ollama_base_url=server.url), scheduler=scheduler)
+        app = create_app(llm_client=llm_client, enable_tracking=False, warm_up=False)
+        with TestClient(app) as client:
+            with scheduler.slot():
+                rejected = client.post(
+                    "/generate", headers={"X-Tenant-ID": "team-a"},
+                    json={"user_story": "As a user, I want to reset my password"})
+            health = client.get("/health").json()
+
+    assert rejected.status_code == 503
+    assert health["scheduler"]["max_concurrency"] == 1
+    assert health["scheduler"]["classes"]["interactive"]["rejected"] == 1
+
+
+def test_batch_only_client_uses_every_slot():
+    in_flight, peak = 0, 0
+
+    class CountingClient(AsyncLLMClient):
+        async def _call_ollama(self, prompt, system_prompt):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.02)
+            in_flight -= 1
+            return {"text": prompt, "tokens": 1}
+
+    client = CountingClient(LLMConfig(max_concurrency=4, ollama_base_url="http://unused"))
+
+    async def run():
+        with request_context("batch", "backfill"):
+            return await client.agenerate_many([f"story {i}" for i in range(12)])
+
+    results = asyncio.run(run())
+
+    assert not any(r.get("error") for r in results)
+    assert peak == 4
+
+
+def test_interactive_request_does_not_join_a_batch_call():
+    calls = []
+
+    class RecordingClient(AsyncLLMClient):
+        async def _call_ollama(self, prompt, system_prompt):
+            calls.append(prompt)
+            await asyncio.sleep(0.02)
+            return {"text": prompt, "tokens": 1}
+
+    client = RecordingClient(LLMConfig(max_concurrency=1, ollama_base_url="http://unused"))
+
+    async def batch():
+        with request_context("batch"):
+            return await client.agenerate("same story")
+
+    async def run():
+        batch_task = asyncio.create_task(batch())
+        await asyncio.sleep(0)
+        interactive = await client.agenerate("same  story")
+        return interactive, await batch_task
+
+    interactive, batched = asyncio.run(run())
+
+    assert len(calls) == 2
+    assert not interactive.get("coalesced") and not batched.get("coalesced")
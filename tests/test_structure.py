@@ -0,0 +1,74 @@
+# tests/test_structure.py
+import json
+
+from src.validators.structure import StructureValidator, TestCaseOutput
+
+
+def make_output(n=3, **overrides):
+    cases = [
+        {
+            "id": f"TC_{i:03d}",
+            "title": f"Password reset scenario {i}",
+            "priority": "high",
+            "given": "a registered user on the login page",
+            "when": "they request a password reset link",
+            "then": "an email with a single-use link is sent",
+        }
+        for i in range(1, n + 1)
+    ]
+    for index, fields in overrides.items():
+        cases[int(index)].update(fields)
+    return {"test_cases": cases}
+
+
+def test_valid_output_returns_plain_dicts():
+    result = StructureValidator.validate(make_output())
+
+    assert result["valid"] and result["errors"] == []
+    assert result["count"] == 3
+    assert isinstance(result["test_cases"][0], dict)
+    assert result["test_cases"] == [
+        tc.model_dump() for tc in TestCaseOutput(**make_output()).test_cases]
+
+
+def test_raw_json_bytes_are_validated_directly():
+    raw = json.dumps(make_output()).encode()
+    assert StructureValidator.validate(raw)["valid"]
+
+    result = StructureValidator.validate(b'{"test_cases": [')
+    assert not result["valid"]
+    assert result["errors"][0]["type"] == "json_invalid"
+
+
+def test_errors_are_reported_per_field():
+    output = make_output(**{"1": {"id": "case-2", "priority": "urgent"}})
+
+    result = StructureValidator.validate(output)
+
+    assert not result["valid"] and result["test_cases"] == []
+    fields = {e["field"]: e["type"] for e in result["errors"]}
+    assert fields == {
+        "test_cases.1.id": "string_pattern_mismatch",
+        "test_cases.1.priority": "literal_error",
+    }
+
+
+def test_list_length_and_unique_ids():
+    too_few = StructureValidator.validate(make_output(2))
+    assert too_few["errors"][0]["field"] == "test_cases"
+    assert too_few["errors"][0]["type"] == "too_short"
+
+    duplicate = StructureValidator.validate(make_output(**{"2": {"id": "TC_001"}}))
+    assert "unique" in duplicate["errors"][0]["message"]
+
+
+def test_steps_are_stripped():
+    output = make_output(**{"0": {"given": "   a registered user   "}})
+    assert StructureValidator.validate(output)["test_cases"][0]["given"] == "a registered user"
+
+
+def test_validate_many_keeps_order():
+    results = StructureValidator.validate_many(
+        [make_output(), make_output(2), json.dumps(make_output(4))])
+    assert [r["valid"] for r in results] == [True, False, True]
+    assert results[2]["count"] == 4
@@ -0,0 +1,159 @@
+# tests/test_telemetry.py
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.main import create_app
+from src.benchmarks.fake_ollama import FakeOllamaServer
+from src.llm.async_client import AsyncLLMClient
+from src.llm.cache import MemoryCache
+from src.llm.client import LLMClient, LLMConfig
+from src.llm.repair import repair_output
+from src.shared.infrastructure.telemetry import Telemetry, set_telemetry
+
+
+@pytest.fixture
+def telemetry():
+    fresh = Telemetry()
+    previous = set_telemetry(fresh)
+    yield fresh
+    set_telemetry(previous)
+
+
+def test_prometheus_text_format():
+    telemetry = Telemetry()
+    telemetry.retries.inc(reason='say "hi"\n')
+    telemetry.retries.inc(2, reason="repair")
+    for seconds in (0.001, 0.2, 100.0):
+        telemetry.stage_seconds.observe(seconds, stage="decode")
+
+    text = telemetry.render_prometheus()
+
+    assert "# TYPE llm_retries_total counter" in text
+    assert 'llm_retries_total{reason="repair"} 2' in text
+    assert 'llm_retries_total{reason="say \\"hi\\"\\n"} 1' in text
+    assert "# TYPE stage_duration_seconds histogram" in text
+    assert 'stage_duration_seconds_bucket{stage="decode",le="0.005"} 1' in text
+    assert 'stage_duration_seconds_bucket{stage="decode",le="0.25"} 2' in text
+    assert 'stage_duration_seconds_bucket{stage="decode",le="60"} 2' in text
+    assert 'stage_duration_seconds_bucket{stage="decode",le="+Inf"} 3' in text
+    assert 'stage_duration_seconds_count{stage="decode"} 3' in text
+    assert text.endswith("\n")
+
+    with pytest.raises(ValueError):
+        telemetry.retries.inc(stage="decode")
+
+
+def test_spans_nest_and_export_as_otlp_json(tmp_path):
+    span_file = tmp_path / "spans.jsonl"
+    telemetry = Telemetry(span_file=str(span_file))
+
+    with telemetry.span("pipeline", story_id="7"):
+        with telemetry.span("prompt_build"):
+            pass
+        telemetry.record("decode", 0.5, model="m")
+        with pytest.raises(RuntimeError):
+            with telemetry.span("parse_validate"):
+                raise RuntimeError("bad json")
+    telemetry.close()
+
+    lines = [json.loads(line) for line in span_file.read_text().splitlines()]
+    spans = {
+        line["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["name"]:
+            line["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        for line in lines
+    }
+    root = spans["pipeline"]
+
+    assert list(spans) == ["prompt_build", "decode", "parse_validate", "pipeline"]
+    assert root["parentSpanId"] == ""
+    assert root["attributes"] == [{"key": "story_id", "value": {"stringValue": "7"}}]
+    for name in ("prompt_build", "decode", "parse_validate"):
+        assert spans[name]["traceId"] == root["traceId"]
+        assert spans[name]["parentSpanId"] == root["spanId"]
+    decode = spans["decode"]
+    assert int(decode["endTimeUnixNano"]) - int(decode["startTimeUnixNano"]) == 500_000_000
+    assert spans["parse_validate"]["status"] == {
+        "code": 2, "message": "RuntimeError: bad json"}
+    assert telemetry.stage_seconds.snapshot(stage="parse_validate")["count"] == 1
+
+
+def test_client_records_ollama_timings_and_cache_hits(telemetry):
+    with FakeOllamaServer(token_delay=0.0005) as server:
+        config = LLMConfig(ollama_base_url=server.url, coalesce_requests=False)
+        with LLMClient(config, cache=MemoryCache()) as client:
+            first = client.generate("Write test cases")
+            client.generate("Write test cases")
+
+    assert first["eval_duration"] == pytest.approx(len(server.tokens) * 0.0005)
+    assert first["prompt_eval_duration"] >= 0
+    assert telemetry.stage_seconds.snapshot(stage="llm_call")["count"] == 1
+    assert telemetry.stage_seconds.snapshot(stage="decode")["sum"] == pytest.approx(
+        first["eval_duration"])
+    assert telemetry.cache_requests.value(result="hit") == 1
+    assert telemetry.cache_requests.value(result="miss") == 1
+    assert telemetry.llm_requests.value(provider="ollama", outcome="success") == 1
+
+
+def test_repair_counts_retries_and_validation_failures(telemetry):
+    result = repair_output(
+        "not json at all", lambda prompt, system: {"text": "still not json"},
+        max_attempts=2)
+
+    assert not result["valid"]
+    assert telemetry.retries.value(reason="repair") == 2
+    assert telemetry.validation_failures.value(error_type="json_invalid") == 1
+
+
+def test_metrics_endpoint_reports_pipeline_stages(telemetry):
+    with FakeOllamaServer() as server:
+        app = create_app(
+            llm_client=AsyncLLMClient(LLMConfig(ollama_base_url=server.url)),
+            enable_tracking=False, warm_up=False)
+        with TestClient(app) as client:
+            generated = client.post("/generate", json={
+                "user_story": "As a user, I want to reset my password"})
+            metrics = client.get("/metrics")
+
+    assert generated.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    for stage in ("pipeline", "prompt_build", "llm_call", "queue_wait",
+                  "parse_validate", "coverage"):
+        assert f'stage_duration_seconds_count{{stage="{stage}"}} 1' in metrics.text
+    assert 'llm_requests_total{provider="ollama",outcome="success"} 1' in metrics.text
+
+
+def test_llm_call_span_excludes_time_queued_for_a_slot(telemetry):
+    class InstantClient(LLMClient):
+        def _call_ollama(self, prompt, system_prompt):
+            return {"text": "ok", "tokens": 1}
+
+    client = InstantClient(LLMConfig(max_concurrency=1, ollama_base_url="http://unused"))
+    held = threading.Event()
+
+    def hold_slot():
+        with client.scheduler.slot():
+            held.set()
+            time.sleep(0.2)
+
+    holder = threading.Thread(target=hold_slot)
+    holder.start()
+    held.wait(2)
+    client.generate("Write test cases")
+    holder.join()
+
+    assert telemetry.stage_seconds.snapshot(stage="llm_call")["sum"] < 0.1
+    assert telemetry.stage_seconds.snapshot(stage="queue_wait")["sum"] >= 0.15
+
+
+def test_span_export_failure_is_logged_not_raised(tmp_path, caplog):
+    telemetry = Telemetry(span_file=str(tmp_path / "missing" / "spans.jsonl"))
+
+    with telemetry.span("prompt_build"):
+        pass
+    telemetry.close()
+
+    assert "Span export" in caplog.text
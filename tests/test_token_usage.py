@@ -0,0 +1,96 @@
+# tests/test_token_usage.py
+import pytest
+from langchain_core.outputs import Generation, LLMResult
+
+from src.benchmarks.fake_ollama import FakeOllamaServer
+from src.llm.client import LLMClient, LLMConfig
+from src.shared.infrastructure.telemetry import Telemetry, TokenMeter, set_telemetry
+from src.shared.models.llm_model_base import TokenUsage
+
+
+@pytest.fixture
+def telemetry():
+    fresh = Telemetry()
+    previous = set_telemetry(fresh)
+    yield fresh
+    set_telemetry(previous)
+
+
+def test_token_usage_from_ollama_metadata():
+    usage = TokenUsage.from_ollama({
+        "model": "qwen3-vl:8b", "prompt_eval_count": 120, "eval_count": 50,
+        "prompt_eval_duration": 400_000_000, "eval_duration": 2_000_000_000,
+        "load_duration": 0,
+    })
+
+    assert (usage.prompt_tokens, usage.completion_tokens, usage.total_tokens) == (120, 50, 170)
+    assert usage.model == "qwen3-vl:8b" and usage.load_duration == 0.0
+    assert usage.tokens_per_second == 25.0
+    assert usage.prompt_tokens_per_second == 300.0
+    assert not usage.estimated
+    assert TokenUsage.from_ollama({}).eval_duration is None
+
+
+def test_token_meter_rolls_over_its_window():
+    now = [0.0]
+    meter = TokenMeter(window=10.0, clock=lambda: now[0])
+    meter.record(TokenUsage(prompt_tokens=10, completion_tokens=40, eval_duration=2.0, model="a"))
+    now[0] = 5.0
+    meter.record(TokenUsage(prompt_tokens=10, completion_tokens=60, eval_duration=1.0, model="a"))
+    meter.record(TokenUsage(prompt_tokens=5, completion_tokens=8, model="b", estimated=True))
+
+    assert meter.tokens_per_second("a") == pytest.approx(100 / 3)
+    assert meter.tokens_per_second("b") == 0.0  # no provider timings
+    snapshot = meter.snapshot()
+    assert snapshot["a"]["completion_tokens"] == 100
+    assert snapshot["a"]["generated_tokens_per_second"] == 10.0
+    assert snapshot["b"]["estimated_requests"] == 1
+
+    now[0] = 12.0  # the first call has left the window
+    assert meter.tokens_per_second("a") == 60.0
+    assert meter.snapshot()["a"]["requests"] == 2
+    assert 'llm_tokens_total{model="a",type="completion"} 100' in "\n".join(meter.render())
+
+
+def test_client_reports_provider_token_split(telemetry):
+    with FakeOllamaServer(token_delay=0.001) as server:
+        with LLMClient(LLMConfig(ollama_base_url=server.url, model="m")) as client:
+            result = client.generate("Write test cases for login", "You are a QA engineer")
+            chunks = list(client.generate_stream("Write test cases for login"))
+
+    assert result["prompt_tokens"] == 10
+    assert result["completion_tokens"] == len(server.tokens)
+    assert result["tokens"] == 10 + len(server.tokens)
+    assert result["tokens_per_second"] == pytest.approx(1000, rel=0.01)
+    assert chunks[-1]["tokens_per_second"] == pytest.approx(1000, rel=0.01)
+    totals = telemetry.tokens.snapshot()["m"]
+    assert totals["requests"] == 2
+    assert totals["completion_tokens"] == 2 * len(server.tokens)
+    assert telemetry.tokens.tokens_per_second("m") == pytest.approx(1000, rel=0.01)
+
+
+def test_model_uses_generation_info_and_falls_back_to_estimates(telemetry):
+    from src.shared.models.ollama_qwen3vl4b import OllamaQwen3vl4b
+    from src.shared.models.retry_policy import CircuitBreaker, RetryPolicy
+
+    class FakeLLM:
+        info = {"prompt_eval_count": 30, "eval_count": 12,
+                "prompt_eval_duration": 10**8, "eval_duration": 6 * 10**8}
+
+        def generate(self, prompts):
+            return LLMResult(generations=[[
+                Generation(text="Hello world", generation_info=self.info)]])
+
+    model = OllamaQwen3vl4b(
+        retry_policy=RetryPolicy(base_delay=0), circuit_breaker=CircuitBreaker())
+    model.llm = FakeLLM()
+    response, usage = model.safe_call_with_tokens("hi")
+
+    assert response == "Hello world"
+    assert (usage.prompt_tokens, usage.completion_tokens) == (30, 12)
+    assert usage.tokens_per_second == 20.0 and not usage.estimated
+
+    FakeLLM.info = None
+    _, estimated = model.safe_call_with_tokens("hi")
+    assert estimated.estimated and estimated.completion_tokens > 0
+    assert telemetry.tokens.snapshot()[model.model]["estimated_requests"] == 1
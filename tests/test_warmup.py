@@ -0,0 +1,85 @@
+# tests/test_warmup.py
+from src.llm.client import LLMConfig
+from src.llm.warmup import ModelWarmer, parse_model_keep_alive
+
+
+class FakeOllama:
+    """Reports a multi-second load the first time each model is requested"""
+
+    def __init__(self, host, calls, fail=False):
+        self.host = host
+        self.calls = calls
+        self.fail = fail
+        self.loaded = set()
+
+    def generate(self, model, prompt, keep_alive):
+        if self.fail:
+            raise ConnectionError("connection refused")
+        self.calls.append((self.host, model, keep_alive))
+        load_ns = 0 if model in self.loaded else 5_000_000_000
+        self.loaded.add(model)
+        return {"response": "", "load_duration": load_ns}
+
+
+def test_parse_model_keep_alive():
+    assert parse_model_keep_alive("qwen3-vl:4b=1h, llama3.2:3b,", "30m") == {
+        "qwen3-vl:4b": "1h",
+        "llama3.2:3b": "30m",
+    }
+    assert parse_model_keep_alive("", "30m") == {}
+
+
+def test_warm_up_loads_every_model_on_every_endpoint():
+    calls = []
+    warmer = ModelWarmer(
+        {"a:4b": "1h", "b:1b": "5m"},
+        ["http://n1:11434", "http://n2:11434"],
+        client_factory=lambda host: FakeOllama(host, calls),
+    )
+
+    latencies = warmer.warm_up()
+
+    assert set(latencies) == {"a:4b", "b:1b"}
+    assert all(v is not None for hosts in latencies.values() for v in hosts.values())
+    assert ("http://n2:11434", "a:4b", "1h") in calls
+    assert ("http://n1:11434", "b:1b", "5m") in calls
+    assert len(calls) == 4
+
+
+def test_pings_are_kept_out_of_generation_latency():
+    calls = []
+    warmer = ModelWarmer(
+        {"a:4b": "30m"}, ["http://n1:11434"],
+        client_factory=lambda host: FakeOllama(host, calls))
+
+    warmer.warm_up()  # cold load
+    warmer.warm_up()  # already resident
+    warmer.record("a:4b", 1.2, load_duration=0.01)
+    warmer.record("a:4b", 6.0, load_duration=5.0)
+
+    stats = warmer.stats()["a:4b"]
+    assert stats["cold"]["count"] == 1
+    assert stats["warm"]["count"] == 1
+    assert stats["warm"]["p50"] == 1.2
+    assert stats["pings"]["count"] == 2
+    assert stats["ping_loads"] == 1
+    assert stats["keep_alive"] == "30m"
+    assert "http://n1:11434" in stats["last_ping"]
+
+
+def test_failed_ping_is_recorded_not_raised():
+    warmer = ModelWarmer(
+        {"a:4b": "30m"}, ["http://down:11434"],
+        client_factory=lambda host: FakeOllama(host, [], fail=True))
+
+    assert warmer.warm_up() == {"a:4b": {"http://down:11434": None}}
+    assert "connection refused" in warmer.errors[0]
+
+
+def test_config_keep_alive_per_model():
+    config = LLMConfig(model="a:4b", keep_alive="30m", warmup_models="a:4b=2h,b:1b")
+    assert config.model_keep_alive() == "2h"
+    assert LLMConfig(model="c:7b", keep_alive="30m", warmup_models="a:4b=2h").model_keep_alive() == "30m"
+
+    warmer = ModelWarmer.from_config(config)
+    assert warmer.models == {"a:4b": "2h", "b:1b": "30m"}